@@ -13,6 +13,7 @@ from .permissions import IsAdminUser
 from .google_auth import verify_google_id_token, get_or_create_user_from_google
 from .models import OneTimeToken
 from .email_sender import send_verification_email, send_password_reset_email, send_email_change_confirmation
+from barbershops.streaming import CHUNK_SIZE, serialize_queryset, stream_json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -365,27 +366,28 @@ def create_barber(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_all_barbers(request):
-    """Get all barbers."""
+    """Get all barbers (streamed)."""
     barbers = User.objects.filter(role='Barber')
     
     if request.user.role == 'Admin':
-        serializer = UserSerializer(barbers, many=True)
-        return Response({
+        return stream_json({
             'success': True,
-            'barbers': serializer.data
-        })
+            'barbers': serialize_queryset(barbers, UserSerializer)
+        }, 'barbers')
     elif request.user.role == 'Customer':
         # Limited details for customers
-        barber_data = [{
-            '_id': str(barber.id),
-            'name': barber.name,
-            'specialization': barber.specialization,
-            'phone': barber.phone,
-        } for barber in barbers]
-        return Response({
+        barber_data = ({
+            '_id': str(barber_id),
+            'name': name,
+            'specialization': specialization,
+            'phone': phone,
+        } for barber_id, name, specialization, phone in barbers.values_list(
+            'id', 'name', 'specialization', 'phone',
+        ).iterator(chunk_size=CHUNK_SIZE))
+        return stream_json({
             'success': True,
             'barbers': barber_data
-        })
+        }, 'barbers')
     
     return Response({
         'success': False,
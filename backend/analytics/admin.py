@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import DailyShopStats, RollupWatermark
+
+
+@admin.register(DailyShopStats)
+class DailyShopStatsAdmin(admin.ModelAdmin):
+    list_display = ['barbershop', 'date', 'bookings_total', 'orders_count', 'booking_revenue', 'order_revenue', 'new_customers', 'returning_customers']
+    list_filter = ['date']
+    raw_id_fields = ['barbershop']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ['name', 'value', 'updated_at']
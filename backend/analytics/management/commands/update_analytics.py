@@ -0,0 +1,31 @@
+"""
+Bring the daily dashboard rollups up to date (incremental, from the watermark).
+--rebuild recomputes the last --days days instead; --full recomputes all history.
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analytics.rollups import REBUILD_DAYS, rebuild, update_rollups
+
+
+class Command(BaseCommand):
+    help = "Update per-shop daily sales and booking rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute recent days instead of only changed rows.')
+        parser.add_argument('--days', type=int, default=REBUILD_DAYS, help='Days to recompute with --rebuild.')
+        parser.add_argument('--full', action='store_true', help='Recompute every day since 2000-01-01.')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            n = rebuild(first=date(2000, 1, 1))
+        elif options['rebuild']:
+            n = rebuild(first=timezone.localdate() - timedelta(days=max(1, options['days']) - 1))
+        else:
+            n = update_rollups()
+            if n is None:
+                self.stdout.write("update_analytics: another run is in progress.")
+                return
+        self.stdout.write(self.style.SUCCESS(f"update_analytics: {n} shop-day(s) recomputed."))
@@ -0,0 +1,56 @@
+# Daily per-shop dashboard rollups
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('barbershops', '0011_popular_times'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'analytics_rollup_watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyShopStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('bookings_total', models.PositiveIntegerField(default=0)),
+                ('bookings_confirmed', models.PositiveIntegerField(default=0)),
+                ('bookings_approved', models.PositiveIntegerField(default=0)),
+                ('bookings_cancelled', models.PositiveIntegerField(default=0)),
+                ('booking_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('items_sold', models.PositiveIntegerField(default=0)),
+                ('order_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue_cash', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue_online', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('new_customers', models.PositiveIntegerField(default=0)),
+                ('returning_customers', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('barbershop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='barbershops.barbershop')),
+            ],
+            options={
+                'db_table': 'analytics_daily_shop_stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyshopstats',
+            constraint=models.UniqueConstraint(fields=('barbershop', 'date'), name='unique_daily_shop_stats'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import models
+
+
+class DailyShopStats(models.Model):
+    """
+    One barbershop's activity on one (local) day, maintained by analytics.rollups.
+
+    Bookings are counted on their appointment day, orders on their creation day. Revenue is
+    split by how it is paid: cash (cash bookings + cash-on-delivery orders) or online
+    (paid online bookings + paid online orders); cancelled bookings count for nothing.
+    """
+    barbershop = models.ForeignKey(
+        'barbershops.Barbershop',
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    date = models.DateField()
+
+    bookings_total = models.PositiveIntegerField(default=0)
+    bookings_confirmed = models.PositiveIntegerField(default=0)
+    bookings_approved = models.PositiveIntegerField(default=0)
+    bookings_cancelled = models.PositiveIntegerField(default=0)
+    booking_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    orders_count = models.PositiveIntegerField(default=0)
+    items_sold = models.PositiveIntegerField(default=0)
+    order_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    revenue_cash = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue_online = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    # Customers with a booking or order that day: first ever at this shop, or seen before
+    new_customers = models.PositiveIntegerField(default=0)
+    returning_customers = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'analytics_daily_shop_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['barbershop', 'date'], name='unique_daily_shop_stats'),
+        ]
+
+    def __str__(self):
+        return f"{self.barbershop_id} {self.date}"
+
+
+class RollupWatermark(models.Model):
+    """How far (by source rows' updated_at) a rollup has been brought up to date."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'analytics_rollup_watermarks'
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
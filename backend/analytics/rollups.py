@@ -0,0 +1,225 @@
+"""
+Daily per-shop rollups (DailyShopStats) for owner dashboards.
+
+update_rollups() is incremental: it collects the (shop, day) pairs of bookings and orders
+whose updated_at is at or after the watermark, recomputes those days from the source tables
+(a few grouped queries per shop, whatever the number of days) and upserts them. The
+watermark then moves to the run's start minus OVERLAP, so rows written by transactions that
+were still open during the run are seen next time; recomputing a day is idempotent.
+
+What updated_at cannot show: the old day of a row that moved (a rescheduled booking) or
+disappeared (a deleted order), and later days whose new/returning split changes because of
+a backdated first visit. rebuild() recomputes every day in a range and runs nightly over the
+last REBUILD_DAYS days to settle those.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from bookings.models import Booking
+from services.models import Order, OrderItem
+from .models import DailyShopStats, RollupWatermark
+
+WATERMARK = 'daily_shop_stats'
+OVERLAP = timedelta(minutes=5)
+REBUILD_DAYS = 35
+
+CASH_BOOKING = 'Pending to be paid on cash'
+ONLINE_BOOKING = 'Online Paid'
+ACTIVE_BOOKING = ~Q(booking_status='Cancelled')
+# Orders that count as sales: cash on delivery, or online and paid
+PAID_ONLINE_ORDER = Q(payment_method='ONLINE', paid_at__isnull=False)
+SOLD_ORDER = Q(payment_method='COD') | PAID_ONLINE_ORDER
+
+STAT_FIELDS = [
+    'bookings_total', 'bookings_confirmed', 'bookings_approved', 'bookings_cancelled', 'booking_revenue',
+    'orders_count', 'items_sold', 'order_revenue',
+    'revenue_cash', 'revenue_online',
+    'new_customers', 'returning_customers',
+]
+
+
+def _day_range(first, last):
+    """Aware [start of first, start of the day after last) in the current time zone."""
+    start = timezone.make_aware(datetime.combine(first, time.min))
+    end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min))
+    return start, end
+
+
+def _shop_days(bookings, orders):
+    """{shop_id: {date}} of the given bookings' appointment days and orders' creation days."""
+    days = defaultdict(set)
+    for shop_id, day in (
+        bookings.filter(barbershop__isnull=False).annotate(day=TruncDate('booking_time'))
+        .order_by().values_list('barbershop_id', 'day').distinct()
+    ):
+        days[shop_id].add(day)
+    for shop_id, day in (
+        orders.filter(barbershop__isnull=False).annotate(day=TruncDate('created_at'))
+        .order_by().values_list('barbershop_id', 'day').distinct()
+    ):
+        days[shop_id].add(day)
+    return days
+
+
+def _customer_split(shop_id, bookings, orders, stats):
+    """Fill new/returning customer counts: new when the day is their first visit to the shop."""
+    active = defaultdict(set)
+    for day, customer_id in (
+        bookings.filter(ACTIVE_BOOKING).annotate(day=TruncDate('booking_time'))
+        .order_by().values_list('day', 'customer_id').distinct()
+    ):
+        active[day].add(customer_id)
+    for day, user_id in (
+        orders.filter(SOLD_ORDER).annotate(day=TruncDate('created_at'))
+        .order_by().values_list('day', 'user_id').distinct()
+    ):
+        active[day].add(user_id)
+    customer_ids = set().union(*active.values()) if active else set()
+    if not customer_ids:
+        return
+    first_seen = {}
+    for customer_id, first in (
+        Booking.objects.filter(ACTIVE_BOOKING, barbershop_id=shop_id, customer_id__in=customer_ids)
+        .order_by().values('customer_id').annotate(first=Min('booking_time')).values_list('customer_id', 'first')
+    ):
+        first_seen[customer_id] = first
+    for user_id, first in (
+        Order.objects.filter(SOLD_ORDER, barbershop_id=shop_id, user_id__in=customer_ids)
+        .order_by().values('user_id').annotate(first=Min('created_at')).values_list('user_id', 'first')
+    ):
+        if user_id not in first_seen or first < first_seen[user_id]:
+            first_seen[user_id] = first
+    for day, ids in active.items():
+        if day not in stats:
+            continue
+        new = sum(1 for i in ids if timezone.localdate(first_seen[i]) == day)
+        stats[day]['new_customers'] = new
+        stats[day]['returning_customers'] = len(ids) - new
+
+
+def compute_shop_days(shop_id, days):
+    """{date: {stat field: value}} for one shop, computed from bookings and orders."""
+    stats = {day: {field: 0 for field in STAT_FIELDS} for day in days}
+    if not stats:
+        return stats
+    start, end = _day_range(min(days), max(days))
+    bookings = Booking.objects.filter(barbershop_id=shop_id, booking_time__gte=start, booking_time__lt=end)
+    orders = Order.objects.filter(barbershop_id=shop_id, created_at__gte=start, created_at__lt=end)
+
+    for row in (
+        bookings.annotate(day=TruncDate('booking_time')).order_by().values('day').annotate(
+            total=Count('id'),
+            confirmed=Count('id', filter=Q(booking_status='Confirmed')),
+            approved=Count('id', filter=Q(booking_status='Approved')),
+            cancelled=Count('id', filter=Q(booking_status='Cancelled')),
+            revenue=Sum('service__price', filter=ACTIVE_BOOKING),
+            cash=Sum('service__price', filter=ACTIVE_BOOKING & Q(payment_status=CASH_BOOKING)),
+            online=Sum('service__price', filter=ACTIVE_BOOKING & Q(payment_status=ONLINE_BOOKING)),
+        )
+    ):
+        day = stats.get(row['day'])
+        if day is None:
+            continue
+        day.update(
+            bookings_total=row['total'], bookings_confirmed=row['confirmed'],
+            bookings_approved=row['approved'], bookings_cancelled=row['cancelled'],
+            booking_revenue=row['revenue'] or 0,
+            revenue_cash=row['cash'] or 0, revenue_online=row['online'] or 0,
+        )
+
+    sold = orders.filter(SOLD_ORDER)
+    for row in (
+        sold.annotate(day=TruncDate('created_at')).order_by().values('day').annotate(
+            count=Count('id'),
+            revenue=Sum('total_amount'),
+            cash=Sum('total_amount', filter=Q(payment_method='COD')),
+            online=Sum('total_amount', filter=PAID_ONLINE_ORDER),
+        )
+    ):
+        day = stats.get(row['day'])
+        if day is None:
+            continue
+        day['orders_count'] = row['count']
+        day['order_revenue'] = row['revenue'] or 0
+        day['revenue_cash'] += row['cash'] or 0
+        day['revenue_online'] += row['online'] or 0
+
+    for row in (
+        OrderItem.objects.filter(order__in=sold.values('id'))
+        .annotate(day=TruncDate('order__created_at')).order_by().values('day').annotate(quantity=Sum('quantity'))
+    ):
+        if row['day'] in stats:
+            stats[row['day']]['items_sold'] = row['quantity'] or 0
+
+    _customer_split(shop_id, bookings, orders, stats)
+    return stats
+
+
+def _store(shop_id, stats):
+    DailyShopStats.objects.bulk_create(
+        [DailyShopStats(barbershop_id=shop_id, date=day, **values) for day, values in stats.items()],
+        update_conflicts=True,
+        unique_fields=['barbershop', 'date'],
+        update_fields=STAT_FIELDS + ['updated_at'],
+    )
+
+
+def refresh(shop_days):
+    """Recompute and store {shop_id: {date}}. Returns the number of shop-days written."""
+    n = 0
+    for shop_id, days in shop_days.items():
+        _store(shop_id, compute_shop_days(shop_id, days))
+        n += len(days)
+    return n
+
+
+def update_rollups():
+    """
+    Bring rollups up to date with bookings and orders changed since the watermark.
+    Returns the number of shop-days recomputed, or None if another run holds the watermark.
+    """
+    RollupWatermark.objects.get_or_create(name=WATERMARK)
+    started = timezone.now()
+    with transaction.atomic():
+        watermark = RollupWatermark.objects.select_for_update(skip_locked=True).filter(name=WATERMARK).first()
+        if watermark is None:
+            return None
+        bookings, orders = Booking.objects.all(), Order.objects.all()
+        if watermark.value is not None:
+            bookings = bookings.filter(updated_at__gte=watermark.value)
+            orders = orders.filter(updated_at__gte=watermark.value)
+        n = refresh(_shop_days(bookings, orders))
+        watermark.value = started - OVERLAP
+        watermark.save(update_fields=['value', 'updated_at'])
+    return n
+
+
+def rebuild(first=None, last=None, shop_ids=None):
+    """
+    Recompute every day from first to last (default: the last REBUILD_DAYS days) that has
+    activity or an existing rollup row, for all shops or shop_ids. Returns shop-days written.
+    """
+    last = last or timezone.localdate()
+    first = first or last - timedelta(days=REBUILD_DAYS - 1)
+    start, end = _day_range(first, last)
+    bookings = Booking.objects.filter(booking_time__gte=start, booking_time__lt=end)
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=end)
+    existing = DailyShopStats.objects.filter(date__gte=first, date__lte=last)
+    if shop_ids is not None:
+        bookings = bookings.filter(barbershop_id__in=shop_ids)
+        orders = orders.filter(barbershop_id__in=shop_ids)
+        existing = existing.filter(barbershop_id__in=shop_ids)
+    shop_days = _shop_days(bookings, orders)
+    # Days whose activity is gone entirely are rewritten as zeros
+    for shop_id, day in existing.values_list('barbershop_id', 'date'):
+        shop_days[shop_id].add(day)
+    return refresh(shop_days)
+
+
+def watermark_value():
+    return RollupWatermark.objects.filter(name=WATERMARK).values_list('value', flat=True).first()
@@ -0,0 +1,40 @@
+"""Celery tasks for dashboard rollups."""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def update_rollups():
+    """
+    Fold bookings and orders changed since the last run into the daily rollups. Run via Celery Beat.
+    If Celery is not installed, run `python manage.py update_analytics` from cron instead.
+    """
+    from .rollups import update_rollups as update
+    return update()
+
+
+def rebuild_recent_rollups():
+    """
+    Recompute the last REBUILD_DAYS days of rollups (moved or deleted rows). Run nightly via Celery Beat.
+    If Celery is not installed, run `python manage.py update_analytics --rebuild` from cron instead.
+    """
+    from .rollups import rebuild
+    return rebuild()
+
+
+# Celery shared_task (optional - only if celery is installed)
+try:
+    from celery import shared_task
+
+    @shared_task
+    def update_rollups_task():
+        """Celery task wrapper for update_rollups."""
+        return update_rollups()
+
+    @shared_task
+    def rebuild_recent_rollups_task():
+        """Celery task wrapper for rebuild_recent_rollups."""
+        return rebuild_recent_rollups()
+except ImportError:
+    update_rollups_task = None
+    rebuild_recent_rollups_task = None
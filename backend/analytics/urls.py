@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import dashboard, utilization
+
+urlpatterns = [
+    path('dashboard', dashboard, name='analytics-dashboard'),
+    path('utilization', utilization, name='analytics-utilization'),
+]
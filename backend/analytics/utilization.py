@@ -0,0 +1,137 @@
+"""
+Barber utilization heatmaps: the share of a shop's open minutes each barber was booked, per
+weekday and hour, over the last N completed weeks (Monday to Sunday, local time).
+
+One values_list query reads the booked intervals (non-cancelled bookings with their slot
+times). numpy rasterizes them into a per-barber minute array over the window (overlapping
+bookings count once), masks it with the open minutes compiled from BarbershopHours, and folds
+it into 7 x 24 matrices of booked / open minutes. Closed hours are None.
+
+The shop-wide matrix divides by open minutes times the shop's barbers: its active staff
+barbers (idle ones included, as zero rows) plus anyone else who served bookings in the window.
+
+The window only covers completed weeks, so results are cached per shop and week; the timeout
+only has to pick up late edits (a booking cancelled after the fact).
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from barbershops.models import BarbershopHours, BarbershopStaff
+from bookings.models import Booking
+from services.cache_utils import get_or_compute
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_WEEKS = 4
+MAX_WEEKS = 26
+CACHE_TIMEOUT = 6 * 60 * 60
+CACHE_KEY = 'barber_utilization:{}:{}:{}'
+
+
+def week_window(weeks, today=None):
+    """(first Monday, Monday after the last completed week) of the last `weeks` completed weeks."""
+    today = today or timezone.localdate()
+    end = today - timedelta(days=today.weekday())
+    return end - timedelta(weeks=weeks), end
+
+
+def open_mask(barbershop_id):
+    """(7, 1440) bool: minutes the shop is open, Monday first."""
+    mask = np.zeros((7, MINUTES_PER_DAY), dtype=bool)
+    for weekday, open_minute, close_minute in BarbershopHours.objects.filter(
+        barbershop_id=barbershop_id,
+    ).values_list('weekday', 'open_minute', 'close_minute'):
+        mask[weekday, open_minute:min(close_minute, MINUTES_PER_DAY)] = True
+    return mask
+
+
+def _minute_index(value, first):
+    """Minutes from local midnight of `first` to the local wall-clock time of value."""
+    local = timezone.localtime(value)
+    return (local.date() - first).days * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+def _hour_matrix(values):
+    """(7, 24) float array -> nested lists, None where NaN (closed)."""
+    return [[None if np.isnan(v) else round(float(v), 3) for v in row] for row in values]
+
+
+def compute_utilization(barbershop_id, weeks=DEFAULT_WEEKS, today=None):
+    """Shop-wide and per-barber weekday x hour utilization over the last `weeks` completed weeks."""
+    first, end = week_window(weeks, today)
+    total_minutes = weeks * 7 * MINUTES_PER_DAY
+    start_dt = timezone.make_aware(datetime.combine(first, time.min))
+    end_dt = timezone.make_aware(datetime.combine(end, time.min))
+
+    rows = list(
+        Booking.objects.filter(
+            barbershop_id=barbershop_id,
+            booking_time__gte=start_dt - timedelta(days=1),
+            booking_time__lt=end_dt,
+            slot__end_time__gt=start_dt,
+            slot__start_time__lt=end_dt,
+        )
+        .exclude(booking_status='Cancelled')
+        .order_by()
+        .values_list('barber_id', 'barber__name', 'slot__start_time', 'slot__end_time')
+    )
+    names = dict(
+        BarbershopStaff.objects.filter(barbershop_id=barbershop_id, role='Barber', is_active=True)
+        .values_list('user_id', 'user__name')
+    )
+    for barber_id, name, _, _ in rows:
+        names.setdefault(barber_id, name)
+    barber_ids = sorted(names)
+    position = {barber_id: i for i, barber_id in enumerate(barber_ids)}
+
+    # +1 at each interval start, -1 at its end; a running sum > 0 means booked
+    edges = np.zeros((len(barber_ids), total_minutes + 1), dtype=np.int32)
+    if rows:
+        index = np.fromiter((position[r[0]] for r in rows), dtype=np.int64, count=len(rows))
+        starts = np.fromiter((_minute_index(r[2], first) for r in rows), dtype=np.int64, count=len(rows))
+        ends = np.fromiter((_minute_index(r[3], first) for r in rows), dtype=np.int64, count=len(rows))
+        starts, ends = np.clip(starts, 0, total_minutes), np.clip(ends, 0, total_minutes)
+        valid = ends > starts
+        np.add.at(edges, (index[valid], starts[valid]), 1)
+        np.add.at(edges, (index[valid], ends[valid]), -1)
+    booked = np.cumsum(edges[:, :-1], axis=1) > 0
+
+    mask = open_mask(barbershop_id)
+    week_mask = np.tile(mask.reshape(-1), weeks)
+    open_minutes = mask.reshape(7, 24, 60).sum(axis=2) * weeks
+    booked_open = (booked & week_mask).reshape(len(barber_ids), weeks, 7, 24, 60).sum(axis=(1, 4))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_barber = np.where(open_minutes > 0, booked_open / open_minutes, np.nan)
+        shop = np.where(
+            open_minutes > 0, booked_open.sum(axis=0) / (open_minutes * max(len(barber_ids), 1)), np.nan,
+        )
+    total_open = int(open_minutes.sum())
+    barbers = [
+        {
+            'barber_id': str(barber_id),
+            'name': names[barber_id],
+            'booked_minutes': int(booked_open[i].sum()),
+            'utilization': round(int(booked_open[i].sum()) / total_open, 3) if total_open else None,
+            'hours': _hour_matrix(per_barber[i]),
+        }
+        for i, barber_id in enumerate(barber_ids)
+    ]
+    return {
+        'from': first,
+        'to': end - timedelta(days=1),
+        'weeks': weeks,
+        'open_minutes': total_open,
+        'shop': _hour_matrix(shop),
+        'barbers': barbers,
+    }
+
+
+def get_utilization(barbershop_id, weeks=DEFAULT_WEEKS):
+    """compute_utilization, cached per shop, window length and current week."""
+    first, _ = week_window(weeks)
+    key = CACHE_KEY.format(barbershop_id, weeks, first.isoformat())
+    return get_or_compute(
+        key, lambda: compute_utilization(barbershop_id, weeks), CACHE_TIMEOUT, stat='barber_utilization',
+    )
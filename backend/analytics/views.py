@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from barbershops.permissions import IsBarbershopAdmin
+from .models import DailyShopStats
+from .rollups import STAT_FIELDS, watermark_value
+from .utilization import DEFAULT_WEEKS, MAX_WEEKS, get_utilization
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+
+
+def _parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsBarbershopAdmin])
+def dashboard(request):
+    """
+    Daily sales and booking figures of the current barbershop, read from the rollups.
+    from / to (YYYY-MM-DD, inclusive; default the last 30 days, at most 366 days).
+    Days without activity are returned as zeros.
+    """
+    try:
+        last = _parse_day(request.query_params['to']) if request.query_params.get('to') else timezone.localdate()
+        first = (
+            _parse_day(request.query_params['from']) if request.query_params.get('from')
+            else last - timedelta(days=DEFAULT_DAYS - 1)
+        )
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'from and to must be dates (YYYY-MM-DD)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if first > last or (last - first).days >= MAX_DAYS:
+        return Response({
+            'success': False,
+            'message': f'from must be on or before to, at most {MAX_DAYS} days apart'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = {
+        row['date']: row
+        for row in DailyShopStats.objects.filter(
+            barbershop_id=request.barbershop.id, date__gte=first, date__lte=last,
+        ).values('date', *STAT_FIELDS)
+    }
+    days = []
+    totals = {field: 0 for field in STAT_FIELDS}
+    day = first
+    while day <= last:
+        values = rows.get(day) or {'date': day, **{field: 0 for field in STAT_FIELDS}}
+        for field in STAT_FIELDS:
+            totals[field] += values[field]
+        days.append(values)
+        day += timedelta(days=1)
+
+    updated_through = watermark_value()
+    return Response({
+        'success': True,
+        'from': first,
+        'to': last,
+        'updated_through': updated_through,
+        'totals': totals,
+        'days': days,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsBarbershopAdmin])
+def utilization(request):
+    """
+    Barber utilization heatmaps of the current barbershop: booked / open minutes per weekday
+    (Monday first) and hour over the last `weeks` completed weeks (default 4, at most 26).
+    """
+    try:
+        weeks = int(request.query_params.get('weeks', DEFAULT_WEEKS))
+    except ValueError:
+        weeks = 0
+    if not 1 <= weeks <= MAX_WEEKS:
+        return Response({
+            'success': False,
+            'message': f'weeks must be a number from 1 to {MAX_WEEKS}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'success': True, **get_utilization(request.barbershop.id, weeks)})
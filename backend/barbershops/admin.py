@@ -1,5 +1,7 @@
 from django.contrib import admin
 from .models import Barbershop, BarbershopStaff, Review
+from .ratings import recompute_shop_ratings
+from . import review_feed
 
 
 @admin.register(Review)
@@ -11,19 +13,42 @@ class ReviewAdmin(admin.ModelAdmin):
     list_editable = ['is_approved']
     actions = ['bulk_approve', 'bulk_hide']
 
+    # Admin edits bypass the review endpoints, so rebuild the affected shops' aggregates.
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        recompute_shop_ratings([obj.barbershop_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        recompute_shop_ratings([obj.barbershop_id])
+
+    def delete_queryset(self, request, queryset):
+        shop_ids = set(queryset.values_list('barbershop_id', flat=True))
+        super().delete_queryset(request, queryset)
+        recompute_shop_ratings(shop_ids)
+
     @admin.action(description='Approve selected reviews')
     def bulk_approve(self, request, queryset):
         queryset.update(is_approved=True)
+        self._refresh_shops(set(queryset.values_list('barbershop_id', flat=True)))
 
     @admin.action(description='Hide selected reviews')
     def bulk_hide(self, request, queryset):
         queryset.update(is_approved=False)
+        self._refresh_shops(set(queryset.values_list('barbershop_id', flat=True)))
+
+    @staticmethod
+    def _refresh_shops(shop_ids):
+        # queryset.update() sends no signals: rebuild ratings and drop cached review feeds
+        recompute_shop_ratings(shop_ids)
+        for shop_id in shop_ids:
+            review_feed.invalidate(shop_id)
 
 
 @admin.register(Barbershop)
 class BarbershopAdmin(admin.ModelAdmin):
-    list_display = ['name', 'owner', 'city', 'is_active', 'created_at']
-    list_filter = ['is_active', 'created_at']
+    list_display = ['name', 'owner', 'city', 'is_active', 'rating_average', 'rating_count', 'created_at']
+    list_filter = ['is_active', 'geocode_status', 'created_at']
     search_fields = ['name', 'city', 'owner__email']
     raw_id_fields = ['owner']
 
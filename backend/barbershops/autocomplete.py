@@ -0,0 +1,250 @@
+"""
+Type-ahead prefix index over discoverable shop names, cities and service names.
+
+Each entry is a "term<SEP>kind<SEP>ref<SEP>label" string kept in lexicographic order, so a
+prefix lookup is a range scan. With Redis the entries live in one sorted set (ZRANGEBYLEX)
+and are updated per shop on change; without Redis each process keeps a sorted list that is
+rebuilt when the shared index version moves.
+"""
+import bisect
+import logging
+import threading
+import unicodedata
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from services.cache_utils import get_cache_version, bump_cache_version
+
+logger = logging.getLogger(__name__)
+
+SEP = '\x1f'
+KIND_SHOP = 'shop'
+KIND_CITY = 'city'
+KIND_SERVICE = 'service'
+VERSION_NAMESPACE = 'autocomplete'
+REDIS_INDEX_KEY = 'bsbs:autocomplete'
+REDIS_SHOP_KEY = 'bsbs:autocomplete:shop:{}'
+# Always in the sorted set, so an empty index still exists; sorts before (and never matches) any term
+REDIS_SENTINEL = SEP
+REBUILD_LOCK_KEY = 'autocomplete:rebuild'
+REBUILD_LOCK_TIMEOUT = 60
+MAX_RESULTS = 20
+
+_local_lock = threading.Lock()
+_local_index = {'version': None, 'entries': []}
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace so 'Café  Cuts' matches 'cafe cu'."""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def _terms(label):
+    """The full label plus every word-suffix, so 'Fade Studio' is found by 'fa' and 'st'."""
+    words = normalize(label).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+def _member(term, kind, ref, label):
+    return SEP.join((term, kind, str(ref), label))
+
+
+def _parse(member):
+    if isinstance(member, bytes):
+        member = member.decode('utf-8')
+    term, kind, ref, label = member.split(SEP, 3)
+    return term, kind, ref, label
+
+
+def _clean_label(label):
+    """Label as stored in members: surrounding and repeated whitespace removed."""
+    return ' '.join(str(label or '').split())
+
+
+def _label_entries(kind, ref, label):
+    label = _clean_label(label)
+    if not label:
+        return set()
+    return {_member(term, kind, ref, label) for term in _terms(label)}
+
+
+def _shop_entries(shop_id):
+    """Members contributed by one shop: its name, its city and its active service names."""
+    from .models import Barbershop
+    from services.models import Service
+
+    shop = Barbershop.objects.discoverable().filter(pk=shop_id).values('id', 'name', 'city').first()
+    if not shop:
+        return set()
+    entries = _label_entries(KIND_SHOP, shop['id'], shop['name'])
+    entries |= _label_entries(KIND_CITY, '', shop['city'])
+    names = Service.objects.filter(barbershop_id=shop_id, is_active=True).values_list('name', flat=True).distinct()
+    for name in names:
+        entries |= _label_entries(KIND_SERVICE, '', name)
+    return entries
+
+
+def _all_entries():
+    """
+    (every member of the index, {shop_id: members contributed by that shop}), built with
+    two flat queries.
+    """
+    from .models import Barbershop
+    from services.models import Service
+
+    shops = Barbershop.objects.discoverable()
+    per_shop = defaultdict(set)
+    for shop_id, name, city in shops.values_list('id', 'name', 'city'):
+        per_shop[shop_id] |= _label_entries(KIND_SHOP, shop_id, name)
+        per_shop[shop_id] |= _label_entries(KIND_CITY, '', city)
+    names = (
+        Service.objects.filter(is_active=True, barbershop__in=shops)
+        .values_list('barbershop_id', 'name')
+        .distinct()
+    )
+    for shop_id, name in names:
+        per_shop[shop_id] |= _label_entries(KIND_SERVICE, '', name)
+    entries = set().union(*per_shop.values()) if per_shop else set()
+    return entries, per_shop
+
+
+def _still_referenced(member, excluding_shop_id):
+    """True if a shared city/service member is still contributed by another shop."""
+    from .models import Barbershop
+    from services.models import Service
+
+    _, kind, _, label = _parse(member)
+    shops = Barbershop.objects.discoverable().exclude(pk=excluding_shop_id)
+    # Narrow in SQL, then match the label exactly as _label_entries stored it
+    first_word = label.split(' ', 1)[0]
+    if kind == KIND_CITY:
+        candidates = shops.filter(city__icontains=first_word).values_list('city', flat=True)
+    elif kind == KIND_SERVICE:
+        candidates = Service.objects.filter(
+            is_active=True, name__icontains=first_word, barbershop__in=shops,
+        ).values_list('name', flat=True)
+    else:
+        return False
+    return any(_clean_label(value) == label for value in candidates.distinct())
+
+
+def _redis():
+    """Raw Redis client when the default cache is django-redis, else None."""
+    if 'django_redis' not in settings.CACHES.get('default', {}).get('BACKEND', ''):
+        return None
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception as e:
+        logger.warning('Autocomplete: Redis unavailable, using in-process index: %s', e)
+        return None
+
+
+def rebuild():
+    """Rebuild the whole index from the database (startup, backfills, Redis flush)."""
+    client = _redis()
+    if client is None:
+        bump_cache_version(VERSION_NAMESPACE)
+        return
+    entries, per_shop = _all_entries()
+    pipe = client.pipeline()
+    pipe.delete(REDIS_INDEX_KEY)
+    pipe.zadd(REDIS_INDEX_KEY, {REDIS_SENTINEL: 0})
+    members = sorted(entries)
+    for i in range(0, len(members), 1000):
+        pipe.zadd(REDIS_INDEX_KEY, {m: 0 for m in members[i:i + 1000]})
+    for shop_id, shop_members in per_shop.items():
+        pipe.delete(REDIS_SHOP_KEY.format(shop_id))
+        if shop_members:
+            pipe.sadd(REDIS_SHOP_KEY.format(shop_id), *shop_members)
+    pipe.execute()
+
+
+def refresh_shop(shop_id):
+    """Re-index one shop after its name, city, visibility or services changed."""
+    client = _redis()
+    if client is None:
+        bump_cache_version(VERSION_NAMESPACE)
+        return
+    if not client.exists(REDIS_INDEX_KEY):
+        rebuild()
+        return
+    shop_key = REDIS_SHOP_KEY.format(shop_id)
+    old = {m.decode('utf-8') if isinstance(m, bytes) else m for m in client.smembers(shop_key)}
+    new = _shop_entries(shop_id)
+    removed = [
+        m for m in old - new
+        if _parse(m)[1] == KIND_SHOP or not _still_referenced(m, shop_id)
+    ]
+    pipe = client.pipeline()
+    if removed:
+        pipe.zrem(REDIS_INDEX_KEY, *removed)
+    if new:
+        pipe.zadd(REDIS_INDEX_KEY, {m: 0 for m in new})
+    pipe.delete(shop_key)
+    if new:
+        pipe.sadd(shop_key, *new)
+    pipe.execute()
+
+
+def _search_redis(client, term, scan):
+    lo = b'[' + term.encode('utf-8')
+    hi = b'[' + term.encode('utf-8') + b'\xff'
+    members = client.zrangebylex(REDIS_INDEX_KEY, lo, hi, start=0, num=scan)
+    if not members and not client.exists(REDIS_INDEX_KEY):
+        # Index lost (first start, Redis flush): one worker rebuilds, the others answer empty meanwhile
+        if cache.add(REBUILD_LOCK_KEY, 1, REBUILD_LOCK_TIMEOUT):
+            try:
+                rebuild()
+            finally:
+                cache.delete(REBUILD_LOCK_KEY)
+            members = client.zrangebylex(REDIS_INDEX_KEY, lo, hi, start=0, num=scan)
+    return [_parse(m) for m in members]
+
+
+def _search_local(term, scan):
+    version = get_cache_version(VERSION_NAMESPACE)
+    if _local_index['version'] != version:
+        with _local_lock:
+            if _local_index['version'] != version:
+                _local_index['entries'] = sorted(_parse(m) for m in _all_entries()[0])
+                _local_index['version'] = version
+    entries = _local_index['entries']
+    out = []
+    i = bisect.bisect_left(entries, (term,))
+    while i < len(entries) and len(out) < scan and entries[i][0].startswith(term):
+        out.append(entries[i])
+        i += 1
+    return out
+
+
+def search(query, limit=8):
+    """
+    Prefix matches for query as [{type, label, id?}], shops first, then cities, then services.
+    One entry per shop / city / service name even when several of its words match.
+    """
+    term = normalize(query)
+    if not term:
+        return []
+    limit = max(1, min(MAX_RESULTS, limit))
+    scan = limit * 4
+    client = _redis()
+    rows = _search_redis(client, term, scan) if client is not None else _search_local(term, scan)
+    seen = set()
+    results = []
+    for _, kind, ref, label in rows:
+        key = (kind, ref) if kind == KIND_SHOP else (kind, label.lower())
+        if key in seen:
+            continue
+        seen.add(key)
+        item = {'type': kind, 'label': label}
+        if kind == KIND_SHOP:
+            item['id'] = int(ref)
+        results.append(item)
+    order = {KIND_SHOP: 0, KIND_CITY: 1, KIND_SERVICE: 2}
+    results.sort(key=lambda r: order[r['type']])
+    return results[:limit]
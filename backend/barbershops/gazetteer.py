@@ -0,0 +1,139 @@
+"""
+Offline gazetteer: approximate coordinates for a city or country without a network call.
+
+Used to place a shop on the map immediately at registration; the exact position arrives
+later from the geocoding queue. Coordinates are city centres / country centroids.
+"""
+from .autocomplete import normalize
+
+# (city, country) -> (lat, lng)
+CITIES = {
+    # Ethiopia
+    ('addis ababa', 'ethiopia'): (9.0300, 38.7400),
+    ('adama', 'ethiopia'): (8.5400, 39.2700),
+    ('bahir dar', 'ethiopia'): (11.5936, 37.3908),
+    ('gondar', 'ethiopia'): (12.6000, 37.4667),
+    ('mekelle', 'ethiopia'): (13.4967, 39.4753),
+    ('hawassa', 'ethiopia'): (7.0500, 38.4667),
+    ('dire dawa', 'ethiopia'): (9.6000, 41.8667),
+    ('jimma', 'ethiopia'): (7.6667, 36.8333),
+    ('dessie', 'ethiopia'): (11.1333, 39.6333),
+    ('harar', 'ethiopia'): (9.3100, 42.1200),
+    ('bishoftu', 'ethiopia'): (8.7500, 38.9833),
+    ('shashemene', 'ethiopia'): (7.2000, 38.6000),
+    ('arba minch', 'ethiopia'): (6.0333, 37.5500),
+    ('debre markos', 'ethiopia'): (10.3333, 37.7167),
+    ('debre birhan', 'ethiopia'): (9.6833, 39.5333),
+    ('debre tabor', 'ethiopia'): (11.8500, 38.0167),
+    ('jijiga', 'ethiopia'): (9.3500, 42.8000),
+    ('nekemte', 'ethiopia'): (9.0833, 36.5500),
+    ('sodo', 'ethiopia'): (6.8500, 37.7500),
+    ('kombolcha', 'ethiopia'): (11.0833, 39.7333),
+    ('woldia', 'ethiopia'): (11.8333, 39.6000),
+    ('axum', 'ethiopia'): (14.1211, 38.7233),
+    ('lalibela', 'ethiopia'): (12.0333, 39.0333),
+    ('adigrat', 'ethiopia'): (14.2667, 39.4500),
+    ('asella', 'ethiopia'): (7.9500, 39.1333),
+    ('hosaena', 'ethiopia'): (7.5500, 37.8500),
+    ('dilla', 'ethiopia'): (6.4167, 38.3167),
+    ('sebeta', 'ethiopia'): (8.9167, 38.6167),
+    ('mojo', 'ethiopia'): (8.6000, 39.1167),
+    ('ambo', 'ethiopia'): (8.9833, 37.8500),
+    ('robe', 'ethiopia'): (7.1167, 40.0000),
+    ('gambela', 'ethiopia'): (8.2500, 34.5833),
+    ('semera', 'ethiopia'): (11.7922, 41.0056),
+    ('assosa', 'ethiopia'): (10.0667, 34.5333),
+    # Regional capitals
+    ('nairobi', 'kenya'): (-1.2864, 36.8172),
+    ('djibouti', 'djibouti'): (11.5886, 43.1450),
+    ('asmara', 'eritrea'): (15.3229, 38.9251),
+    ('khartoum', 'sudan'): (15.5007, 32.5599),
+    ('juba', 'south sudan'): (4.8594, 31.5713),
+    ('mogadishu', 'somalia'): (2.0469, 45.3182),
+    ('hargeisa', 'somalia'): (9.5600, 44.0650),
+    ('kampala', 'uganda'): (0.3476, 32.5825),
+    ('dar es salaam', 'tanzania'): (-6.7924, 39.2083),
+    ('kigali', 'rwanda'): (-1.9441, 30.0619),
+}
+
+COUNTRIES = {
+    'ethiopia': (9.1450, 40.4897),
+    'kenya': (-0.0236, 37.9062),
+    'djibouti': (11.8251, 42.5903),
+    'eritrea': (15.1794, 39.7823),
+    'sudan': (12.8628, 30.2176),
+    'south sudan': (6.8770, 31.3070),
+    'somalia': (5.1521, 46.1996),
+    'uganda': (1.3733, 32.2903),
+    'tanzania': (-6.3690, 34.8888),
+    'rwanda': (-1.9403, 29.8739),
+    'egypt': (26.8206, 30.8025),
+    'nigeria': (9.0820, 8.6753),
+    'ghana': (7.9465, -1.0232),
+    'south africa': (-30.5595, 22.9375),
+    'united arab emirates': (23.4241, 53.8478),
+    'saudi arabia': (23.8859, 45.0792),
+    'united kingdom': (55.3781, -3.4360),
+    'united states': (37.0902, -95.7129),
+    'canada': (56.1304, -106.3468),
+    'germany': (51.1657, 10.4515),
+}
+
+# Alternative spellings -> canonical key
+CITY_ALIASES = {
+    'addis abeba': 'addis ababa',
+    'finfinne': 'addis ababa',
+    'nazret': 'adama',
+    'nazareth': 'adama',
+    'bahirdar': 'bahir dar',
+    'gonder': 'gondar',
+    'mekele': 'mekelle',
+    'awasa': 'hawassa',
+    'awassa': 'hawassa',
+    'debre zeyit': 'bishoftu',
+    'debre zeit': 'bishoftu',
+    'shashamane': 'shashemene',
+    'arbaminch': 'arba minch',
+    'debre berhan': 'debre birhan',
+    'wolaita sodo': 'sodo',
+    'soddo': 'sodo',
+    'aksum': 'axum',
+    'hossana': 'hosaena',
+    'weldiya': 'woldia',
+}
+COUNTRY_ALIASES = {
+    'et': 'ethiopia',
+    'eth': 'ethiopia',
+    'ke': 'kenya',
+    'uae': 'united arab emirates',
+    'uk': 'united kingdom',
+    'great britain': 'united kingdom',
+    'us': 'united states',
+    'usa': 'united states',
+    'united states of america': 'united states',
+}
+
+_CITIES_BY_NAME = {}
+for (_city, _country), _coords in CITIES.items():
+    _CITIES_BY_NAME.setdefault(_city, []).append((_country, _coords))
+
+
+def approximate(city, country):
+    """
+    (lat, lng, precision) with precision 'city' or 'country', or None if neither is known.
+    A city name matching several countries needs the country to disambiguate.
+    """
+    city_key = normalize(city)
+    city_key = CITY_ALIASES.get(city_key, city_key)
+    country_key = normalize(country)
+    country_key = COUNTRY_ALIASES.get(country_key, country_key)
+    matches = _CITIES_BY_NAME.get(city_key, [])
+    if country_key:
+        matches = [m for m in matches if m[0] == country_key]
+    if len(matches) == 1:
+        lat, lng = matches[0][1]
+        return lat, lng, 'city'
+    if country_key in COUNTRIES:
+        lat, lng = COUNTRIES[country_key]
+        return lat, lng, 'country'
+    return None
@@ -1,38 +1,264 @@
-"""Geocoding: address -> lat/lng (OpenStreetMap Nominatim, no API key)."""
+"""
+Geocoding: address -> lat/lng (OpenStreetMap Nominatim, no API key).
+
+Lookups go through a persistent cache (GeocodeCache) keyed by the normalized query, and
+network calls honour the Nominatim usage policy: an identifying User-Agent and at most one
+request per second across workers (a shared cache lock, or a Postgres advisory lock when the
+cache is per process). Shops are never geocoded inside a
+request: registration and address edits place the shop approximately from the offline
+gazetteer and queue it; the queue is drained by a Celery task / beat job or the
+`geocode_shops` management command. A worker claims a shop before looking it up, so
+overlapping runs never geocode the same shop twice.
+"""
+import hashlib
 import logging
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
 import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from services.tiered_cache import default_cache_is_shared
+from . import gazetteer
+from .autocomplete import normalize
+from .models import Barbershop, GeocodeCache
 
 logger = logging.getLogger(__name__)
 
+RATE_LIMIT_KEY = 'geocode:nominatim:slot'
+# pg_advisory_lock key for the rate slot when the cache is per process
+RATE_LIMIT_LOCK_ID = 7_301_001
+RATE_LIMIT_INTERVAL = 1.0
+# A claimed shop is invisible to other runs this long (a crashed worker's claim lapses)
+CLAIM_TTL = timedelta(minutes=2)
+MAX_ATTEMPTS = 5
+# Misses are cached too; retry a missing address after this long in case OSM data improved
+NEGATIVE_CACHE_TTL = timedelta(days=30)
+
+
+class GeocodingError(Exception):
+    """Nominatim could not be asked (network error, bad response, rate-limit wait timed out)."""
+
+
+def normalize_query(address, city, country):
+    parts = [normalize(p) for p in (address, city, country)]
+    return ', '.join(p for p in parts if p)
+
+
+@contextmanager
+def _rate_slot(max_wait=10.0):
+    """
+    Block until this process may send the next Nominatim request, then hold the slot around it
+    (at most one request per RATE_LIMIT_INTERVAL across all workers).
+    """
+    deadline = time.monotonic() + max_wait
+    if default_cache_is_shared() or connection.vendor != 'postgresql':
+        while not cache.add(RATE_LIMIT_KEY, 1, timeout=RATE_LIMIT_INTERVAL):
+            if time.monotonic() >= deadline:
+                raise GeocodingError('Timed out waiting for Nominatim rate-limit slot')
+            time.sleep(0.2)
+        yield
+        return
+    # Per-process cache: serialize on a session advisory lock held for at least one interval
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [RATE_LIMIT_LOCK_ID])
+            if cursor.fetchone()[0]:
+                break
+            if time.monotonic() >= deadline:
+                raise GeocodingError('Timed out waiting for Nominatim rate-limit slot')
+            time.sleep(0.2)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            remaining = RATE_LIMIT_INTERVAL - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [RATE_LIMIT_LOCK_ID])
+
 
 class GeocodingService:
     NOMINATIM_URL = 'https://nominatim.openstreetmap.org/search'
 
+    @staticmethod
+    def search(query):
+        """One rate-limited Nominatim call: {'lat', 'lng'}, None when not found; raises GeocodingError."""
+        params = {'q': query, 'format': 'json', 'limit': 1}
+        headers = {'User-Agent': getattr(settings, 'GEOCODING_USER_AGENT', 'BSBS-App/1.0')}
+        try:
+            with _rate_slot():
+                response = requests.get(
+                    GeocodingService.NOMINATIM_URL,
+                    params=params,
+                    headers=headers,
+                    timeout=5,
+                )
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise GeocodingError(str(e)) from e
+        if data and len(data) > 0:
+            return {
+                'lat': float(data[0]['lat']),
+                'lng': float(data[0]['lon']),
+            }
+        return None
+
+    @staticmethod
+    def lookup(address, city, country, use_network=True):
+        """
+        Cached geocode: {'lat', 'lng'} or None. Raises GeocodingError only when the
+        network was needed and failed; cache hits (including misses) never touch Nominatim.
+        """
+        query = normalize_query(address, city, country)
+        if not query:
+            return None
+        query_hash = hashlib.sha256(query.encode('utf-8')).hexdigest()
+        entry = GeocodeCache.objects.filter(query_hash=query_hash).first()
+        if entry is not None:
+            if entry.found:
+                return {'lat': float(entry.latitude), 'lng': float(entry.longitude)}
+            if timezone.now() - entry.updated_at < NEGATIVE_CACHE_TTL:
+                return None
+        if not use_network:
+            return None
+        coords = GeocodingService.search(query)
+        GeocodeCache.objects.update_or_create(
+            query_hash=query_hash,
+            defaults={
+                'query': query,
+                'found': coords is not None,
+                'latitude': round(coords['lat'], 6) if coords else None,
+                'longitude': round(coords['lng'], 6) if coords else None,
+            },
+        )
+        return coords
+
     @staticmethod
     def address_to_coords(address, city, country):
         """
         Return { 'lat': float, 'lng': float } or None.
-        Uses OpenStreetMap Nominatim (free, no API key).
+        Uses OpenStreetMap Nominatim (free, no API key), through the geocode cache.
         """
-        parts = [p for p in (address, city, country) if p and str(p).strip()]
-        query = ', '.join(parts) if parts else None
-        if not query:
+        try:
+            return GeocodingService.lookup(address, city, country)
+        except GeocodingError as e:
+            logger.warning('Geocoding error for %s, %s: %s', address, city, e)
             return None
-        params = {'q': query, 'format': 'json', 'limit': 1}
-        headers = {'User-Agent': 'BSBS-App/1.0'}
+
+
+def mark_manual(barbershop):
+    """Owner supplied coordinates: nothing to geocode."""
+    barbershop.geocode_status = 'resolved'
+    barbershop.geocode_precision = 'manual'
+    barbershop.geocode_attempts = 0
+    barbershop.geocode_retry_at = None
+    barbershop.save(update_fields=['geocode_status', 'geocode_precision', 'geocode_attempts', 'geocode_retry_at'])
+
+
+def queue_shop_geocode(barbershop, location_changed=True):
+    """
+    Place the shop approximately from the gazetteer (when it has no exact position, or its
+    city/country changed) and queue the exact lookup. Never blocks on the network.
+    """
+    fields = ['geocode_status', 'geocode_precision', 'geocode_attempts', 'geocode_retry_at']
+    if not (barbershop.address or barbershop.city):
+        barbershop.geocode_status = 'none'
+        barbershop.geocode_retry_at = None
+        barbershop.save(update_fields=fields)
+        return
+    approximate_now = (
+        barbershop.latitude is None
+        or barbershop.geocode_precision in ('city', 'country')
+        or location_changed
+    )
+    if approximate_now:
+        approx = gazetteer.approximate(barbershop.city, barbershop.country)
+        if approx:
+            barbershop.latitude, barbershop.longitude, barbershop.geocode_precision = approx
+            fields += ['latitude', 'longitude']
+    barbershop.geocode_status = 'pending'
+    barbershop.geocode_attempts = 0
+    barbershop.geocode_retry_at = timezone.now()
+    barbershop.save(update_fields=fields)
+    _dispatch(barbershop.id)
+
+
+def _dispatch(shop_id):
+    """Hand the shop to a Celery worker after commit; without a broker the beat job / command picks it up."""
+    from .tasks import geocode_shop_task
+
+    if geocode_shop_task is None or not getattr(settings, 'CELERY_BROKER_URL', ''):
+        return
+
+    def send():
         try:
-            response = requests.get(
-                GeocodingService.NOMINATIM_URL,
-                params=params,
-                headers=headers,
-                timeout=5,
-            )
-            data = response.json()
-            if data and len(data) > 0:
-                return {
-                    'lat': float(data[0]['lat']),
-                    'lng': float(data[0]['lon']),
-                }
+            geocode_shop_task.delay(shop_id)
         except Exception as e:
-            logger.warning('Geocoding error for %s: %s', query, e)
-        return None
+            logger.warning('Geocode task for shop %s not queued (left for the backfill): %s', shop_id, e)
+
+    transaction.on_commit(send)
+
+
+def _retry_delay(attempts):
+    return timedelta(minutes=min(2 ** attempts, 24 * 60))
+
+
+def geocode_shop(shop_id):
+    """
+    Resolve one pending shop. Returns 'resolved', 'failed', 'retry' or 'skipped'.
+    Not-found addresses fail immediately (the gazetteer position stays); network
+    errors back off exponentially and fail after MAX_ATTEMPTS.
+    """
+    # Claim: push the retry time out, so a concurrent run neither lists nor claims the shop
+    now = timezone.now()
+    claimed = Barbershop.all_objects.filter(
+        pk=shop_id, geocode_status='pending', geocode_retry_at__lte=now,
+    ).update(geocode_retry_at=now + CLAIM_TTL)
+    if not claimed:
+        return 'skipped'
+    shop = Barbershop.all_objects.get(pk=shop_id)
+    fields = ['geocode_status', 'geocode_precision', 'geocode_attempts', 'geocode_retry_at']
+    try:
+        coords = GeocodingService.lookup(shop.address, shop.city, shop.country)
+    except GeocodingError as e:
+        shop.geocode_attempts += 1
+        if shop.geocode_attempts >= MAX_ATTEMPTS:
+            shop.geocode_status = 'failed'
+            shop.geocode_retry_at = None
+            outcome = 'failed'
+        else:
+            shop.geocode_retry_at = timezone.now() + _retry_delay(shop.geocode_attempts)
+            outcome = 'retry'
+        logger.warning('Geocoding shop %s failed (attempt %s): %s', shop_id, shop.geocode_attempts, e)
+        shop.save(update_fields=fields)
+        return outcome
+    shop.geocode_retry_at = None
+    if coords is None:
+        shop.geocode_status = 'failed'
+        shop.save(update_fields=fields)
+        return 'failed'
+    shop.latitude = round(coords['lat'], 6)
+    shop.longitude = round(coords['lng'], 6)
+    shop.geocode_status = 'resolved'
+    shop.geocode_precision = 'address'
+    shop.save(update_fields=fields + ['latitude', 'longitude'])
+    return 'resolved'
+
+
+def process_pending_geocodes(limit=30):
+    """Resolve due pending shops, oldest first (about one per second). Returns outcome counts."""
+    due = (
+        Barbershop.all_objects.filter(geocode_status='pending', geocode_retry_at__lte=timezone.now())
+        .order_by('geocode_retry_at')
+        .values_list('id', flat=True)[:limit]
+    )
+    counts = {'resolved': 0, 'failed': 0, 'retry': 0, 'skipped': 0}
+    for shop_id in list(due):
+        counts[geocode_shop(shop_id)] += 1
+    return counts
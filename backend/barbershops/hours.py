@@ -0,0 +1,101 @@
+"""
+Normalized opening hours: BarbershopHours rows derived from the opening_hours JSON,
+and the open-at filters discovery runs against them.
+"""
+from django.utils import timezone
+
+from .models import BarbershopHours, OPENING_HOURS_DAY_KEYS, TIME_PATTERN
+
+MINUTES_PER_DAY = 24 * 60
+
+WEEKDAY_ALIASES = {}
+for _index, _day in enumerate(OPENING_HOURS_DAY_KEYS):
+    WEEKDAY_ALIASES[_day] = _index
+    WEEKDAY_ALIASES[_day[:3]] = _index
+    WEEKDAY_ALIASES[str(_index)] = _index
+
+
+def parse_minute(value):
+    """'HH:MM' -> minutes since midnight, or None if malformed."""
+    match = TIME_PATTERN.match(str(value or '').strip())
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def hours_rows(opening_hours, opening_hour=None, closing_hour=None):
+    """
+    [(weekday, open_minute, close_minute)] for every open day.
+    Like the booking check, a day that opening_hours leaves out (or gives no usable open/close)
+    is unrestricted, i.e. open all day; a day whose close is not after its open is closed.
+    Empty opening_hours falls back to the legacy opening_hour/closing_hour on all seven days.
+    """
+    rows = []
+    if opening_hours:
+        days = {}
+        for day, hours in opening_hours.items():
+            weekday = WEEKDAY_ALIASES.get(str(day).lower())
+            if weekday is not None and isinstance(hours, dict):
+                days[weekday] = (parse_minute(hours.get('open')), parse_minute(hours.get('close')))
+        for weekday in range(7):
+            open_minute, close_minute = days.get(weekday, (None, None))
+            if open_minute is None or close_minute is None:
+                rows.append((weekday, 0, MINUTES_PER_DAY))
+            elif close_minute > open_minute:
+                rows.append((weekday, open_minute, close_minute))
+    elif opening_hour is not None and closing_hour is not None and 0 <= opening_hour < closing_hour <= 24:
+        rows = [(weekday, opening_hour * 60, closing_hour * 60) for weekday in range(7)]
+    return sorted(rows)
+
+
+def sync_barbershop_hours(barbershop):
+    """Rewrite the shop's BarbershopHours rows from its current opening hours."""
+    rows = hours_rows(barbershop.opening_hours, barbershop.opening_hour, barbershop.closing_hour)
+    BarbershopHours.objects.filter(barbershop=barbershop).delete()
+    BarbershopHours.objects.bulk_create([
+        BarbershopHours(barbershop=barbershop, weekday=weekday, open_minute=open_minute, close_minute=close_minute)
+        for weekday, open_minute, close_minute in rows
+    ])
+
+
+def parse_open_filter(params):
+    """
+    Read open-time filters from query params:
+      open_now=true                     open at the current server-local time
+      open_day=saturday&open_time=18:00 open at that moment
+      open_day=sat&open_after=18:00     still open at some point after 18:00
+      open_day=sat                      open at any time that day
+    Returns None when no filter was requested, else {'weekday', 'minute', 'after'}.
+    Raises ValueError on malformed values.
+    """
+    if str(params.get('open_now', '')).lower() in ('1', 'true', 'yes'):
+        now = timezone.localtime()
+        return {'weekday': now.weekday(), 'minute': now.hour * 60 + now.minute, 'after': None}
+    day = params.get('open_day')
+    if not day:
+        return None
+    weekday = WEEKDAY_ALIASES.get(str(day).strip().lower())
+    if weekday is None:
+        raise ValueError('open_day must be a weekday name (e.g. saturday, sat) or 0-6 (Monday=0).')
+    spec = {'weekday': weekday, 'minute': None, 'after': None}
+    for param in ('open_time', 'open_after'):
+        if params.get(param):
+            minute = parse_minute(params.get(param))
+            if minute is None:
+                raise ValueError(f'{param} must be HH:MM.')
+            spec['minute' if param == 'open_time' else 'after'] = minute
+    return spec
+
+
+def filter_open(queryset, spec):
+    """Restrict a Barbershop queryset to shops open per spec (indexed join on barbershop_hours)."""
+    if not spec:
+        return queryset
+    lookups = {'hours__weekday': spec['weekday']}
+    if spec.get('minute') is not None:
+        lookups['hours__open_minute__lte'] = spec['minute']
+        lookups['hours__close_minute__gt'] = spec['minute']
+    if spec.get('after') is not None:
+        lookups['hours__close_minute__gt'] = max(spec['after'], lookups.get('hours__close_minute__gt', 0))
+    # At most one hours row per (shop, weekday), so the join cannot duplicate shops.
+    return queryset.filter(**lookups)
@@ -0,0 +1,18 @@
+"""
+Rebuild popular-times histograms (weekday x hour booking density) for every shop.
+Normally run nightly by Celery Beat; safe to run at any time.
+"""
+from django.core.management.base import BaseCommand
+
+from barbershops.popular_times import DEFAULT_WINDOW_DAYS, compute_popular_times
+
+
+class Command(BaseCommand):
+    help = "Recompute popular times from booking history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=DEFAULT_WINDOW_DAYS, help='Trailing window of bookings to count.')
+
+    def handle(self, *args, **options):
+        stored = compute_popular_times(window_days=max(1, options['days']))
+        self.stdout.write(self.style.SUCCESS(f"compute_popular_times: {stored} shop(s) stored."))
@@ -0,0 +1,40 @@
+"""
+Resolve queued shop addresses through the geocode cache / Nominatim (about one request per second).
+Use --requeue-missing to queue shops that never had coordinates, --retry-failed for past failures.
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from barbershops.geocoding import process_pending_geocodes, queue_shop_geocode
+from barbershops.models import Barbershop
+
+
+class Command(BaseCommand):
+    help = "Drain the shop geocoding queue (rate-limited Nominatim backfill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500, help='Maximum shops to resolve in this run.')
+        parser.add_argument('--retry-failed', action='store_true', help='Re-queue shops whose geocoding failed.')
+        parser.add_argument(
+            '--requeue-missing', action='store_true',
+            help='Queue shops with an address but no coordinates, whatever their status.',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            n = Barbershop.all_objects.filter(geocode_status='failed').update(
+                geocode_status='pending', geocode_attempts=0, geocode_retry_at=timezone.now(),
+            )
+            self.stdout.write(f"geocode_shops: {n} failed shop(s) re-queued.")
+        if options['requeue_missing']:
+            missing = Barbershop.all_objects.filter(latitude__isnull=True).exclude(geocode_status='pending')
+            n = 0
+            for shop in missing.iterator():
+                queue_shop_geocode(shop, location_changed=False)
+                n += 1
+            self.stdout.write(f"geocode_shops: {n} shop(s) without coordinates queued.")
+        counts = process_pending_geocodes(limit=max(1, options['limit']))
+        self.stdout.write(self.style.SUCCESS(
+            f"geocode_shops: {counts['resolved']} resolved, {counts['failed']} failed, "
+            f"{counts['retry']} to retry, {counts['skipped']} skipped."
+        ))
@@ -0,0 +1,15 @@
+"""
+Rebuild the type-ahead prefix index from the database.
+Normally kept up to date per shop on save; run after a Redis flush or a bulk import.
+"""
+from django.core.management.base import BaseCommand
+
+from barbershops import autocomplete
+
+
+class Command(BaseCommand):
+    help = "Rebuild the autocomplete prefix index (shop names, cities, service names)."
+
+    def handle(self, *args, **options):
+        autocomplete.rebuild()
+        self.stdout.write(self.style.SUCCESS("rebuild_autocomplete: index rebuilt."))
@@ -0,0 +1,48 @@
+"""
+Re-render every discoverable shop's static JSON snapshot in parallel worker processes,
+then delete snapshots of shops that are no longer discoverable.
+Writes even when PUBLIC_SNAPSHOTS_ENABLED is off, so the directory can be seeded before enabling.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from django import db
+from django.core.management.base import BaseCommand
+
+from barbershops.models import Barbershop
+from barbershops.snapshots import publish_batch, remove_stale
+
+
+def _init_worker():
+    # Forked workers inherit the parent's connection objects; never share a socket across processes.
+    import django
+    django.setup()
+    db.connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Rebuild static JSON snapshots of public shop profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Worker processes (1 = run in this process).')
+        parser.add_argument('--batch-size', type=int, default=200, help='Shops per worker job.')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        batch_size = max(1, options['batch_size'])
+        ids = list(Barbershop.objects.discoverable().order_by('id').values_list('id', flat=True))
+        batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+        if workers == 1 or len(batches) <= 1:
+            results = [publish_batch(batch) for batch in batches]
+        else:
+            db.connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                results = list(pool.map(publish_batch, batches))
+        totals = {'written': 0, 'unchanged': 0, 'removed': 0}
+        for counts in results:
+            for key, n in counts.items():
+                totals[key] += n
+        totals['removed'] += remove_stale(ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"rebuild_snapshots: {totals['written']} written, {totals['unchanged']} unchanged, "
+            f"{totals['removed']} removed."
+        ))
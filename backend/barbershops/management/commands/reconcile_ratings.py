@@ -0,0 +1,18 @@
+"""
+Rebuild Barbershop rating aggregates (sum, count, per-star counts) from approved reviews.
+Safe to run at any time; only shops whose stored values drifted are written.
+"""
+from django.core.management.base import BaseCommand
+
+from barbershops.ratings import recompute_shop_ratings
+
+
+class Command(BaseCommand):
+    help = "Reconcile stored rating aggregates with the reviews table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', type=int, action='append', dest='shop_ids', help='Limit to shop id (repeatable).')
+
+    def handle(self, *args, **options):
+        changed = recompute_shop_ratings(options.get('shop_ids'))
+        self.stdout.write(self.style.SUCCESS(f"reconcile_ratings: {changed} shop(s) updated."))
@@ -6,6 +6,7 @@ If barbershop.subscription_status == 'suspended', returns 403 "Subscription expi
 from django.utils.deprecation import MiddlewareMixin
 from django.http import HttpResponse
 from .models import Barbershop, BarbershopStaff
+from .tenant_cache import get_active_barbershop, get_barbershop_by_name
 import logging
 import json
 
@@ -30,7 +31,7 @@ class BarbershopContextMiddleware(MiddlewareMixin):
         if barbershop_id:
             try:
                 barbershop_id = int(barbershop_id)
-                barbershop = Barbershop.objects.filter(id=barbershop_id, is_active=True).first()
+                barbershop = get_active_barbershop(barbershop_id)
                 if barbershop:
                     if barbershop.subscription_status == 'suspended':
                         return HttpResponse(
@@ -50,10 +51,7 @@ class BarbershopContextMiddleware(MiddlewareMixin):
             subdomain = host.split('.')[0]
             if subdomain and subdomain not in ['www', 'api', 'admin']:
                 try:
-                    barbershop = Barbershop.objects.filter(
-                        name__iexact=subdomain.replace('-', ' '),
-                        is_active=True
-                    ).first()
+                    barbershop = get_barbershop_by_name(subdomain.replace('-', ' '))
                     if barbershop:
                         if barbershop.subscription_status == 'suspended':
                             return HttpResponse(
@@ -87,10 +85,7 @@ class BarbershopContextMiddleware(MiddlewareMixin):
                 )
                 all_shop_ids = list(dict.fromkeys(staff_shop_ids + owned_shop_ids))
                 if len(all_shop_ids) == 1:
-                    barbershop = Barbershop.objects.filter(
-                        id=all_shop_ids[0],
-                        is_active=True,
-                    ).first()
+                    barbershop = get_active_barbershop(all_shop_ids[0])
                     if barbershop:
                         if barbershop.subscription_status == 'suspended':
                             pass  # leave barbershop None so view can handle
@@ -0,0 +1,83 @@
+# Stored approved-review aggregates on Barbershop (sum, count, per-star counts, average)
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Barbershop = apps.get_model('barbershops', 'Barbershop')
+    Review = apps.get_model('barbershops', 'Review')
+    counts = {}
+    rows = Review.objects.filter(is_approved=True).values('barbershop_id', 'rating').annotate(n=Count('id'))
+    for row in rows:
+        counts.setdefault(row['barbershop_id'], {})[row['rating']] = row['n']
+    shops = []
+    for shop in Barbershop.objects.filter(id__in=list(counts)):
+        stars = counts[shop.id]
+        for star in range(1, 6):
+            setattr(shop, f'rating_{star}_count', stars.get(star, 0))
+        shop.rating_count = sum(stars.values())
+        shop.rating_sum = sum(star * n for star, n in stars.items())
+        shop.rating_average = (Decimal(shop.rating_sum) / shop.rating_count).quantize(
+            Decimal('0.01'), rounding=ROUND_HALF_UP
+        )
+        shops.append(shop)
+    fields = ['rating_sum', 'rating_count', 'rating_average'] + [f'rating_{i}_count' for i in range(1, 6)]
+    Barbershop.objects.bulk_update(shops, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barbershops', '0006_review_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='barbershop',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='rating_average',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='barbershop',
+            index=models.Index(fields=['-rating_average', '-rating_count'], name='shop_rating_idx'),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
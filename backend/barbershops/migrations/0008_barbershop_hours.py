@@ -0,0 +1,52 @@
+# Normalized opening hours (one row per shop and open weekday) for open-at filtering
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_hours(apps, schema_editor):
+    from barbershops.hours import hours_rows
+
+    Barbershop = apps.get_model('barbershops', 'Barbershop')
+    BarbershopHours = apps.get_model('barbershops', 'BarbershopHours')
+    rows = []
+    shops = Barbershop.objects.only('id', 'opening_hours', 'opening_hour', 'closing_hour')
+    for shop in shops.iterator(chunk_size=500):
+        for weekday, open_minute, close_minute in hours_rows(shop.opening_hours, shop.opening_hour, shop.closing_hour):
+            rows.append(BarbershopHours(
+                barbershop_id=shop.id, weekday=weekday, open_minute=open_minute, close_minute=close_minute,
+            ))
+        if len(rows) >= 3500:
+            BarbershopHours.objects.bulk_create(rows)
+            rows = []
+    if rows:
+        BarbershopHours.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barbershops', '0007_barbershop_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarbershopHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField()),
+                ('open_minute', models.PositiveSmallIntegerField()),
+                ('close_minute', models.PositiveSmallIntegerField()),
+                ('barbershop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hours', to='barbershops.barbershop')),
+            ],
+            options={
+                'db_table': 'barbershop_hours',
+                'indexes': [models.Index(fields=['weekday', 'open_minute', 'close_minute'], name='shop_hours_window_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='barbershophours',
+            constraint=models.UniqueConstraint(fields=('barbershop', 'weekday'), name='unique_shop_weekday_hours'),
+        ),
+        migrations.RunPython(backfill_hours, migrations.RunPython.noop),
+    ]
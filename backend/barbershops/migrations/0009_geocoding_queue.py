@@ -0,0 +1,72 @@
+# Persistent geocode lookup cache and per-shop geocode queue state
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_geocode_state(apps, schema_editor):
+    """Shops with coordinates are resolved; shops with an address but none are placed
+    approximately from the gazetteer and queued for the exact lookup."""
+    from barbershops.gazetteer import approximate
+
+    Barbershop = apps.get_model('barbershops', 'Barbershop')
+    Barbershop.objects.filter(latitude__isnull=False, longitude__isnull=False).update(geocode_status='resolved')
+    now = timezone.now()
+    missing = Barbershop.objects.filter(latitude__isnull=True).exclude(address='', city='')
+    for shop in missing.only('id', 'city', 'country').iterator(chunk_size=500):
+        updates = {'geocode_status': 'pending', 'geocode_retry_at': now}
+        approx = approximate(shop.city, shop.country)
+        if approx:
+            updates.update(latitude=approx[0], longitude=approx[1], geocode_precision=approx[2])
+        Barbershop.objects.filter(pk=shop.pk).update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barbershops', '0008_barbershop_hours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query_hash', models.CharField(max_length=64, unique=True)),
+                ('query', models.TextField()),
+                ('found', models.BooleanField(default=False)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'geocode_cache',
+            },
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='geocode_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='geocode_precision',
+            field=models.CharField(blank=True, choices=[('', 'Unknown'), ('manual', 'Set by owner'), ('address', 'Street address'), ('city', 'City (approximate)'), ('country', 'Country (approximate)')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='geocode_retry_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='barbershop',
+            name='geocode_status',
+            field=models.CharField(choices=[('none', 'No address'), ('pending', 'Pending'), ('resolved', 'Resolved'), ('failed', 'Failed')], default='none', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='barbershop',
+            index=models.Index(fields=['geocode_status', 'geocode_retry_at'], name='shop_geocode_queue_idx'),
+        ),
+        migrations.RunPython(backfill_geocode_state, migrations.RunPython.noop),
+    ]
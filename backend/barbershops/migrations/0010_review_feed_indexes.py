@@ -0,0 +1,25 @@
+# Composite indexes for the keyset-paginated review feed (one per sort mode)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barbershops', '0009_geocoding_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['barbershop', 'is_approved', '-created_at', '-id'], name='review_feed_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['barbershop', 'is_approved', '-rating', '-created_at', '-id'], name='review_feed_highest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['barbershop', 'is_approved', 'rating', '-created_at', '-id'], name='review_feed_lowest_idx'),
+        ),
+    ]
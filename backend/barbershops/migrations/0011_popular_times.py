@@ -0,0 +1,27 @@
+# Precomputed weekday x hour popular-times histograms per shop
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barbershops', '0010_review_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularTimes',
+            fields=[
+                ('barbershop', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popular_times', serialize=False, to='barbershops.barbershop')),
+                ('histogram', models.BinaryField()),
+                ('sample_size', models.PositiveIntegerField(default=0)),
+                ('window_days', models.PositiveSmallIntegerField(default=90)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'barbershop_popular_times',
+            },
+        ),
+    ]
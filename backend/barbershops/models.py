@@ -2,7 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from django.db.models import Avg, Count, Q
+from django.db.models import Q
 import re
 import uuid
 
@@ -11,6 +11,22 @@ OPENING_HOURS_DAY_KEYS = [
     'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'
 ]
 TIME_PATTERN = re.compile(r'^([01]?\d|2[0-3]):([0-5]\d)$')
+# Subscription states that keep a shop listed in public discovery
+PUBLIC_SUBSCRIPTION_STATUSES = ['active', 'trial']
+# Geocoding state of a shop's coordinates (see barbershops.geocoding)
+GEOCODE_STATUS_CHOICES = [
+    ('none', 'No address'),
+    ('pending', 'Pending'),
+    ('resolved', 'Resolved'),
+    ('failed', 'Failed'),
+]
+GEOCODE_PRECISION_CHOICES = [
+    ('', 'Unknown'),
+    ('manual', 'Set by owner'),
+    ('address', 'Street address'),
+    ('city', 'City (approximate)'),
+    ('country', 'Country (approximate)'),
+]
 
 
 def validate_opening_hours(value):
@@ -45,11 +61,22 @@ class BarbershopQuerySet(models.QuerySet):
     def available(self):
         return self.filter(deleted_at__isnull=True)
 
+    def discoverable(self):
+        """Shops shown in public discovery: active, verified, with a live subscription."""
+        return self.filter(
+            is_active=True,
+            is_verified=True,
+            subscription_status__in=PUBLIC_SUBSCRIPTION_STATUSES,
+        )
+
 
 class BarbershopManager(models.Manager):
     def get_queryset(self):
         return BarbershopQuerySet(self.model, using=self._db).available()
 
+    def discoverable(self):
+        return self.get_queryset().discoverable()
+
 
 class Barbershop(models.Model):
     """Multi-tenant barbershop model."""
@@ -85,6 +112,20 @@ class Barbershop(models.Model):
     # Geo – for "barbershops near me" (Haversine in-app; optional PostGIS for spatial index)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geocode_status = models.CharField(max_length=10, choices=GEOCODE_STATUS_CHOICES, default='none')
+    geocode_precision = models.CharField(max_length=10, choices=GEOCODE_PRECISION_CHOICES, blank=True, default='')
+    geocode_attempts = models.PositiveSmallIntegerField(default=0)
+    geocode_retry_at = models.DateTimeField(null=True, blank=True)
+
+    # Approved-review aggregates, maintained with F() updates by barbershops.ratings
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0)
 
     # Settings
     is_active = models.BooleanField(default=True)
@@ -104,6 +145,8 @@ class Barbershop(models.Model):
             models.Index(fields=['is_active']),
             models.Index(fields=['slug']),
             models.Index(fields=['subdomain']),
+            models.Index(fields=['-rating_average', '-rating_count'], name='shop_rating_idx'),
+            models.Index(fields=['geocode_status', 'geocode_retry_at'], name='shop_geocode_queue_idx'),
         ]
 
     def distance_from_km(self, lat, lng):
@@ -122,34 +165,91 @@ class Barbershop(models.Model):
 
     @property
     def average_rating(self):
-        """Average rating (1-5) from approved reviews."""
-        reviews = self.reviews.filter(is_approved=True)
-        if not reviews.exists():
+        """Average rating (1-5) from approved reviews (stored aggregate)."""
+        if not self.rating_count:
             return 0
-        result = reviews.aggregate(avg=Avg('rating'))
-        return round(float(result['avg'] or 0), 1)
+        return round(self.rating_sum / self.rating_count, 1)
 
     @property
     def total_reviews(self):
-        """Count of approved reviews."""
-        return self.reviews.filter(is_approved=True).count()
+        """Count of approved reviews (stored aggregate)."""
+        return self.rating_count
 
     def rating_breakdown(self):
         """Returns dict {5: n, 4: n, 3: n, 2: n, 1: n} for star distribution."""
-        reviews = self.reviews.filter(is_approved=True)
-        total = reviews.count()
-        if not total:
-            return {5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-        breakdown = reviews.values('rating').annotate(count=Count('id'))
-        result = {i: 0 for i in range(1, 6)}
-        for item in breakdown:
-            result[item['rating']] = item['count']
-        return result
+        return {i: getattr(self, f'rating_{i}_count') for i in range(5, 0, -1)}
 
     def __str__(self):
         return self.name
 
 
+class BarbershopHours(models.Model):
+    """
+    Opening hours normalized from Barbershop.opening_hours: one row per open weekday.
+    Rewritten on save (see barbershops.hours) so discovery can filter on open times in SQL.
+    """
+    barbershop = models.ForeignKey(
+        Barbershop,
+        on_delete=models.CASCADE,
+        related_name='hours',
+    )
+    weekday = models.PositiveSmallIntegerField()  # 0 = Monday ... 6 = Sunday (date.weekday())
+    open_minute = models.PositiveSmallIntegerField()  # Minutes since midnight
+    close_minute = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = 'barbershop_hours'
+        constraints = [
+            models.UniqueConstraint(fields=['barbershop', 'weekday'], name='unique_shop_weekday_hours'),
+        ]
+        indexes = [
+            models.Index(fields=['weekday', 'open_minute', 'close_minute'], name='shop_hours_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.barbershop_id} day {self.weekday}: {self.open_minute}-{self.close_minute}"
+
+
+class PopularTimes(models.Model):
+    """
+    Booking density per weekday x hour (0-100, smoothed), rebuilt nightly by barbershops.popular_times.
+    histogram holds 168 bytes: Monday 00:00 ... Sunday 23:00, one uint8 per hour.
+    """
+    barbershop = models.OneToOneField(
+        Barbershop,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popular_times',
+    )
+    histogram = models.BinaryField()
+    sample_size = models.PositiveIntegerField(default=0)  # Bookings counted in the window
+    window_days = models.PositiveSmallIntegerField(default=90)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'barbershop_popular_times'
+
+    def __str__(self):
+        return f"Popular times for {self.barbershop_id}"
+
+
+class GeocodeCache(models.Model):
+    """Nominatim result per normalized address query; found=False caches a miss."""
+    query_hash = models.CharField(max_length=64, unique=True)  # sha256 of query
+    query = models.TextField()
+    found = models.BooleanField(default=False)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'geocode_cache'
+
+    def __str__(self):
+        return self.query
+
+
 class BarbershopStaff(models.Model):
     """Many-to-many relationship between barbershops and staff (barbers/admins)."""
     barbershop = models.ForeignKey(
@@ -278,6 +378,10 @@ class Review(models.Model):
             models.Index(fields=['barbershop', '-created_at']),
             models.Index(fields=['barber', '-created_at']),
             models.Index(fields=['rating']),
+            # Keyset review feed, one per sort mode (barbershops.review_feed)
+            models.Index(fields=['barbershop', 'is_approved', '-created_at', '-id'], name='review_feed_newest_idx'),
+            models.Index(fields=['barbershop', 'is_approved', '-rating', '-created_at', '-id'], name='review_feed_highest_idx'),
+            models.Index(fields=['barbershop', 'is_approved', 'rating', '-created_at', '-id'], name='review_feed_lowest_idx'),
         ]
 
     def save(self, *args, **kwargs):
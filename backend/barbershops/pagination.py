@@ -0,0 +1,98 @@
+"""
+Keyset (cursor) pagination: no COUNT(*) and no OFFSET, so every page costs the same.
+
+The cursor is the sort key of the last row served, and the next page is the rows strictly
+after it in the ordering. Orderings may mix directions, e.g. rating ascending then newest
+first; the ordering must end with a unique field (id) so ties never skip or repeat rows.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPagination:
+    page_size = 20
+    max_page_size = 100
+
+    def __init__(self, ordering):
+        # ordering: ['-created_at', '-id'] style, last field unique
+        self.ordering = list(ordering)
+        self.fields = [f.lstrip('-') for f in self.ordering]
+
+    @classmethod
+    def get_page_size(cls, request):
+        try:
+            size = int(request.query_params.get('page_size', cls.page_size))
+        except (TypeError, ValueError):
+            size = cls.page_size
+        return max(1, min(cls.max_page_size, size))
+
+    @staticmethod
+    def _dump(value):
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    def encode_cursor(self, obj):
+        values = [self._dump(getattr(obj, f) if not isinstance(obj, dict) else obj[f]) for f in self.fields]
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor('Invalid cursor.') from e
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor('Invalid cursor.')
+        out = []
+        for value in values:
+            # Only the scalars encode_cursor writes; bool is an int subclass but never a sort key here
+            if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+                raise InvalidCursor('Invalid cursor.')
+            if isinstance(value, str):
+                try:
+                    parsed = parse_datetime(value)
+                except ValueError as e:  # Well-formed but out of range, e.g. month 13
+                    raise InvalidCursor('Invalid cursor.') from e
+                if parsed is None:
+                    raise InvalidCursor('Invalid cursor.')
+                value = parsed
+            out.append(value)
+        return out
+
+    def after(self, queryset, values):
+        """Rows strictly after values: (a > x) OR (a = x AND b > y) OR ..., per-field direction."""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                term &= Q(**{prev_name: prev_value})
+            condition |= term
+        return queryset.filter(condition)
+
+    def paginate(self, queryset, cursor=None, page_size=None):
+        """(rows, next_cursor or None). Raises InvalidCursor for a malformed cursor."""
+        page_size = page_size or self.page_size
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            try:
+                queryset = self.after(queryset, self.decode_cursor(cursor))
+            except (ValidationError, ValueError, TypeError) as e:
+                # A value of the wrong type for its field (e.g. a number for a datetime)
+                if isinstance(e, InvalidCursor):
+                    raise
+                raise InvalidCursor('Invalid cursor.') from e
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        return rows, (self.encode_cursor(rows[-1]) if has_more else None)
@@ -0,0 +1,91 @@
+"""
+Popular times: how busy a shop usually is per weekday and hour, from booking history.
+
+One grouped query counts non-cancelled bookings per (shop, weekday, hour) over a trailing
+window; numpy smooths each shop's 168-hour week with a circular kernel (Sunday night runs
+into Monday morning) and scales it to 0-100. Results are stored as 168 bytes per shop, so
+serving them is a primary-key read.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Count
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+
+from .models import OPENING_HOURS_DAY_KEYS, PopularTimes
+
+HOURS_PER_WEEK = 7 * 24
+DEFAULT_WINDOW_DAYS = 90
+# Below this many bookings the histogram is noise; the shop gets no popular-times row
+MIN_SAMPLE_SIZE = 10
+# Weights for hours -2..+2 around each hour
+SMOOTHING_KERNEL = np.array([0.1, 0.2, 0.4, 0.2, 0.1])
+
+
+def smooth_and_scale(counts):
+    """(n, 168) booking counts -> (n, 168) uint8 0-100, circularly smoothed per row."""
+    counts = np.asarray(counts, dtype=np.float64)
+    half = len(SMOOTHING_KERNEL) // 2
+    smoothed = np.zeros_like(counts)
+    for offset, weight in zip(range(-half, half + 1), SMOOTHING_KERNEL):
+        smoothed += weight * np.roll(counts, offset, axis=1)
+    peak = smoothed.max(axis=1, keepdims=True)
+    scaled = np.divide(smoothed * 100.0, peak, out=np.zeros_like(smoothed), where=peak > 0)
+    return np.rint(scaled).astype(np.uint8)
+
+
+def compute_popular_times(window_days=DEFAULT_WINDOW_DAYS):
+    """Rebuild every shop's histogram. Returns the number of shops stored."""
+    from bookings.models import Booking
+
+    now = timezone.now()
+    rows = (
+        Booking.objects.filter(
+            barbershop__isnull=False,
+            booking_time__gte=now - timedelta(days=window_days),
+            booking_time__lt=now,
+        )
+        .exclude(booking_status='Cancelled')
+        .annotate(weekday=ExtractIsoWeekDay('booking_time'), hour=ExtractHour('booking_time'))
+        .values_list('barbershop_id', 'weekday', 'hour')
+        .annotate(n=Count('id'))
+    )
+    rows = list(rows)
+    shop_ids = sorted({r[0] for r in rows})
+    position = {shop_id: i for i, shop_id in enumerate(shop_ids)}
+    counts = np.zeros((len(shop_ids), HOURS_PER_WEEK), dtype=np.int64)
+    for shop_id, weekday, hour, n in rows:
+        counts[position[shop_id], (weekday - 1) * 24 + hour] += n
+
+    totals = counts.sum(axis=1)
+    keep = totals >= MIN_SAMPLE_SIZE
+    histograms = smooth_and_scale(counts[keep]) if keep.any() else np.zeros((0, HOURS_PER_WEEK), dtype=np.uint8)
+    kept_ids = [shop_id for shop_id, k in zip(shop_ids, keep) if k]
+    objs = [
+        PopularTimes(
+            barbershop_id=shop_id,
+            histogram=histogram.tobytes(),
+            sample_size=int(total),
+            window_days=window_days,
+            computed_at=now,
+        )
+        for shop_id, histogram, total in zip(kept_ids, histograms, totals[keep])
+    ]
+    PopularTimes.objects.bulk_create(
+        objs,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['barbershop'],
+        update_fields=['histogram', 'sample_size', 'window_days', 'computed_at'],
+    )
+    PopularTimes.objects.exclude(barbershop_id__in=kept_ids).delete()
+    return len(objs)
+
+
+def histogram_by_day(popular_times):
+    """{'monday': [24 ints], ..., 'sunday': [...]} from a stored row."""
+    values = np.frombuffer(bytes(popular_times.histogram), dtype=np.uint8)
+    if values.size != HOURS_PER_WEEK:
+        return {}
+    return {day: values[i * 24:(i + 1) * 24].tolist() for i, day in enumerate(OPENING_HOURS_DAY_KEYS)}
@@ -0,0 +1,106 @@
+"""
+Cached public shop profile (GET /api/barbershops/<id>/public/).
+
+The payload is built once per content version and stored with its strong ETag and
+Last-Modified. Signals (barbershops.signals) bump the shop's version when the shop, its
+services, staff, staff user names or reviews change, so a stale entry is never read again;
+invalidation also re-publishes the shop's static snapshot (barbershops.snapshots).
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from services.cache_utils import get_cache_version, bump_cache_version, get_or_compute
+from .models import Barbershop, BarbershopStaff
+
+CACHE_TIMEOUT = 60 * 60 * 24
+VERSION_NAMESPACE = 'public_profile:{}'
+CACHE_KEY = 'public_profile:{}:v{}'
+# Last ETag and Last-Modified per shop, so a rebuild with identical content keeps its date
+META_KEY = 'public_profile_meta:{}'
+
+
+def invalidate(shop_id):
+    """Drop the cached profile and re-publish the shop's static snapshot (if enabled)."""
+    from .snapshots import schedule_publish
+
+    bump_cache_version(VERSION_NAMESPACE.format(shop_id))
+    schedule_publish(shop_id)
+
+
+def build_payload(barbershop):
+    """The profile body: shop fields, active services, active staff, rating summary."""
+    from services.models import Service
+
+    services = list(
+        Service.objects.filter(barbershop=barbershop, is_active=True).order_by('id').values(
+            'id', 'name', 'description', 'price', 'duration', 'category', 'image_url'
+        )
+    )
+    for s in services:
+        s['price'] = float(s['price'])
+    staff = (
+        BarbershopStaff.objects.filter(barbershop=barbershop, is_active=True)
+        .order_by('id')
+        .values('id', 'role', 'user__name', 'user__email')
+    )
+    staff_list = [{'id': s['id'], 'role': s['role'], 'name': s['user__name'], 'email': s['user__email']} for s in staff]
+    payload = {
+        'id': barbershop.id,
+        'name': barbershop.name,
+        'slug': barbershop.slug,
+        'address': barbershop.address,
+        'city': barbershop.city,
+        'country': barbershop.country,
+        'phone': barbershop.phone,
+        'email': barbershop.email,
+        'opening_hours': barbershop.opening_hours,
+        'logo_url': barbershop.logo_url,
+        'services': services,
+        'staff': staff_list,
+        'average_rating': barbershop.average_rating,
+        'total_reviews': barbershop.total_reviews,
+    }
+    if barbershop.latitude is not None and barbershop.longitude is not None:
+        payload['latitude'] = float(barbershop.latitude)
+        payload['longitude'] = float(barbershop.longitude)
+    return payload
+
+
+def _etag(payload):
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder)
+    return '"%s"' % hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def get_public_profile(shop_id):
+    """
+    {'payload', 'etag', 'last_modified' (unix seconds)} for a discoverable shop, else None.
+    Cache hits need no database query; concurrent misses are coalesced into one rebuild.
+    """
+    key = CACHE_KEY.format(shop_id, get_cache_version(VERSION_NAMESPACE.format(shop_id)))
+    return get_or_compute(key, lambda: _build_entry(shop_id), CACHE_TIMEOUT, stat='public_profile')
+
+
+def _build_entry(shop_id):
+    barbershop = Barbershop.objects.discoverable().filter(pk=shop_id).first()
+    if not barbershop:
+        return None
+    payload = build_payload(barbershop)
+    etag = _etag(payload)
+    meta = cache.get(META_KEY.format(shop_id))
+    if meta and meta[0] == etag:
+        last_modified = meta[1]
+    else:
+        last_modified = int(timezone.now().timestamp())
+        cache.set(META_KEY.format(shop_id), (etag, last_modified), None)
+    return {'payload': payload, 'etag': etag, 'last_modified': last_modified}
+
+
+def staff_shop_ids(user_id):
+    """Shops whose public profile lists this user."""
+    return list(
+        BarbershopStaff.objects.filter(user_id=user_id, is_active=True).values_list('barbershop_id', flat=True)
+    )
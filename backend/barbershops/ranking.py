@@ -0,0 +1,126 @@
+"""
+Composite ranking for public discovery (sort=recommended).
+
+Candidates come from the caller's queryset (already narrowed by filters and the geo bounding
+box); one values_list query loads the ranking columns, one query finds shops with a free slot
+today, and the score is computed with numpy over the whole candidate set. Callers then load
+only the requested page of shops.
+"""
+import math
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+EARTH_RADIUS_KM = 6371.0
+
+DEFAULT_RANKING = {
+    'distance_weight': 0.35,
+    'rating_weight': 0.35,
+    'volume_weight': 0.1,
+    'availability_weight': 0.2,
+    'distance_scale_km': 3.0,
+    'rating_prior_mean': 3.5,
+    'rating_prior_weight': 5,
+    'volume_saturation': 200,
+}
+
+
+def ranking_config():
+    """DEFAULT_RANKING overridden by settings.DISCOVERY_RANKING."""
+    return {**DEFAULT_RANKING, **getattr(settings, 'DISCOVERY_RANKING', {})}
+
+
+def bounding_box(lat, lng, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing the circle; an index-friendly SQL prefilter."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    dlng = min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+def within_bounding_box(queryset, lat, lng, radius_km):
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    return queryset.filter(
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Great-circle distances (km) from (lat, lng) to arrays of coordinates."""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def shops_with_free_slot_today(shop_ids):
+    """Ids (subset of shop_ids) with at least one unbooked slot later today."""
+    from bookings.models import TimeSlot
+
+    if not shop_ids:
+        return set()
+    now = timezone.now()
+    return set(
+        TimeSlot.objects.filter(
+            barbershop_id__in=shop_ids,
+            date=timezone.localdate(),
+            is_booked=False,
+            start_time__gt=now,
+        ).values_list('barbershop_id', flat=True).distinct()
+    )
+
+
+def rank(queryset, lat=None, lng=None, radius_km=None):
+    """
+    Score every shop in queryset and return [(shop_id, score, distance_km or None)], best first.
+    With lat/lng, shops without coordinates or beyond radius_km are dropped and distance counts
+    toward the score; without them the distance term is left out.
+    """
+    cfg = ranking_config()
+    geo = lat is not None and lng is not None
+    if geo:
+        queryset = queryset.filter(latitude__isnull=False, longitude__isnull=False)
+        if radius_km is not None:
+            queryset = within_bounding_box(queryset, lat, lng, radius_km)
+    rows = list(queryset.values_list('id', 'latitude', 'longitude', 'rating_sum', 'rating_count'))
+    if not rows:
+        return []
+    ids = np.array([r[0] for r in rows], dtype=np.int64)
+    rating_sum = np.array([r[3] for r in rows], dtype=np.float64)
+    rating_count = np.array([r[4] for r in rows], dtype=np.float64)
+
+    distances = None
+    keep = np.ones(len(rows), dtype=bool)
+    score = np.zeros(len(rows), dtype=np.float64)
+    if geo:
+        lats = np.array([float(r[1]) for r in rows], dtype=np.float64)
+        lngs = np.array([float(r[2]) for r in rows], dtype=np.float64)
+        distances = haversine_km(lat, lng, lats, lngs)
+        if radius_km is not None:
+            keep = distances <= radius_km
+        score += cfg['distance_weight'] * np.exp(-distances / max(cfg['distance_scale_km'], 1e-6))
+
+    # Bayesian average on the 1-5 scale, mapped to 0-1
+    prior_n, prior_mean = cfg['rating_prior_weight'], cfg['rating_prior_mean']
+    bayes = (prior_n * prior_mean + rating_sum) / (prior_n + rating_count)
+    score += cfg['rating_weight'] * np.clip((bayes - 1.0) / 4.0, 0.0, 1.0)
+    score += cfg['volume_weight'] * np.minimum(
+        np.log1p(rating_count) / math.log1p(max(cfg['volume_saturation'], 1)), 1.0
+    )
+
+    ids, score = ids[keep], score[keep]
+    if distances is not None:
+        distances = distances[keep]
+    free = shops_with_free_slot_today([int(i) for i in ids])
+    if free:
+        score += cfg['availability_weight'] * np.isin(ids, list(free))
+
+    # Best score first; ties broken by distance, then id, so pages are stable
+    tiebreak = distances if distances is not None else np.zeros(len(ids))
+    order = np.lexsort((ids, tiebreak, -score))
+    return [
+        (int(ids[i]), float(score[i]), float(distances[i]) if distances is not None else None)
+        for i in order
+    ]
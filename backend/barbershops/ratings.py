@@ -0,0 +1,100 @@
+"""
+Stored rating aggregates on Barbershop (sum, count, per-star counts, average).
+
+Review writes apply a delta with a single F() UPDATE so concurrent reviews never
+read-modify-write; recompute_shop_ratings() rebuilds the columns from the reviews
+table and is run periodically to repair any drift (admin bulk edits, raw SQL).
+"""
+import logging
+from collections import Counter, defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Count, DecimalField, F, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from . import public_profile
+from .models import Barbershop, Review
+
+logger = logging.getLogger(__name__)
+
+STAR_FIELDS = {star: f'rating_{star}_count' for star in range(1, 6)}
+AGGREGATE_FIELDS = ['rating_sum', 'rating_count', 'rating_average'] + list(STAR_FIELDS.values())
+
+
+def apply_rating_change(barbershop_id, added=(), removed=()):
+    """
+    Apply approved-review ratings entering (added) and leaving (removed) a shop's aggregate.
+    Call inside the transaction that writes the review.
+    """
+    added, removed = list(added), list(removed)
+    stars = Counter(added)
+    stars.subtract(removed)
+    sum_delta = sum(added) - sum(removed)
+    count_delta = len(added) - len(removed)
+    if not sum_delta and not count_delta and not any(stars.values()):
+        return
+    updates = {
+        STAR_FIELDS[star]: F(STAR_FIELDS[star]) + delta
+        for star, delta in stars.items() if delta
+    }
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('rating_count') + count_delta
+    updates['rating_sum'] = new_sum
+    updates['rating_count'] = new_count
+    # Every right-hand side sees the pre-update row, so the average is derived from the same delta.
+    updates['rating_average'] = Coalesce(
+        Cast(new_sum, DecimalField(max_digits=12, decimal_places=4)) / NullIf(new_count, 0),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+    Barbershop.all_objects.filter(pk=barbershop_id).update(**updates)
+
+
+def _aggregates_from_counts(star_counts):
+    values = {STAR_FIELDS[star]: star_counts.get(star, 0) for star in STAR_FIELDS}
+    count = sum(star_counts.values())
+    total = sum(star * n for star, n in star_counts.items())
+    values['rating_sum'] = total
+    values['rating_count'] = count
+    values['rating_average'] = (
+        (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) if count else Decimal('0')
+    )
+    return values
+
+
+def recompute_shop_ratings(shop_ids=None, batch_size=500):
+    """
+    Rebuild stored aggregates from approved reviews (one grouped query per batch of shops).
+    shop_ids=None reconciles every shop. Returns the number of shops whose values changed.
+    """
+    shops = Barbershop.all_objects.order_by('id')
+    if shop_ids is not None:
+        shops = shops.filter(id__in=list(shop_ids))
+    ids = list(shops.values_list('id', flat=True))
+    changed = 0
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        counts = defaultdict(dict)
+        rows = (
+            Review.objects.filter(barbershop_id__in=batch_ids, is_approved=True)
+            .values('barbershop_id', 'rating')
+            .annotate(n=Count('id'))
+        )
+        for row in rows:
+            counts[row['barbershop_id']][row['rating']] = row['n']
+        to_update = []
+        for shop in Barbershop.all_objects.filter(id__in=batch_ids).only('id', *AGGREGATE_FIELDS):
+            expected = _aggregates_from_counts(counts.get(shop.id, {}))
+            if any(getattr(shop, field) != value for field, value in expected.items()):
+                for field, value in expected.items():
+                    setattr(shop, field, value)
+                to_update.append(shop)
+        if to_update:
+            Barbershop.all_objects.bulk_update(to_update, AGGREGATE_FIELDS)
+            changed += len(to_update)
+            # bulk_update sends no signals; drop cached profiles showing the old rating
+            for shop in to_update:
+                public_profile.invalidate(shop.id)
+    if changed and shop_ids is None:
+        logger.warning('Rating reconciliation corrected %s shop(s)', changed)
+    return changed
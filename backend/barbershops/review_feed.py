@@ -0,0 +1,69 @@
+"""
+Public review feed for a shop: keyset-paginated per sort mode, with the first page
+(what almost every visitor sees) cached per shop / sort / filter under a version that
+review and reviewer changes bump (barbershops.signals).
+"""
+from services.cache_utils import get_cache_version, bump_cache_version, get_or_compute
+from .models import Review
+from .pagination import KeysetPagination
+from .serializers import ReviewSerializer
+
+SORT_ORDERINGS = {
+    'newest': ['-created_at', '-id'],
+    'highest': ['-rating', '-created_at', '-id'],
+    'lowest': ['rating', '-created_at', '-id'],
+}
+FIRST_PAGE_TIMEOUT = 60 * 10
+VERSION_NAMESPACE = 'reviews:{}'
+CACHE_KEY = 'reviews_feed:{}:{}:{}:{}:v{}'
+
+
+def invalidate(shop_id):
+    bump_cache_version(VERSION_NAMESPACE.format(shop_id))
+
+
+def feed_queryset(shop_id, verified_only=False):
+    """Approved reviews with only the columns the feed renders (one join to users)."""
+    qs = (
+        Review.objects.filter(barbershop_id=shop_id, is_approved=True)
+        .select_related('customer')
+        .only(
+            'id', 'rating', 'comment', 'is_verified', 'created_at', 'barber_id', 'customer_id',
+            'customer__name', 'customer__profile_pic_url', 'customer__profile_pic_public_id',
+        )
+    )
+    if verified_only:
+        qs = qs.filter(is_verified=True)
+    return qs
+
+
+def _rows(reviews):
+    """Request-independent rows; is_editable is filled in per request by the caller."""
+    data = ReviewSerializer(reviews, many=True).data
+    return [
+        {'review': dict(item), 'customer_id': review.customer_id, 'created_at': review.created_at}
+        for item, review in zip(data, reviews)
+    ]
+
+
+def get_page(shop_id, sort='newest', verified_only=False, cursor=None, page_size=None):
+    """
+    (rows, next_cursor). Raises pagination.InvalidCursor for a malformed cursor.
+    Unknown sort values fall back to newest.
+    """
+    if sort not in SORT_ORDERINGS:
+        sort = 'newest'
+    paginator = KeysetPagination(SORT_ORDERINGS[sort])
+    page_size = page_size or paginator.page_size
+    qs = feed_queryset(shop_id, verified_only)
+    if cursor:
+        reviews, next_cursor = paginator.paginate(qs, cursor, page_size)
+        return _rows(reviews), next_cursor
+    version = get_cache_version(VERSION_NAMESPACE.format(shop_id))
+    key = CACHE_KEY.format(shop_id, sort, int(bool(verified_only)), page_size, version)
+
+    def first_page():
+        reviews, next_cursor = paginator.paginate(qs, None, page_size)
+        return _rows(reviews), next_cursor
+
+    return get_or_compute(key, first_page, FIRST_PAGE_TIMEOUT, stat='review_feed')
@@ -3,10 +3,12 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 
 from .models import Review
+from .ratings import apply_rating_change
 from .serializers import ReviewSerializer, ReviewCreateSerializer
 
 
@@ -23,7 +25,10 @@ def review_create(request):
             {'success': False, 'errors': serializer.errors},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    review = serializer.save()
+    with transaction.atomic():
+        review = serializer.save()
+        if review.is_approved:
+            apply_rating_change(review.barbershop_id, added=[review.rating])
     out = ReviewSerializer(review, context={'request': request})
     return Response({'success': True, 'review': out.data}, status=status.HTTP_201_CREATED)
 
@@ -39,7 +44,10 @@ def review_detail(request, pk):
     if review.customer_id != request.user.id:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     if request.method == 'DELETE':
-        review.delete()
+        with transaction.atomic():
+            review.delete()
+            if review.is_approved:
+                apply_rating_change(review.barbershop_id, removed=[review.rating])
         return Response(status=status.HTTP_204_NO_CONTENT)
     # PATCH: only within 24h
     delta = timezone.now() - review.created_at
@@ -52,9 +60,13 @@ def review_detail(request, pk):
     if not serializer.is_valid():
         return Response({'success': False, 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
     # Only allow updating rating and comment
+    old_rating = review.rating
     for key in ('rating', 'comment'):
-        if key in request.data:
-            setattr(review, key, request.data[key])
-    review.save(update_fields=['rating', 'comment', 'updated_at'])
+        if key in serializer.validated_data:
+            setattr(review, key, serializer.validated_data[key])
+    with transaction.atomic():
+        review.save(update_fields=['rating', 'comment', 'updated_at'])
+        if review.is_approved and review.rating != old_rating:
+            apply_rating_change(review.barbershop_id, added=[review.rating], removed=[old_rating])
     out = ReviewSerializer(review, context={'request': request})
     return Response({'success': True, 'review': out.data})
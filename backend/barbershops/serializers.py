@@ -143,12 +143,22 @@ class BarbershopStaffSerializer(serializers.ModelSerializer):
         return obj.barbershop.owner_id == obj.user_id
 
 
+def review_is_editable(request, customer_id, created_at):
+    """Authors may edit their review for one day after posting."""
+    if not request or not request.user.is_authenticated:
+        return False
+    if customer_id != request.user.id:
+        return False
+    delta = timezone.now() - created_at
+    return delta.days < 1
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     """Read serializer for reviews (list/detail)."""
     customer_name = serializers.CharField(source='customer.name', read_only=True)
     customer_avatar = serializers.SerializerMethodField()
     is_editable = serializers.SerializerMethodField()
-    barber_id = serializers.IntegerField(source='barber_id', read_only=True, allow_null=True)
+    barber_id = serializers.IntegerField(read_only=True, allow_null=True)
 
     class Meta:
         model = Review
@@ -167,13 +177,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         return url or None
 
     def get_is_editable(self, obj):
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-        if obj.customer_id != request.user.id:
-            return False
-        delta = timezone.now() - obj.created_at
-        return delta.days < 1
+        return review_is_editable(self.context.get('request'), obj.customer_id, obj.created_at)
 
 
 class ReviewCreateSerializer(serializers.ModelSerializer):
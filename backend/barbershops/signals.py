@@ -0,0 +1,84 @@
+"""
+Keep derived read models in step with shop data.
+Work runs after commit so a rolled-back write never leaks into an index.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from services.models import Service
+from . import autocomplete, public_profile, review_feed, tenant_cache
+from .hours import sync_barbershop_hours
+from .models import Barbershop, BarbershopStaff, Review
+
+HOURS_FIELDS = {'opening_hours', 'opening_hour', 'closing_hour'}
+# User fields shown on public profiles (staff list) and in review feeds (author)
+PROFILE_USER_FIELDS = {'name', 'email'}
+REVIEWER_FIELDS = {'name', 'profile_pic_url', 'profile_pic_public_id'}
+
+
+def _refresh_autocomplete(shop_id):
+    if shop_id:
+        transaction.on_commit(lambda: autocomplete.refresh_shop(shop_id))
+
+
+def _invalidate_profile(shop_id):
+    if shop_id:
+        transaction.on_commit(lambda: public_profile.invalidate(shop_id))
+
+
+def _invalidate_reviews(shop_id):
+    if shop_id:
+        transaction.on_commit(lambda: review_feed.invalidate(shop_id))
+
+
+@receiver(post_save, sender=Barbershop)
+@receiver(post_delete, sender=Barbershop)
+def barbershop_changed(sender, instance, **kwargs):
+    _refresh_autocomplete(instance.pk)
+    _invalidate_profile(instance.pk)
+    transaction.on_commit(lambda: tenant_cache.invalidate(instance))
+
+
+@receiver(post_save, sender=Barbershop)
+def sync_hours(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Runs inside the save's transaction only when the caller opened one (the shop views and admin do).
+    if raw or (update_fields is not None and not HOURS_FIELDS & set(update_fields)):
+        return
+    sync_barbershop_hours(instance)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_changed(sender, instance, **kwargs):
+    _refresh_autocomplete(instance.barbershop_id)
+    _invalidate_profile(instance.barbershop_id)
+
+
+@receiver(post_save, sender=BarbershopStaff)
+@receiver(post_delete, sender=BarbershopStaff)
+def shop_profile_changed(sender, instance, **kwargs):
+    _invalidate_profile(instance.barbershop_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    _invalidate_profile(instance.barbershop_id)
+    _invalidate_reviews(instance.barbershop_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Logins save last_login only; skip saves that cannot change a staff list or review author.
+    if created:
+        return
+    changed = set(update_fields) if update_fields is not None else PROFILE_USER_FIELDS | REVIEWER_FIELDS
+    if PROFILE_USER_FIELDS & changed:
+        for shop_id in public_profile.staff_shop_ids(instance.pk):
+            _invalidate_profile(shop_id)
+    if REVIEWER_FIELDS & changed:
+        shop_ids = Review.objects.filter(customer_id=instance.pk).values_list('barbershop_id', flat=True).distinct()
+        for shop_id in shop_ids:
+            _invalidate_reviews(shop_id)
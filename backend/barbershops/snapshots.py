@@ -0,0 +1,129 @@
+"""
+Static JSON snapshots of public shop profiles.
+
+Each discoverable shop is rendered to <PUBLIC_SNAPSHOT_ROOT>/shops/<id>.json (profile with
+services, plus rating summary) so anonymous browse traffic can be served by the web server
+or CDN without touching Django. Files are replaced atomically and only rewritten when their
+content changes; shops that stop being discoverable have their file removed.
+"""
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Barbershop
+from .public_profile import build_payload
+
+try:
+    from djangorestframework_camel_case.util import camelize
+except ImportError:
+    camelize = None
+
+logger = logging.getLogger(__name__)
+
+SHOPS_DIR = 'shops'
+
+
+def snapshots_enabled():
+    return getattr(settings, 'PUBLIC_SNAPSHOTS_ENABLED', False)
+
+
+def snapshot_path(shop_id):
+    return Path(settings.PUBLIC_SNAPSHOT_ROOT) / SHOPS_DIR / f'{int(shop_id)}.json'
+
+
+def render_snapshot(barbershop):
+    """Snapshot body, keyed like the live API responses (camelCase when the API uses it)."""
+    document = {
+        'profile': build_payload(barbershop),
+        'rating_summary': {
+            'average_rating': barbershop.average_rating,
+            'total_reviews': barbershop.total_reviews,
+            'rating_breakdown': barbershop.rating_breakdown(),
+        },
+    }
+    if camelize is not None:
+        document = camelize(document)
+    return json.dumps(document, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def write_atomic(path, content):
+    """Replace path with content so readers see either the old or the new file, never a partial one."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def publish_shop(shop_id):
+    """
+    Write (or remove) one shop's snapshot. Returns 'written', 'unchanged' or 'removed'.
+    """
+    path = snapshot_path(shop_id)
+    barbershop = Barbershop.objects.discoverable().filter(pk=shop_id).first()
+    if barbershop is None:
+        if path.exists():
+            path.unlink()
+            return 'removed'
+        return 'unchanged'
+    content = render_snapshot(barbershop)
+    try:
+        if path.read_bytes() == content:
+            return 'unchanged'
+    except FileNotFoundError:
+        pass
+    write_atomic(path, content)
+    return 'written'
+
+
+def schedule_publish(shop_id):
+    """Re-render a shop's snapshot after a change: via Celery when a broker is configured, else inline."""
+    if not snapshots_enabled():
+        return
+    from .tasks import publish_shop_snapshot_task
+
+    if publish_shop_snapshot_task is not None and getattr(settings, 'CELERY_BROKER_URL', ''):
+        try:
+            publish_shop_snapshot_task.delay(shop_id)
+            return
+        except Exception as e:
+            logger.warning('Snapshot task for shop %s not queued, rendering inline: %s', shop_id, e)
+    try:
+        publish_shop(shop_id)
+    except Exception:
+        logger.exception('Failed to publish snapshot for shop %s', shop_id)
+
+
+def publish_batch(shop_ids):
+    """Publish several shops; returns {'written': n, 'unchanged': n, 'removed': n}."""
+    counts = {'written': 0, 'unchanged': 0, 'removed': 0}
+    for shop_id in shop_ids:
+        counts[publish_shop(shop_id)] += 1
+    return counts
+
+
+def remove_stale(keep_ids):
+    """Delete snapshot files of shops not in keep_ids. Returns the number removed."""
+    directory = Path(settings.PUBLIC_SNAPSHOT_ROOT) / SHOPS_DIR
+    if not directory.is_dir():
+        return 0
+    keep = {f'{int(i)}.json' for i in keep_ids}
+    removed = 0
+    for path in directory.glob('*.json'):
+        if path.name not in keep:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
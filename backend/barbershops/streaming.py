@@ -0,0 +1,73 @@
+"""
+Streaming JSON list responses.
+
+stream_json() sends {..., key: [item, item, ...], ...} as a StreamingHttpResponse whose list
+items come from an iterator, typically a chunked queryset iterator (server-side cursor).
+Items are rendered and sent a batch at a time, so a worker holds one chunk of rows instead
+of the whole result and its rendered JSON.
+
+Each item (and the envelope) goes through the project's default JSON renderer
+(CamelCaseJSONRenderer when installed), so the bytes match a regular Response. The status
+line is sent before the first row is read: check for 404-style conditions beforehand.
+"""
+import logging
+import uuid
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+# Send a piece once this many rendered bytes are buffered
+FLUSH_BYTES = 64 * 1024
+
+
+def json_renderer():
+    """Instance of the first JSON renderer in DEFAULT_RENDERER_CLASSES."""
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        if renderer_class.format == 'json':
+            return renderer_class()
+    return JSONRenderer()
+
+
+def serialize_queryset(queryset, serializer_class, context=None, chunk_size=CHUNK_SIZE):
+    """Serialized rows of queryset, read chunk_size rows at a time."""
+    serializer = serializer_class(context=context or {})
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield serializer.to_representation(obj)
+
+
+def stream_json(envelope, key, status=200):
+    """
+    StreamingHttpResponse of envelope, where envelope[key] is an iterable of items
+    (dicts) streamed as a JSON array; the other values are rendered as usual.
+    """
+    renderer = json_renderer()
+    items = envelope[key]
+    sentinel = uuid.uuid4().hex
+    document = renderer.render({**envelope, key: sentinel})
+    prefix, suffix = document.split(renderer.render(sentinel), 1)
+
+    def chunks():
+        buffer = [prefix, b'[']
+        size = 0
+        first = True
+        try:
+            for item in items:
+                data = renderer.render(item)
+                buffer.append(data if first else b',' + data)
+                first = False
+                size += len(data) + 1
+                if size >= FLUSH_BYTES:
+                    yield b''.join(buffer)
+                    buffer, size = [], 0
+        except Exception:
+            # Headers are gone: the client gets truncated (invalid) JSON, and we get the trace
+            logger.exception('Streaming %r failed', key)
+            raise
+        buffer += [b']', suffix]
+        yield b''.join(buffer)
+
+    return StreamingHttpResponse(chunks(), status=status, content_type='application/json')
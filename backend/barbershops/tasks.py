@@ -0,0 +1,79 @@
+"""Celery tasks for barbershop read models (ratings, profile snapshots, geocoding, popular times)."""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_shop_ratings():
+    """
+    Rebuild stored rating aggregates from approved reviews. Run via Celery Beat.
+    If Celery is not installed, run `python manage.py reconcile_ratings` from cron instead.
+    """
+    from .ratings import recompute_shop_ratings
+    return recompute_shop_ratings()
+
+
+def publish_shop_snapshot(shop_id):
+    """Re-render one shop's static JSON snapshot (queued on change by snapshots.schedule_publish)."""
+    from .snapshots import publish_shop
+    return publish_shop(shop_id)
+
+
+def geocode_shop(shop_id):
+    """Resolve one queued shop address (queued on registration / address change)."""
+    from .geocoding import geocode_shop as resolve
+    return resolve(shop_id)
+
+
+def geocode_pending_shops(limit=30):
+    """
+    Drain due shops from the geocoding queue (rate-limited to ~1 request/second). Run via Celery Beat.
+    If Celery is not installed, run `python manage.py geocode_shops` from cron instead.
+    """
+    from .geocoding import process_pending_geocodes
+    return process_pending_geocodes(limit=limit)
+
+
+def compute_popular_times():
+    """
+    Rebuild weekday x hour popular-times histograms from booking history. Run nightly via Celery Beat.
+    If Celery is not installed, run `python manage.py compute_popular_times` from cron instead.
+    """
+    from .popular_times import compute_popular_times as rebuild
+    return rebuild()
+
+
+# Celery shared_task (optional - only if celery is installed)
+try:
+    from celery import shared_task
+
+    @shared_task
+    def reconcile_shop_ratings_task():
+        """Celery task wrapper for reconcile_shop_ratings."""
+        return reconcile_shop_ratings()
+
+    @shared_task
+    def publish_shop_snapshot_task(shop_id):
+        """Celery task wrapper for publish_shop_snapshot."""
+        return publish_shop_snapshot(shop_id)
+
+    @shared_task
+    def geocode_shop_task(shop_id):
+        """Celery task wrapper for geocode_shop."""
+        return geocode_shop(shop_id)
+
+    @shared_task
+    def geocode_pending_shops_task():
+        """Celery task wrapper for geocode_pending_shops."""
+        return geocode_pending_shops()
+
+    @shared_task
+    def compute_popular_times_task():
+        """Celery task wrapper for compute_popular_times."""
+        return compute_popular_times()
+except ImportError:
+    reconcile_shop_ratings_task = None
+    publish_shop_snapshot_task = None
+    geocode_shop_task = None
+    geocode_pending_shops_task = None
+    compute_popular_times_task = None
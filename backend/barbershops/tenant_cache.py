@@ -0,0 +1,68 @@
+"""
+Tenant lookups for BarbershopContextMiddleware, served from the two-tier cache.
+
+Every API request resolves its barbershop from X-Barbershop-Id or the subdomain; the row
+rarely changes, so it is cached as plain field values and rebuilt into a fresh instance per
+request (never a shared, mutable object). Rating aggregates are left out: they are updated
+with F() expressions that fire no signal, so they are loaded lazily (deferred) if read.
+"""
+from services.tiered_cache import tiered_cache
+
+from .models import Barbershop
+
+TENANT_TTL = 300
+# Cached "no such active shop" marker (None means not cached)
+NOT_FOUND = 0
+DEFERRED_FIELDS = {
+    'rating_sum', 'rating_count', 'rating_average',
+    'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+}
+CACHED_FIELDS = [f.attname for f in Barbershop._meta.concrete_fields if f.attname not in DEFERRED_FIELDS]
+
+
+def _id_key(barbershop_id):
+    return f"tenant:id:{barbershop_id}"
+
+
+def _name_key(name):
+    return "tenant:name:" + '-'.join(name.lower().split())
+
+
+def _build(values):
+    return Barbershop.from_db('default', CACHED_FIELDS, [values[f] for f in CACHED_FIELDS])
+
+
+def get_active_barbershop(barbershop_id):
+    """Active, non-deleted Barbershop by id, or None."""
+    key = _id_key(barbershop_id)
+    values = tiered_cache.get(key)
+    if values is None:
+        row = Barbershop.objects.filter(id=barbershop_id, is_active=True).values(*CACHED_FIELDS).first()
+        values = row or NOT_FOUND
+        tiered_cache.set(key, values, TENANT_TTL)
+    return _build(values) if values else None
+
+
+def get_barbershop_by_name(name):
+    """Active Barbershop whose name matches case-insensitively (subdomain routing), or None."""
+    key = _name_key(name)
+    barbershop_id = tiered_cache.get(key)
+    if barbershop_id is None:
+        barbershop_id = Barbershop.objects.filter(
+            name__iexact=name, is_active=True,
+        ).values_list('id', flat=True).first() or NOT_FOUND
+        tiered_cache.set(key, barbershop_id, TENANT_TTL)
+    if not barbershop_id:
+        return None
+    barbershop = get_active_barbershop(barbershop_id)
+    # A rename invalidates the new name's key only; verify instead of tracking old names
+    if barbershop is None or barbershop.name.strip().lower() != name.strip().lower():
+        tiered_cache.delete(key)
+        return None
+    return barbershop
+
+
+def invalidate(barbershop):
+    tiered_cache.delete(_id_key(barbershop.pk))
+    if barbershop.name:
+        tiered_cache.delete(_name_key(barbershop.name))
@@ -10,9 +10,11 @@ urlpatterns = [
     path('invite/accept/', views.accept_invite),
     path('public/', views.public_list),
     path('nearby/', views.nearby),
+    path('autocomplete/', views.autocomplete),
     path('<int:pk>/public/', views.public_detail),
     path('<int:pk>/reviews/', views.barbershop_reviews_list),
     path('<int:pk>/rating-summary/', views.barbershop_rating_summary),
+    path('<int:pk>/popular-times/', views.barbershop_popular_times),
     path('<int:pk>/staff/', views.BarbershopStaffListView.as_view()),
     path('staff/<int:pk>/', views.BarbershopStaffDetailView.as_view()),
     path('<int:pk>/', views.BarbershopDetailView.as_view()),
@@ -3,6 +3,9 @@ import logging
 import uuid
 from datetime import timedelta
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.db import transaction
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -11,16 +14,24 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
 
-from .models import Barbershop, BarbershopStaff, StaffInvitation, Review
+from .models import Barbershop, BarbershopStaff, StaffInvitation, PopularTimes
 from .serializers import (
     BarbershopRegistrationSerializer,
     BarbershopListSerializer,
     StaffInvitationSerializer,
     BarbershopStaffSerializer,
-    ReviewSerializer,
     ReviewCreateSerializer,
+    review_is_editable,
 )
 from .permissions import IsBarbershopAdmin, IsBarbershopOwner
+from . import autocomplete as prefix_index
+from .hours import parse_open_filter, filter_open
+from . import ranking
+from . import public_profile
+from .geocoding import mark_manual, queue_shop_geocode
+from . import review_feed
+from .pagination import KeysetPagination, InvalidCursor
+from .popular_times import histogram_by_day
 
 logger = logging.getLogger(__name__)
 
@@ -50,20 +61,13 @@ def barbershop_register(request):
             {'success': False, 'message': 'Validation failed', 'errors': serializer.errors},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    barbershop = serializer.save()
-    # Geocode address if lat/lng not provided
-    if barbershop.latitude is None and barbershop.longitude is None and barbershop.address and barbershop.city:
-        try:
-            from .geocoding import GeocodingService
-            coords = GeocodingService.address_to_coords(
-                barbershop.address, barbershop.city, barbershop.country or ''
-            )
-            if coords:
-                barbershop.latitude = coords['lat']
-                barbershop.longitude = coords['lng']
-                barbershop.save(update_fields=['latitude', 'longitude'])
-        except Exception as e:
-            logger.warning('Geocoding failed for barbershop %s: %s', barbershop.id, e)
+    with transaction.atomic():  # The hours rows (barbershops.signals.sync_hours) commit with the shop
+        barbershop = serializer.save()
+    # Coordinates: owner-supplied, else approximate now (gazetteer) and exact later (geocoding queue)
+    if barbershop.latitude is not None and barbershop.longitude is not None:
+        mark_manual(barbershop)
+    else:
+        queue_shop_geocode(barbershop)
     # Optional logo upload
     if HAS_CLOUDINARY and request.FILES.get('logo'):
         from django.conf import settings
@@ -190,7 +194,14 @@ class BarbershopDetailView(APIView):
                 {'success': False, 'errors': serializer.errors},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        serializer.save()
+        old_location = (barbershop.address, barbershop.city, barbershop.country)
+        with transaction.atomic():  # The hours rows (barbershops.signals.sync_hours) commit with the shop
+            serializer.save()
+        new_location = (barbershop.address, barbershop.city, barbershop.country)
+        if 'latitude' in serializer.validated_data or 'longitude' in serializer.validated_data:
+            mark_manual(barbershop)
+        elif new_location != old_location:
+            queue_shop_geocode(barbershop, location_changed=new_location[1:] != old_location[1:])
         out = BarbershopListSerializer(barbershop, context={'request': request})
         return Response({'success': True, 'barbershop': out.data})
 
@@ -317,6 +328,8 @@ def _shop_public_item(b, distance_km=None):
         'country': b.country,
         'logo_url': b.logo_url,
         'address': b.address,
+        'average_rating': b.average_rating,
+        'total_reviews': b.total_reviews,
     }
     if getattr(b, 'latitude', None) is not None:
         item['latitude'] = float(b.latitude)
@@ -327,6 +340,32 @@ def _shop_public_item(b, distance_km=None):
     return item
 
 
+def _page_bounds(request, paginator):
+    page_num = request.query_params.get('page', 1)
+    try:
+        page_num = max(1, int(page_num))
+    except (TypeError, ValueError):
+        page_num = 1
+    page_size = paginator.get_page_size(request)
+    start = (page_num - 1) * page_size
+    return page_num, start, start + page_size
+
+
+def _ranked_response(request, qs, lat=None, lng=None, radius_km=None):
+    """sort=recommended: score all candidates (ranking.rank), then load only the page's shops."""
+    ranked = ranking.rank(qs, lat, lng, radius_km)
+    page_num, start, end = _page_bounds(request, PublicBarbershopPagination())
+    page = ranked[start:end]
+    shops = Barbershop.objects.in_bulk([shop_id for shop_id, _, _ in page])
+    data = [_shop_public_item(shops[shop_id], d) for shop_id, _, d in page if shop_id in shops]
+    return Response({
+        'results': data,
+        'count': len(ranked),
+        'next': end < len(ranked),
+        'previous': page_num > 1,
+    })
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_list(request):
@@ -334,12 +373,20 @@ def public_list(request):
     GET /api/barbershops/public/
     List verified & active barbershops. Pagination, search by name/city.
     Optional: lat, lng -> order by distance and include distance_km.
+    Optional: sort=rating -> order by stored average rating, then review count.
+    Optional: sort=recommended -> composite score (distance when lat/lng given, rating, volume, free slot today).
+    Optional: open_now=true, or open_day=saturday [&open_time=HH:MM | &open_after=HH:MM].
     """
+    try:
+        open_spec = parse_open_filter(request.query_params)
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     qs = Barbershop.objects.filter(
         is_active=True,
         is_verified=True,
         subscription_status__in=['active', 'trial'],
     )
+    qs = filter_open(qs, open_spec)
     search = (request.query_params.get('search') or request.query_params.get('q') or '').strip()
     if search:
         qs = qs.filter(
@@ -347,6 +394,12 @@ def public_list(request):
         )
     lat = request.query_params.get('lat')
     lng = request.query_params.get('lng')
+    if request.query_params.get('sort') == 'recommended':
+        try:
+            lat_f, lng_f = float(lat), float(lng)
+        except (TypeError, ValueError):
+            lat_f = lng_f = None
+        return _ranked_response(request, qs, lat_f, lng_f)
     if lat is not None and lng is not None:
         try:
             lat_f, lng_f = float(lat), float(lng)
@@ -354,15 +407,7 @@ def public_list(request):
             shops_with_distance = [(b, b.distance_from_km(lat_f, lng_f)) for b in qs_geo]
             shops_with_distance.sort(key=lambda x: (x[1] or float('inf'), x[0].id))
             ordered_shops = [b for b, _ in shops_with_distance]
-            paginator = PublicBarbershopPagination()
-            page_num = request.query_params.get('page', 1)
-            try:
-                page_num = max(1, int(page_num))
-            except (TypeError, ValueError):
-                page_num = 1
-            page_size = paginator.get_page_size(request)
-            start = (page_num - 1) * page_size
-            end = start + page_size
+            page_num, start, end = _page_bounds(request, PublicBarbershopPagination())
             page = ordered_shops[start:end]
             data = [_shop_public_item(b, b.distance_from_km(lat_f, lng_f)) for b in page]
             return Response({
@@ -373,7 +418,10 @@ def public_list(request):
             })
         except (TypeError, ValueError):
             pass
-    qs = qs.order_by('name')
+    if request.query_params.get('sort') == 'rating':
+        qs = qs.order_by('-rating_average', '-rating_count', 'name')
+    else:
+        qs = qs.order_by('name')
     paginator = PublicBarbershopPagination()
     page = paginator.paginate_queryset(qs, request)
     if page is not None:
@@ -383,12 +431,33 @@ def public_list(request):
     return Response({'results': data})
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def autocomplete(request):
+    """
+    GET /api/barbershops/autocomplete/?q=fa&limit=8
+    Type-ahead prefix matches over shop names, cities and service names.
+    Served from the prefix index (see autocomplete.py); no per-keystroke search query.
+    """
+    q = (request.query_params.get('q') or '').strip()
+    try:
+        limit = int(request.query_params.get('limit', 8))
+    except (TypeError, ValueError):
+        limit = 8
+    results = prefix_index.search(q, limit) if q else []
+    response = Response({'results': results})
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def nearby(request):
     """
     GET /api/barbershops/nearby/?lat=...&lng=...&radius=5
     Barbershops within radius_km (default 5) of (lat, lng). Ordered by distance (Haversine).
+    Accepts the same open_now / open_day / open_time / open_after filters as public_list.
+    sort=recommended -> composite score instead of raw distance, paginated (page, page_size).
     """
     lat = request.query_params.get('lat')
     lng = request.query_params.get('lng')
@@ -408,6 +477,10 @@ def nearby(request):
             radius_km = max(1, min(50, int(r)))
         except (TypeError, ValueError):
             pass
+    try:
+        open_spec = parse_open_filter(request.query_params)
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     qs = Barbershop.objects.filter(
         is_active=True,
         is_verified=True,
@@ -415,6 +488,10 @@ def nearby(request):
         latitude__isnull=False,
         longitude__isnull=False,
     )
+    qs = filter_open(qs, open_spec)
+    if request.query_params.get('sort') == 'recommended':
+        return _ranked_response(request, qs, lat_f, lng_f, radius_km)
+    qs = ranking.within_bounding_box(qs, lat_f, lng_f, radius_km)
     shops_with_distance = [(b, b.distance_from_km(lat_f, lng_f)) for b in qs]
     shops_with_distance = [(b, d) for b, d in shops_with_distance if d is not None and d <= radius_km]
     shops_with_distance.sort(key=lambda x: (x[1], x[0].id))
@@ -428,54 +505,20 @@ def public_detail(request, pk):
     """
     GET /api/barbershops/<id>/public/
     Public profile: name, address, opening_hours, services (active), staff (barbers), logo.
+    Served from the versioned profile cache (public_profile.py) with a strong ETag and
+    Last-Modified; If-None-Match / If-Modified-Since get a 304.
     """
-    barbershop = Barbershop.objects.filter(
-        pk=pk,
-        is_active=True,
-        is_verified=True,
-        subscription_status__in=['active', 'trial'],
-    ).first()
-    if not barbershop:
+    entry = public_profile.get_public_profile(pk)
+    if entry is None:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
-    try:
-        from services.models import Service
-    except ImportError:
-        Service = None
-    services = []
-    if Service:
-        services = list(
-            Service.objects.filter(barbershop=barbershop, is_active=True).values(
-                'id', 'name', 'description', 'price', 'duration', 'category', 'image_url'
-            )
-        )
-        for s in services:
-            s['price'] = float(s['price'])
-    staff = list(
-        BarbershopStaff.objects.filter(barbershop=barbershop, is_active=True)
-        .select_related('user')
-        .values('id', 'role', 'user_id', 'user__name', 'user__email')
+    not_modified = get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'],
     )
-    staff_list = [{'id': s['id'], 'role': s['role'], 'name': s['user__name'], 'email': s['user__email']} for s in staff]
-    payload = {
-        'id': barbershop.id,
-        'name': barbershop.name,
-        'slug': barbershop.slug,
-        'address': barbershop.address,
-        'city': barbershop.city,
-        'country': barbershop.country,
-        'phone': barbershop.phone,
-        'email': barbershop.email,
-        'opening_hours': barbershop.opening_hours,
-        'logo_url': barbershop.logo_url,
-        'services': services,
-        'staff': staff_list,
-        'average_rating': barbershop.average_rating,
-        'total_reviews': barbershop.total_reviews,
-    }
-    if barbershop.latitude is not None and barbershop.longitude is not None:
-        payload['latitude'] = float(barbershop.latitude)
-        payload['longitude'] = float(barbershop.longitude)
-    return Response(payload)
+    response = not_modified or Response(entry['payload'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    patch_cache_control(response, public=True, max_age=60)
+    return response
 
 
 # ---- Staff management (owner only for list/update/remove) ----
@@ -540,42 +583,57 @@ class BarbershopStaffDetailView(APIView):
 
 
 # ---- Reviews (public list + rating summary; create/update/delete under /api/reviews/) ----
-class ReviewPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def barbershop_reviews_list(request, pk):
     """
     GET /api/barbershops/<id>/reviews/
-    Public list of approved reviews (paginated). Query: verified=true for verified only; sort=newest|highest|lowest.
+    Public list of approved reviews. Query: verified=true for verified only; sort=newest|highest|lowest;
+    page_size (max 100); cursor=<next_cursor from the previous page>. Keyset-paginated (no COUNT / OFFSET);
+    the first page comes from the per-shop feed cache (review_feed.py).
     """
-    barbershop = Barbershop.objects.filter(
-        pk=pk, is_active=True, is_verified=True,
-        subscription_status__in=['active', 'trial'],
-    ).first()
-    if not barbershop:
+    if not Barbershop.objects.discoverable().filter(pk=pk).exists():
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
-    qs = Review.objects.filter(barbershop=barbershop, is_approved=True).select_related('customer', 'barber')
-    if request.query_params.get('verified') == 'true':
-        qs = qs.filter(is_verified=True)
     sort = request.query_params.get('sort', 'newest')
-    if sort == 'highest':
-        qs = qs.order_by('-rating', '-created_at')
-    elif sort == 'lowest':
-        qs = qs.order_by('rating', '-created_at')
+    verified_only = request.query_params.get('verified') == 'true'
+    page_size = KeysetPagination.get_page_size(request)
+    try:
+        rows, next_cursor = review_feed.get_page(
+            pk, sort, verified_only, request.query_params.get('cursor'), page_size,
+        )
+    except InvalidCursor as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    results = []
+    for row in rows:
+        item = dict(row['review'])
+        item['is_editable'] = review_is_editable(request, row['customer_id'], row['created_at'])
+        results.append(item)
+    return Response({'results': results, 'next_cursor': next_cursor, 'has_more': next_cursor is not None})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def barbershop_popular_times(request, pk):
+    """
+    GET /api/barbershops/<id>/popular-times/
+    Usual busyness per weekday and hour (0-100), precomputed nightly from bookings (popular_times.py).
+    available=false when the shop has too little booking history.
+    """
+    if not Barbershop.objects.discoverable().filter(pk=pk).exists():
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    row = PopularTimes.objects.filter(barbershop_id=pk).first()
+    if row is None:
+        response = Response({'available': False, 'histogram': None})
     else:
-        qs = qs.order_by('-created_at')
-    paginator = ReviewPagination()
-    page = paginator.paginate_queryset(qs, request)
-    if page is not None:
-        serializer = ReviewSerializer(page, many=True, context={'request': request})
-        return paginator.get_paginated_response({'results': serializer.data})
-    serializer = ReviewSerializer(qs[:20], many=True, context={'request': request})
-    return Response({'results': serializer.data})
+        response = Response({
+            'available': True,
+            'histogram': histogram_by_day(row),
+            'sample_size': row.sample_size,
+            'window_days': row.window_days,
+            'computed_at': row.computed_at,
+        })
+    patch_cache_control(response, public=True, max_age=3600)
+    return response
 
 
 @api_view(['GET'])
@@ -0,0 +1,21 @@
+# Indexes for the dashboard rollup job
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_review_model'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['updated_at'], name='booking_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['barbershop', 'booking_time'], name='booking_shop_time_idx'),
+        ),
+    ]
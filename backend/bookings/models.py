@@ -109,6 +109,9 @@ class Booking(models.Model):
             models.Index(fields=['booking_time']),
             models.Index(fields=['payment_status']),
             models.Index(fields=['booking_status']),
+            # Dashboard rollups (analytics.rollups): changed rows, and a shop's bookings by day
+            models.Index(fields=['updated_at'], name='booking_updated_idx'),
+            models.Index(fields=['barbershop', 'booking_time'], name='booking_shop_time_idx'),
         ]
     
     def __str__(self):
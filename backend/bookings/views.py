@@ -13,6 +13,7 @@ from services.models import Service
 from accounts.models import User
 from accounts.permissions import IsAdminUser
 from notifications.models import Notification
+from barbershops.streaming import serialize_queryset, stream_json
 from barbershops.utils import filter_by_barbershop, get_barbershop_from_request
 import re
 
@@ -234,14 +235,13 @@ class BookingViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_bookings(self, request):
-        """Get current user's bookings (customer/barber own, filtered by barbershop)."""
+        """Get current user's bookings (customer/barber own, filtered by barbershop); streamed."""
         queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
+        return stream_json({
             'success': True,
-            'bookings': serializer.data,
+            'bookings': serialize_queryset(queryset, self.get_serializer_class(), self.get_serializer_context()),
             'total': queryset.count()
-        })
+        }, 'bookings')
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
     def get_all(self, request):
@@ -58,6 +58,8 @@ INSTALLED_APPS = [
     'bookings',
     'payments',
     'notifications',
+    'exports',
+    'analytics',
 ]
 
 MIDDLEWARE = [
@@ -151,6 +153,19 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Pre-rendered public shop profiles (barbershops/snapshots.py): <root>/shops/<id>.json, rewritten
+# on change. Serve the directory from the web server / CDN origin at PUBLIC_SNAPSHOT_URL; WhiteNoise
+# indexes files once at startup, so it cannot serve files that are rewritten while running.
+PUBLIC_SNAPSHOTS_ENABLED = os.getenv('PUBLIC_SNAPSHOTS_ENABLED', 'false').lower() == 'true'
+PUBLIC_SNAPSHOT_ROOT = Path(os.getenv('PUBLIC_SNAPSHOT_ROOT') or BASE_DIR / 'snapshots')
+PUBLIC_SNAPSHOT_URL = os.getenv('PUBLIC_SNAPSHOT_URL', '/snapshots/')
+
+# CSV/XLSX export files (exports app): a private directory downloaded through the API, or the
+# default (media) storage when workers and web share no disk. Files are deleted after retention.
+EXPORTS_ROOT = Path(os.getenv('EXPORTS_ROOT') or BASE_DIR / 'exports_data')
+EXPORTS_USE_MEDIA_STORAGE = os.getenv('EXPORTS_USE_MEDIA_STORAGE', 'false').lower() == 'true'
+EXPORTS_RETENTION_DAYS = int(os.getenv('EXPORTS_RETENTION_DAYS', '7'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -256,10 +271,28 @@ CHAPA_PUBLIC_KEY = os.getenv('CHAPA_PUBLIC_KEY', '')
 CHAPA_WEBHOOK_SECRET = os.getenv('CHAPA_WEBHOOK_SECRET', '')
 CHAPA_WEBHOOK_URL = os.getenv('CHAPA_WEBHOOK_URL', '')
 CHAPA_ENCRYPTION_KEY = os.getenv('CHAPA_ENCRYPTION_KEY', '') or os.getenv('CHAPA_ENCRIPTION_KEY', '')
+# Minutes an online-payment order holds its stock before the sweeper returns it
+STOCK_RESERVATION_TTL_MINUTES = int(os.getenv('STOCK_RESERVATION_TTL_MINUTES', '30'))
 
 # Google OAuth (for "Continue with Google" – use same client ID as Expo EXPO_PUBLIC_GOOGLE_WEB_CLIENT_ID)
 GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID', '')
 
+# Geocoding (OpenStreetMap Nominatim): policy requires an identifying User-Agent, ideally with contact info
+GEOCODING_USER_AGENT = os.getenv('GEOCODING_USER_AGENT', 'BSBS-App/1.0')
+
+# Discovery ranking (sort=recommended on public_list / nearby). Score = weighted sum of
+# distance decay, Bayesian-smoothed rating, review volume and "free slot today"; see barbershops/ranking.py.
+DISCOVERY_RANKING = {
+    'distance_weight': 0.35,
+    'rating_weight': 0.35,
+    'volume_weight': 0.1,
+    'availability_weight': 0.2,
+    'distance_scale_km': 3.0,  # Distance at which the distance score falls to 1/e
+    'rating_prior_mean': 3.5,  # Bayesian prior: shops with few reviews are pulled toward this
+    'rating_prior_weight': 5,  # ...as if they had this many extra reviews at the prior mean
+    'volume_saturation': 200,  # Review count that earns the full volume score
+}
+
 # API Documentation (Swagger/OpenAPI)
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Barbershop Management System API',
@@ -305,6 +338,14 @@ if not _use_redis:
     }
     SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 
+# In-process L1 in front of the cache above (services.tiered_cache). BUS: how workers tell each
+# other to drop L1 entries - 'auto' picks Redis pub/sub, else Postgres LISTEN/NOTIFY.
+TIERED_CACHE = {
+    'L1_MAX_ENTRIES': int(os.getenv('TIERED_CACHE_L1_MAX_ENTRIES', '2048')),
+    'L1_TTL': int(os.getenv('TIERED_CACHE_L1_TTL', '30')),
+    'BUS': os.getenv('TIERED_CACHE_BUS', 'auto'),
+}
+
 # Logging: console always; file only when LOG_TO_FILE=true (e.g. local dev). On Render, use console only.
 _log_to_file = os.getenv('LOG_TO_FILE', 'false').lower() == 'true'
 _handlers_root = ['console']
@@ -375,4 +416,40 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'notifications.tasks.send_booking_reminders_task',
         'schedule': 300.0,  # Every 5 minutes
     },
+    'reconcile-shop-ratings': {
+        'task': 'barbershops.tasks.reconcile_shop_ratings_task',
+        'schedule': 21600.0,  # Every 6 hours
+    },
+    'geocode-pending-shops': {
+        'task': 'barbershops.tasks.geocode_pending_shops_task',
+        'schedule': 60.0,  # Every minute (at most ~30 Nominatim requests per run)
+    },
+    'compute-popular-times': {
+        'task': 'barbershops.tasks.compute_popular_times_task',
+        'schedule': 86400.0,  # Daily
+    },
+    'consolidate-stock-shards': {
+        'task': 'services.tasks.consolidate_stock_shards_task',
+        'schedule': 60.0,  # Every minute (only products with sharded stock)
+    },
+    'release-expired-reservations': {
+        'task': 'services.tasks.release_expired_reservations_task',
+        'schedule': 60.0,  # Every minute
+    },
+    'process-pending-exports': {
+        'task': 'exports.tasks.process_pending_exports_task',
+        'schedule': 60.0,  # Every minute (jobs not handed to a worker)
+    },
+    'purge-expired-exports': {
+        'task': 'exports.tasks.purge_expired_exports_task',
+        'schedule': 86400.0,  # Daily
+    },
+    'update-analytics-rollups': {
+        'task': 'analytics.tasks.update_rollups_task',
+        'schedule': 300.0,  # Every 5 minutes (rows changed since the watermark)
+    },
+    'rebuild-analytics-rollups': {
+        'task': 'analytics.tasks.rebuild_recent_rollups_task',
+        'schedule': 86400.0,  # Daily (last 35 days)
+    },
 }
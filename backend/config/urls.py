@@ -27,10 +27,13 @@ urlpatterns = [
     path('api/barbers/', include('accounts.urls')),
     path('api/service/', include('services.urls')),
     path('api/product/', include('services.product_urls')),
+    path('api/category/', include('services.category_urls')),
     path('api/booking/', include('bookings.urls')),
     path('api/order/', include('services.order_urls')),
     path('api/payments/', include('payments.standalone_urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/exports/', include('exports.urls')),
+    path('api/analytics/', include('analytics.urls')),
 ]
 
 # Add API documentation routes if drf_spectacular is installed
@@ -51,3 +54,4 @@ except ImportError:
 # Serve static files in development (DEBUG=True) so admin CSS/JS load without Nginx
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    urlpatterns += static(settings.PUBLIC_SNAPSHOT_URL, document_root=settings.PUBLIC_SNAPSHOT_ROOT)
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import ExportJob
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'file_format', 'barbershop', 'requested_by', 'status', 'processed_rows', 'total_rows', 'created_at']
+    list_filter = ['kind', 'file_format', 'status', 'created_at']
+    raw_id_fields = ['barbershop', 'requested_by']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
@@ -0,0 +1,130 @@
+"""
+What each export kind contains: a filtered queryset and its columns.
+
+Rows are read with values_list() over the joined columns, so an export is one server-side
+cursor with no model instances and no per-row queries.
+"""
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def _orders(barbershop_id):
+    from services.models import Order
+    return Order.objects.filter(barbershop_id=barbershop_id).annotate(item_count=Count('order_items'))
+
+
+def _bookings(barbershop_id):
+    from bookings.models import Booking
+    return Booking.objects.filter(barbershop_id=barbershop_id)
+
+
+def _payments(barbershop_id):
+    from payments.models import Payment
+    # Payment.barbershop is not always set; fall back to the booking's / order's shop
+    return Payment.objects.filter(
+        Q(barbershop_id=barbershop_id)
+        | Q(booking__barbershop_id=barbershop_id)
+        | Q(order__barbershop_id=barbershop_id)
+    )
+
+
+class Dataset:
+    def __init__(self, queryset, date_field, status_field, columns):
+        self.queryset = queryset
+        self.date_field = date_field
+        self.status_field = status_field
+        # [(header, values_list path)]
+        self.columns = columns
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def rows(self, barbershop_id, filters):
+        """Filtered queryset of value tuples in column order, oldest first."""
+        qs = self.queryset(barbershop_id)
+        if filters.get('status'):
+            qs = qs.filter(**{self.status_field: filters['status']})
+        if filters.get('from'):
+            qs = qs.filter(**{f'{self.date_field}__gte': start_of_day(filters['from'])})
+        if filters.get('to'):
+            qs = qs.filter(**{f'{self.date_field}__lt': start_of_day(filters['to']) + timedelta(days=1)})
+        return qs.order_by(self.date_field, 'id').values_list(*[path for _, path in self.columns])
+
+
+DATASETS = {
+    'orders': Dataset(_orders, 'created_at', 'order_status', [
+        ('Order ID', 'id'),
+        ('Created', 'created_at'),
+        ('Customer', 'user__name'),
+        ('Customer email', 'user__email'),
+        ('Status', 'order_status'),
+        ('Payment method', 'payment_method'),
+        ('Payment status', 'payment_info_status'),
+        ('Paid at', 'paid_at'),
+        ('Items', 'item_count'),
+        ('Item price', 'item_price'),
+        ('Tax', 'tax'),
+        ('Shipping', 'shipping_charges'),
+        ('Total', 'total_amount'),
+        ('City', 'shipping_city'),
+        ('Country', 'shipping_country'),
+        ('Delivered at', 'delivered_at'),
+    ]),
+    'bookings': Dataset(_bookings, 'booking_time', 'booking_status', [
+        ('Booking ID', 'id'),
+        ('Booked at', 'booking_time'),
+        ('Slot start', 'slot__start_time'),
+        ('Slot end', 'slot__end_time'),
+        ('Customer', 'customer__name'),
+        ('Customer email', 'customer__email'),
+        ('Barber', 'barber__name'),
+        ('Service', 'service__name'),
+        ('Price', 'service__price'),
+        ('Status', 'booking_status'),
+        ('Payment status', 'payment_status'),
+    ]),
+    'payments': Dataset(_payments, 'created_at', 'status', [
+        ('Payment ID', 'id'),
+        ('Created', 'created_at'),
+        ('Completed', 'completed_at'),
+        ('Customer', 'user__name'),
+        ('Customer email', 'user__email'),
+        ('Type', 'payment_type'),
+        ('Booking ID', 'booking_id'),
+        ('Order ID', 'order_id'),
+        ('Amount', 'amount'),
+        ('Currency', 'currency'),
+        ('Method', 'payment_method'),
+        ('Status', 'status'),
+        ('Transaction', 'chapa_transaction_id'),
+    ]),
+}
+
+
+def start_of_day(value):
+    """Aware midnight (current time zone) of a YYYY-MM-DD string."""
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+    except (TypeError, ValueError) as e:
+        raise InvalidFilter('from and to must be dates (YYYY-MM-DD)') from e
+
+
+def clean_filters(kind, data):
+    """Validated filters dict for kind from request data; raises InvalidFilter."""
+    filters = {}
+    for name in ('from', 'to'):
+        if data.get(name):
+            start_of_day(data[name])
+            filters[name] = data[name]
+    if data.get('status'):
+        filters['status'] = str(data['status'])
+    if filters.get('from') and filters.get('to') and filters['from'] > filters['to']:
+        raise InvalidFilter('from must not be after to')
+    return filters
@@ -0,0 +1,151 @@
+"""
+Export job lifecycle: queue, run, expire.
+
+create_export() records a queued job and hands it to a Celery worker after commit; without a
+broker (or if queuing fails) the every-minute Beat job / `manage.py run_exports` picks it
+up, so the web request never does the work. run_export() streams the dataset through a
+server-side cursor into a temporary file, CHUNK_SIZE rows at a time, recording progress
+every chunk, then moves the file into export storage.
+"""
+import logging
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .datasets import DATASETS
+from .models import ExportJob
+from .writers import WRITERS
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+# A running job not finished after this long is presumed dead (worker killed mid-export)
+STALE_AFTER = timedelta(hours=2)
+
+
+def retention():
+    return timedelta(days=getattr(settings, 'EXPORTS_RETENTION_DAYS', 7))
+
+
+def create_export(user, barbershop_id, kind, file_format, filters):
+    job = ExportJob.objects.create(
+        barbershop_id=barbershop_id,
+        requested_by=user,
+        kind=kind,
+        file_format=file_format,
+        filters=filters,
+    )
+    _dispatch(job.id)
+    return job
+
+
+def _dispatch(job_id):
+    from .tasks import run_export_task
+
+    if run_export_task is None or not getattr(settings, 'CELERY_BROKER_URL', ''):
+        return
+
+    def send():
+        try:
+            run_export_task.delay(job_id)
+        except Exception as e:
+            logger.warning('Export job %s not queued (left for run_exports): %s', job_id, e)
+
+    transaction.on_commit(send)
+
+
+def _claim(job_id):
+    """Move a queued job to running; None if another worker already took it."""
+    now = timezone.now()
+    if not ExportJob.objects.filter(pk=job_id, status='queued').update(status='running', started_at=now):
+        return None
+    return ExportJob.objects.get(pk=job_id)
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_export(job_id):
+    """Produce one queued job's file. Returns the final status, or None if not claimable."""
+    job = _claim(job_id)
+    if job is None:
+        return None
+    dataset = DATASETS[job.kind]
+    writer_class = WRITERS[job.file_format]
+    fd, tmp = tempfile.mkstemp(suffix=f'.{writer_class.extension}')
+    os.close(fd)
+    try:
+        rows = dataset.rows(job.barbershop_id, job.filters)
+        total = rows.count()
+        ExportJob.objects.filter(pk=job.id).update(total_rows=total)
+        writer = writer_class(tmp, dataset.headers)
+        processed = 0
+        try:
+            for chunk in _chunks(rows.iterator(chunk_size=CHUNK_SIZE), CHUNK_SIZE):
+                writer.write_rows(chunk)
+                processed += len(chunk)
+                ExportJob.objects.filter(pk=job.id).update(processed_rows=processed)
+        finally:
+            writer.close()
+        stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+        with open(tmp, 'rb') as f:
+            job.file.save(f'{job.kind}-{job.id}-{stamp}.{writer_class.extension}', File(f), save=False)
+        ExportJob.objects.filter(pk=job.id).update(
+            status='completed', file=job.file.name, file_size=os.path.getsize(tmp),
+            processed_rows=processed, finished_at=timezone.now(),
+        )
+        return 'completed'
+    except Exception as e:
+        logger.exception('Export job %s failed', job.id)
+        ExportJob.objects.filter(pk=job.id).update(status='failed', error=str(e)[:1000], finished_at=timezone.now())
+        return 'failed'
+    finally:
+        os.unlink(tmp)
+
+
+def process_pending_exports(limit=10):
+    """
+    Run queued jobs (oldest first) and fail jobs stuck in 'running'. Returns
+    {'completed': n, 'failed': n, 'stale': n}.
+    """
+    counts = {'completed': 0, 'failed': 0, 'stale': 0}
+    counts['stale'] = ExportJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - STALE_AFTER,
+    ).update(status='failed', error='Export did not finish', finished_at=timezone.now())
+    job_ids = ExportJob.objects.filter(status='queued').order_by('created_at').values_list('id', flat=True)[:limit]
+    for job_id in list(job_ids):
+        result = run_export(job_id)
+        if result:
+            counts[result] += 1
+    return counts
+
+
+def purge_expired_exports():
+    """Delete files of jobs finished more than EXPORTS_RETENTION_DAYS ago. Returns the number expired."""
+    expired = ExportJob.objects.filter(
+        status__in=['completed', 'failed'], finished_at__lt=timezone.now() - retention(),
+    )
+    n = 0
+    for job in expired.iterator():
+        if job.file:
+            try:
+                job.file.delete(save=False)
+            except Exception as e:
+                logger.warning('Could not delete export file %s: %s', job.file.name, e)
+                continue
+        ExportJob.objects.filter(pk=job.pk).update(status='expired', file='')
+        n += 1
+    return n
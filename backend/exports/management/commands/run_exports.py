@@ -0,0 +1,25 @@
+"""
+Run queued export jobs (when no Celery worker is processing them) and, with --purge, delete
+export files past EXPORTS_RETENTION_DAYS.
+"""
+from django.core.management.base import BaseCommand
+
+from exports.jobs import process_pending_exports, purge_expired_exports
+
+
+class Command(BaseCommand):
+    help = "Process queued CSV/XLSX export jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help='Maximum jobs to run in this pass.')
+        parser.add_argument('--purge', action='store_true', help='Also delete expired export files.')
+
+    def handle(self, *args, **options):
+        counts = process_pending_exports(limit=max(1, options['limit']))
+        self.stdout.write(self.style.SUCCESS(
+            f"run_exports: {counts['completed']} completed, {counts['failed']} failed, "
+            f"{counts['stale']} stale marked failed."
+        ))
+        if options['purge']:
+            n = purge_expired_exports()
+            self.stdout.write(f"run_exports: {n} expired export(s) removed.")
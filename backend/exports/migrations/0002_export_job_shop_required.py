@@ -0,0 +1,28 @@
+# Every export belongs to a shop: drop platform-wide jobs, then make barbershop required
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def delete_platform_exports(apps, schema_editor):
+    ExportJob = apps.get_model('exports', 'ExportJob')
+    for job in ExportJob.objects.filter(barbershop__isnull=True).exclude(file='').iterator():
+        job.file.delete(save=False)
+    ExportJob.objects.filter(barbershop__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barbershops', '0011_popular_times'),
+        ('exports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_platform_exports, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='barbershop',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='barbershops.barbershop'),
+        ),
+    ]
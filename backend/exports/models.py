@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.db import models
+
+from .storage import export_storage
+
+
+class ExportJob(models.Model):
+    """One asynchronous CSV/XLSX export of a shop's orders, bookings or payments."""
+    KIND_CHOICES = [
+        ('orders', 'Orders'),
+        ('bookings', 'Bookings'),
+        ('payments', 'Payments'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+
+    barbershop = models.ForeignKey(
+        'barbershops.Barbershop',
+        on_delete=models.CASCADE,
+        related_name='export_jobs'
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='export_jobs'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    # {'status': ..., 'from': 'YYYY-MM-DD', 'to': 'YYYY-MM-DD'}; see exports.datasets
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='exports/%Y/%m/', storage=export_storage, blank=True, max_length=255)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'export_jobs'
+        indexes = [
+            models.Index(fields=['requested_by', 'created_at'], name='export_job_user_idx'),
+            models.Index(fields=['status', 'created_at'], name='export_job_status_idx'),
+        ]
+
+    @property
+    def progress(self):
+        """Completion percentage (0-100), or None while the row count is unknown."""
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return None if self.total_rows is None else 0
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
+
+    def __str__(self):
+        return f"Export #{self.id} - {self.kind} ({self.file_format}, {self.status})"
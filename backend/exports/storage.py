@@ -0,0 +1,25 @@
+"""
+Where finished export files are kept.
+
+By default a private directory (EXPORTS_ROOT) that is never served directly: files are
+downloaded through the authenticated /api/exports/<id>/download endpoint. Set
+EXPORTS_USE_MEDIA_STORAGE to keep them in the default (media) storage instead, e.g. when
+web and worker containers share no disk.
+"""
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+
+
+def export_storage():
+    if getattr(settings, 'EXPORTS_USE_MEDIA_STORAGE', False):
+        return default_storage
+    return FileSystemStorage(location=settings.EXPORTS_ROOT)
+
+
+def is_local(storage):
+    """True if files can be opened by path (served with FileResponse rather than a redirect)."""
+    try:
+        storage.path('')
+    except NotImplementedError:
+        return False
+    return True
@@ -0,0 +1,52 @@
+"""Celery tasks for export jobs."""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def run_export(job_id):
+    """Produce one export file (queued by exports.jobs.create_export)."""
+    from .jobs import run_export as run
+    return run(job_id)
+
+
+def process_pending_exports():
+    """
+    Run queued exports that were never handed to a worker and fail stale ones. Run via Celery Beat.
+    If Celery is not installed, run `python manage.py run_exports` from cron instead.
+    """
+    from .jobs import process_pending_exports as process
+    return process()
+
+
+def purge_expired_exports():
+    """
+    Delete export files past EXPORTS_RETENTION_DAYS. Run daily via Celery Beat.
+    If Celery is not installed, run `python manage.py run_exports --purge` from cron instead.
+    """
+    from .jobs import purge_expired_exports as purge
+    return purge()
+
+
+# Celery shared_task (optional - only if celery is installed)
+try:
+    from celery import shared_task
+
+    @shared_task
+    def run_export_task(job_id):
+        """Celery task wrapper for run_export."""
+        return run_export(job_id)
+
+    @shared_task
+    def process_pending_exports_task():
+        """Celery task wrapper for process_pending_exports."""
+        return process_pending_exports()
+
+    @shared_task
+    def purge_expired_exports_task():
+        """Celery task wrapper for purge_expired_exports."""
+        return purge_expired_exports()
+except ImportError:
+    run_export_task = None
+    process_pending_exports_task = None
+    purge_expired_exports_task = None
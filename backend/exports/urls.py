@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import exports, export_detail, export_download
+
+urlpatterns = [
+    path('', exports, name='exports'),
+    path('<int:pk>', export_detail, name='export-detail'),
+    path('<int:pk>/download', export_download, name='export-download'),
+]
@@ -0,0 +1,121 @@
+from django.http import FileResponse, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from barbershops.permissions import IsBarbershopAdmin
+from .datasets import DATASETS, InvalidFilter, clean_filters
+from .jobs import create_export
+from .models import ExportJob
+from .storage import is_local
+from .writers import WRITERS, xlsx_available
+
+RECENT_JOBS = 20
+
+
+def _job_data(request, job):
+    download_url = None
+    if job.status == 'completed' and job.file:
+        download_url = request.build_absolute_uri(reverse('export-download', args=[job.id]))
+    return {
+        '_id': str(job.id),
+        'kind': job.kind,
+        'format': job.file_format,
+        'filters': job.filters,
+        'status': job.status,
+        'totalRows': job.total_rows,
+        'processedRows': job.processed_rows,
+        'progress': job.progress,
+        'fileSize': job.file_size,
+        'error': job.error,
+        'downloadUrl': download_url,
+        'createdAt': job.created_at.isoformat(),
+        'finishedAt': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated, IsBarbershopAdmin])
+def exports(request):
+    """
+    GET: the user's recent export jobs for the current barbershop. POST: queue an export of
+    the shop's orders, bookings
+    or payments; body {kind, format: csv|xlsx, status?, from?, to? (YYYY-MM-DD)}. The file
+    is built in the background: poll GET /api/exports/<id> and follow downloadUrl when completed.
+    """
+    if request.method == 'GET':
+        jobs = ExportJob.objects.filter(
+            requested_by=request.user, barbershop_id=request.barbershop.id,
+        ).order_by('-created_at')[:RECENT_JOBS]
+        return Response({
+            'success': True,
+            'exports': [_job_data(request, job) for job in jobs],
+        })
+
+    kind = request.data.get('kind')
+    file_format = (request.data.get('format') or 'csv').lower()
+    if kind not in DATASETS:
+        return Response({
+            'success': False,
+            'message': f"kind must be one of: {', '.join(DATASETS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if file_format not in WRITERS:
+        return Response({
+            'success': False,
+            'message': f"format must be one of: {', '.join(WRITERS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if file_format == 'xlsx' and not xlsx_available():
+        return Response({
+            'success': False,
+            'message': 'XLSX export is not available on this server; use csv'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        filters = clean_filters(kind, request.data)
+    except InvalidFilter as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    job = create_export(request.user, request.barbershop.id, kind, file_format, filters)
+    return Response({
+        'success': True,
+        'message': 'Export queued',
+        'export': _job_data(request, job),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsBarbershopAdmin])
+def export_detail(request, pk):
+    """Status and progress of one of the user's export jobs."""
+    job = get_object_or_404(ExportJob, pk=pk, requested_by=request.user, barbershop_id=request.barbershop.id)
+    return Response({
+        'success': True,
+        'export': _job_data(request, job),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsBarbershopAdmin])
+def export_download(request, pk):
+    """The finished file (streamed from local storage, or a redirect to media storage)."""
+    job = get_object_or_404(ExportJob, pk=pk, requested_by=request.user, barbershop_id=request.barbershop.id)
+    if job.status != 'completed' or not job.file:
+        return Response({
+            'success': False,
+            'message': 'Export is not ready' if job.status in ('queued', 'running') else f'Export is {job.status}'
+        }, status=status.HTTP_409_CONFLICT if job.status in ('queued', 'running') else status.HTTP_410_GONE)
+    storage = job.file.storage
+    if not is_local(storage):
+        return HttpResponseRedirect(storage.url(job.file.name))
+    filename = f'{job.kind}-{job.created_at:%Y%m%d}.{WRITERS[job.file_format].extension}'
+    return FileResponse(
+        storage.open(job.file.name, 'rb'),
+        as_attachment=True,
+        filename=filename,
+        content_type=WRITERS[job.file_format].content_type,
+    )
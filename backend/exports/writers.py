@@ -0,0 +1,92 @@
+"""
+Row writers for export files. Both append rows as they come, so memory stays constant
+whatever the export size: CSV writes straight to the file, XLSX uses openpyxl's
+write-only mode (rows are streamed to a temporary XML part, not kept as cells).
+"""
+import csv
+import io
+from datetime import date, datetime
+
+from django.utils import timezone
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+# Spreadsheet apps evaluate cells starting with these as formulas (CSV injection)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def xlsx_available():
+    return Workbook is not None
+
+
+def _text(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _local(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.localtime(value)
+    return value
+
+
+class CsvWriter:
+    extension = 'csv'
+    content_type = 'text/csv'
+
+    def __init__(self, path, headers):
+        # utf-8-sig: Excel opens the file as UTF-8 (names in Amharic etc.)
+        self._file = io.open(path, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(headers)
+
+    def write_rows(self, rows):
+        self._writer.writerows([self._cell(v) for v in row] for row in rows)
+
+    @staticmethod
+    def _cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, (datetime, date)):
+            return _local(value).isoformat()
+        return _text(value)
+
+    def close(self):
+        self._file.close()
+
+
+class XlsxWriter:
+    extension = 'xlsx'
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    def __init__(self, path, headers):
+        if Workbook is None:
+            raise RuntimeError('XLSX export requires openpyxl')
+        self._path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet('Export')
+        self._sheet.append(headers)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self._sheet.append([self._cell(v) for v in row])
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, datetime):
+            # Excel has no time zones: write local wall-clock time
+            return _local(value).replace(tzinfo=None)
+        return _text(value)
+
+    def close(self):
+        self._workbook.save(self._path)
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'xlsx': XlsxWriter,
+}
@@ -9,13 +9,18 @@ from .models import Payment, PaymentWebhook
 from .chapa_client import ChapaClient
 from bookings.models import Booking
 from services.models import Order
+from services.inventory import commit_reservations, expire_reservations, reservation_expired
 from accounts.permissions import IsAdminUser
+from barbershops.streaming import CHUNK_SIZE, stream_json
 from notifications.models import Notification
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Chapa transaction statuses that end a checkout without payment (anything else may still be paid)
+CHAPA_FAILED_STATUSES = ('failed', 'cancelled')
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -164,6 +169,11 @@ def order_payment(request):
         order = None
         if order_id:
             order = get_object_or_404(Order, pk=order_id, user=request.user)
+            if reservation_expired(order):
+                return Response({
+                    'success': False,
+                    'message': 'This order has expired and its items were released. Please place the order again.'
+                }, status=status.HTTP_400_BAD_REQUEST)
 
         chapa = ChapaClient()
         tx_ref = chapa.generate_tx_ref(prefix='ORDER')
@@ -234,12 +244,14 @@ def order_payment(request):
 def chapa_webhook(request):
     """Handle Chapa payment webhook."""
     try:
+        # Raw body first: it cannot be read once request.data has consumed the stream
+        raw_body = request.body
         payload = request.data
         signature = request.headers.get('X-Chapa-Signature', '')
         
         # Verify webhook signature
         chapa = ChapaClient()
-        if not chapa.verify_webhook_signature(request.body, signature):
+        if not chapa.verify_webhook_signature(raw_body, signature):
             logger.warning(f"Invalid webhook signature: {signature}")
             return Response({
                 'success': False,
@@ -285,6 +297,8 @@ def chapa_webhook(request):
                     payment.order.payment_info_status = 'completed'
                     payment.order.paid_at = timezone.now()
                     payment.order.save()
+                    if not commit_reservations(payment.order):
+                        logger.error(f"Order #{payment.order.id} paid after its stock hold expired and stock ran out (tx_ref: {tx_ref})")
                     
                     # Create notification
                     Notification.objects.create(
@@ -311,6 +325,9 @@ def chapa_webhook(request):
                 if payment.payment_type == 'booking' and payment.booking:
                     payment.booking.payment_status = 'Online Pending'
                     payment.booking.save()
+                elif payment.payment_type == 'order' and payment.order_id:
+                    # Stock goes back on the next reservation sweep
+                    expire_reservations(payment.order_id)
                 
                 webhook.processed = True
                 webhook.save()
@@ -365,6 +382,14 @@ def verify_payment(request):
                         payment.order.payment_info_status = 'completed'
                         payment.order.paid_at = timezone.now()
                         payment.order.save()
+                        if not commit_reservations(payment.order):
+                            logger.error(f"Order #{payment.order.id} paid after its stock hold expired and stock ran out (tx_ref: {tx_ref})")
+                elif (
+                    payment.payment_type == 'order' and payment.order_id
+                    and str(data.get('status', '')).lower() in CHAPA_FAILED_STATUSES
+                ):
+                    # A pending checkout keeps its hold: the customer may still pay
+                    expire_reservations(payment.order_id)
                 
                 return Response({
                     'success': True,
@@ -400,41 +425,39 @@ def get_all_payments(request):
         payment_status__in=['Online Paid', 'Pending to be paid on cash']
     ).select_related('customer', 'barber', 'service', 'slot')
     
-    payments_data = []
-    for booking in bookings:
-        payments_data.append({
-            '_id': str(booking.id),
-            'customerId': {
-                '_id': str(booking.customer.id),
-                'name': booking.customer.name,
-                'email': booking.customer.email
-            },
-            'barberId': {
-                '_id': str(booking.barber.id),
-                'name': booking.barber.name,
-                'email': booking.barber.email
-            },
-            'serviceId': {
-                '_id': str(booking.service.id),
-                'name': booking.service.name
-            },
-            'slotId': {
-                '_id': str(booking.slot.id),
-                'startTime': booking.slot.start_time.isoformat(),
-                'endTime': booking.slot.end_time.isoformat()
-            },
-            'paymentStatus': booking.payment_status,
-            'bookingTime': booking.booking_time.isoformat(),
-            'amount': float(booking.service.price)
-        })
-    
-    if not payments_data:
+    if not bookings.exists():
         return Response({
             'success': False,
             'message': 'No payments found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    return Response({
+    payments_data = ({
+        '_id': str(booking.id),
+        'customerId': {
+            '_id': str(booking.customer.id),
+            'name': booking.customer.name,
+            'email': booking.customer.email
+        },
+        'barberId': {
+            '_id': str(booking.barber.id),
+            'name': booking.barber.name,
+            'email': booking.barber.email
+        },
+        'serviceId': {
+            '_id': str(booking.service.id),
+            'name': booking.service.name
+        },
+        'slotId': {
+            '_id': str(booking.slot.id),
+            'startTime': booking.slot.start_time.isoformat(),
+            'endTime': booking.slot.end_time.isoformat()
+        },
+        'paymentStatus': booking.payment_status,
+        'bookingTime': booking.booking_time.isoformat(),
+        'amount': float(booking.service.price)
+    } for booking in bookings.iterator(chunk_size=CHUNK_SIZE))
+    
+    return stream_json({
         'success': True,
         'payments': payments_data
-    })
+    }, 'payments')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Service, Product, ProductImage, ProductReview, Order, OrderItem, Category
+from .models import Service, Product, ProductImage, ProductReview, Order, OrderItem, Category, StockReservation
 
 
 @admin.register(Service)
@@ -12,7 +12,7 @@ class ServiceAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'barbershop', 'category', 'price', 'stock', 'rating', 'is_active']
+    list_display = ['name', 'barbershop', 'category', 'price', 'stock', 'stock_shards', 'rating', 'is_active']
     list_filter = ['category', 'is_active', 'created_at']
     search_fields = ['name', 'description']
     raw_id_fields = ['barbershop']
@@ -50,3 +50,11 @@ class OrderItemAdmin(admin.ModelAdmin):
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'created_at']
     search_fields = ['name']
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['order', 'product', 'quantity', 'status', 'expires_at', 'created_at']
+    list_filter = ['status', 'expires_at']
+    raw_id_fields = ['order', 'product']
+    readonly_fields = ['created_at', 'updated_at']
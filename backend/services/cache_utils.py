@@ -1,91 +1,286 @@
 """
 Caching utilities for services app.
+
+Invalidation is by namespace version counters: every cache key embeds the current version
+of the namespaces (tags) it depends on, and bumping a version makes all those keys
+unreachable at once. No key scans and no cache.clear().
+
+Expensive entries go through get_or_compute, which protects against stampedes: one worker
+recomputes a missing key while the others wait for it (single flight), expired entries are
+served stale while one worker refreshes, and entries are refreshed early with a probability
+that grows as expiry nears (XFetch), so a hot key rarely expires at all.
 """
 from django.core.cache import cache
+from django.http import HttpResponse
 from functools import wraps
-from typing import Callable, Any
+from typing import Any, Callable, Dict, Iterable, List
+from urllib.parse import urlencode
 import hashlib
-import json
-
-
-def cache_key_generator(*args, **kwargs) -> str:
-    """Generate cache key from function arguments."""
-    key_parts = []
-    
-    # Add args
-    for arg in args:
-        if hasattr(arg, 'id'):
-            key_parts.append(str(arg.id))
-        else:
-            key_parts.append(str(arg))
-    
-    # Add kwargs
-    for k, v in sorted(kwargs.items()):
-        if hasattr(v, 'id'):
-            key_parts.append(f"{k}:{v.id}")
-        else:
-            key_parts.append(f"{k}:{v}")
-    
-    key_string = "_".join(key_parts)
-    return hashlib.md5(key_string.encode()).hexdigest()
-
-
-def cached_view(timeout: int = 300, key_prefix: str = ''):
+import math
+import random
+import threading
+import time
+import uuid
+
+from .tiered_cache import tiered_cache
+
+# Tags may contain "{tenant}", replaced by the request's barbershop id (or ALL_TENANTS)
+TENANT_PLACEHOLDER = '{tenant}'
+ALL_TENANTS = 'all'
+# Expired entries stay readable this long while one worker recomputes them
+STALE_GRACE = 60
+# Recompute lock lifetime: bounds how long a crashed worker can hold a key
+LOCK_TIMEOUT = 30
+# How long a request waits for another worker's recompute before computing itself
+WAIT_TIMEOUT = 5
+POLL_INTERVAL = 0.05
+# XFetch aggressiveness: > 1 refreshes earlier, < 1 later
+EARLY_REFRESH_BETA = 1.0
+STAT_COUNTERS = ('hit', 'miss', 'early_refresh', 'stale_served', 'coalesced', 'wait_timeout')
+STATS_FLUSH_INTERVAL = 10
+# Headers replayed from a cached response (DRF content negotiation sets Vary / Allow)
+CACHED_HEADERS = ('Content-Type', 'Vary', 'Allow', 'Content-Language')
+
+
+def get_cache_version(namespace: str) -> int:
     """
-    Decorator to cache view responses.
-    
-    Args:
-        timeout: Cache timeout in seconds (default: 5 minutes)
-        key_prefix: Prefix for cache key
+    Current version counter for a cache namespace.
+
+    Counters start from a millisecond timestamp rather than 1 so that a counter
+    evicted from the cache never comes back at a value older entries were built with.
+    Read through the in-process tier: bumps are broadcast to every worker.
     """
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Generate cache key
-            request = args[0] if args else None
-            barbershop_id = getattr(request, 'barbershop_id', None) if request else None
-            
-            cache_key = f"{key_prefix}_{func.__name__}"
-            if barbershop_id:
-                cache_key += f"_shop_{barbershop_id}"
-            
-            # Add function arguments to cache key
-            key_suffix = cache_key_generator(*args[1:], **kwargs)
-            cache_key = f"{cache_key}_{key_suffix}"
-            
-            # Try to get from cache
-            cached_response = cache.get(cache_key)
-            if cached_response is not None:
-                return cached_response
-            
-            # Call function and cache result
-            response = func(*args, **kwargs)
-            cache.set(cache_key, response, timeout)
-            
-            return response
-        
-        return wrapper
-    return decorator
+    key = f"cache_version:{namespace}"
+    version = tiered_cache.get(key)
+    if version is None:
+        tiered_cache.add(key, int(time.time() * 1000), timeout=None)
+        version = tiered_cache.get(key) or int(time.time() * 1000)
+    return version
+
+
+def bump_cache_version(namespace: str) -> int:
+    """Invalidate every entry built under namespace by moving its version counter forward."""
+    key = f"cache_version:{namespace}"
+    try:
+        return tiered_cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        tiered_cache.set(key, version, timeout=None)
+        return version
 
 
-def invalidate_cache_pattern(pattern: str):
+def get_cache_versions(namespaces: Iterable[str]) -> List[int]:
+    """Versions for several namespaces with at most one cache round trip when all are present."""
+    namespaces = list(namespaces)
+    found = tiered_cache.get_many([f"cache_version:{ns}" for ns in namespaces])
+    return [found.get(f"cache_version:{ns}") or get_cache_version(ns) for ns in namespaces]
+
+
+def tenant_tags(tag: str, barbershop_id) -> List[str]:
+    """Resolved forms of a "{tenant}" tag affected by a change in one shop: that shop and the unscoped list."""
+    tags = [tag.replace(TENANT_PLACEHOLDER, ALL_TENANTS)]
+    if barbershop_id:
+        tags.append(tag.replace(TENANT_PLACEHOLDER, str(barbershop_id)))
+    return tags
+
+
+def invalidate_tags(*tags: str):
+    """Invalidate every cached response built under any of the given (resolved) tags."""
+    for tag in tags:
+        bump_cache_version(tag)
+
+
+class CacheStats:
+    """
+    Per-process counters, flushed to the shared cache every STATS_FLUSH_INTERVAL seconds
+    so `manage.py cache_stats` sees totals across workers.
     """
-    Invalidate all cache keys matching a pattern.
-    
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._flushed_at = time.monotonic()
+
+    def incr(self, name: str, counter: str):
+        with self._lock:
+            counts = self._pending.setdefault(name, dict.fromkeys(STAT_COUNTERS, 0))
+            counts[counter] += 1
+            due = time.monotonic() - self._flushed_at >= STATS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        names = set(cache.get('cache_stats:names') or ())
+        if not set(pending) <= names:
+            cache.set('cache_stats:names', sorted(names | set(pending)), None)
+        for name, counts in pending.items():
+            for counter, n in counts.items():
+                if not n:
+                    continue
+                key = f"cache_stats:{name}:{counter}"
+                if not cache.add(key, n, None):
+                    try:
+                        cache.incr(key, n)
+                    except ValueError:
+                        cache.set(key, n, None)
+
+    def totals(self) -> Dict[str, Dict[str, int]]:
+        """Shared totals per stat name (call flush() first to include this process)."""
+        names = cache.get('cache_stats:names') or []
+        keys = [f"cache_stats:{name}:{counter}" for name in names for counter in STAT_COUNTERS]
+        found = cache.get_many(keys)
+        return {
+            name: {counter: found.get(f"cache_stats:{name}:{counter}", 0) for counter in STAT_COUNTERS}
+            for name in names
+        }
+
+    def reset(self):
+        with self._lock:
+            self._pending = {}
+        names = cache.get('cache_stats:names') or []
+        cache.delete_many([f"cache_stats:{name}:{counter}" for name in names for counter in STAT_COUNTERS])
+
+
+cache_stats = CacheStats()
+
+
+def _should_refresh_early(computed_in: float, expires_at: float, beta: float) -> bool:
+    # XFetch: refresh when now - delta * beta * ln(U) >= expiry, U uniform in (0, 1]
+    return time.time() - computed_in * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def get_or_compute(key: str, compute: Callable[[], Any], timeout: int, stat: str = 'default',
+                   stale_grace: int = STALE_GRACE, beta: float = EARLY_REFRESH_BETA,
+                   wait: float = WAIT_TIMEOUT) -> Any:
+    """
+    cache.get(key), computing and storing compute() on a miss, with stampede protection.
+
+    Entries are stored as (value, seconds compute took, soft expiry) and kept stale_grace
+    seconds past the soft expiry. A None result is returned but not cached. Counters are
+    recorded under stat (see cache_stats).
+    """
+    lock_key = f"lock:{key}"
+
+    def _store():
+        started = time.time()
+        value = compute()
+        if value is not None:
+            finished = time.time()
+            cache.set(key, (value, finished - started, finished + timeout), timeout + stale_grace)
+        return value
+
+    def _locked_store():
+        token = uuid.uuid4().hex
+        if not cache.add(lock_key, token, LOCK_TIMEOUT):
+            return False, None
+        try:
+            return True, _store()
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, computed_in, expires_at = entry
+        if not _should_refresh_early(computed_in, expires_at, beta):
+            cache_stats.incr(stat, 'hit')
+            return value
+        stale = time.time() >= expires_at
+        computed, fresh = _locked_store()
+        if not computed:
+            # Another worker is already refreshing: keep serving what we have
+            cache_stats.incr(stat, 'stale_served' if stale else 'hit')
+            return value
+        cache_stats.incr(stat, 'miss' if stale else 'early_refresh')
+        return fresh
+
+    computed, value = _locked_store()
+    if computed:
+        cache_stats.incr(stat, 'miss')
+        return value
+    # Single flight: wait for the worker holding the lock, then read its result
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        found = cache.get_many([key, lock_key])
+        if key in found:
+            cache_stats.incr(stat, 'coalesced')
+            return found[key][0]
+        if lock_key not in found:
+            # Holder finished without storing (None result) or died: compute ourselves
+            break
+    else:
+        cache_stats.incr(stat, 'wait_timeout')
+    cache_stats.incr(stat, 'miss')
+    return _store()
+
+
+def _request_tenant(request) -> str:
+    barbershop_id = getattr(request, 'barbershop_id', None)
+    return str(barbershop_id) if barbershop_id else ALL_TENANTS
+
+
+def response_cache_key(request, tags: Iterable[str]) -> str:
+    """Key over method, tenant, path, sorted query string, Accept headers and tag versions."""
+    tags = list(tags)
+    query = urlencode(sorted((k, v) for k, values in request.GET.lists() for v in values))
+    parts = [
+        request.method,
+        _request_tenant(request),
+        request.path,
+        query,
+        request.META.get('HTTP_ACCEPT', ''),
+        request.META.get('HTTP_ACCEPT_LANGUAGE', ''),
+    ]
+    parts += [f"{tag}={version}" for tag, version in zip(tags, get_cache_versions(tags))]
+    return 'response:' + hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def cache_response(timeout: int = 300, tags: Iterable[str] = ()):
+    """
+    Cache a view's rendered 200 responses (bytes + content headers) for GET/HEAD.
+
+    Wrap the callable from as_view() (or a function view) in urls.py. Only use it on
+    responses that do not depend on the user: the key varies by tenant, URL and Accept
+    headers, not by Authorization. Invalidate with invalidate_tags(*tenant_tags(tag, shop_id)).
+
     Args:
-        pattern: Cache key pattern to match
+        timeout: Cache timeout in seconds (default: 5 minutes)
+        tags: Namespaces whose versions the entry depends on; may contain "{tenant}"
     """
-    try:
-        from django_redis import get_redis_connection
-        redis_client = get_redis_connection("default")
-        # Use Redis SCAN to find matching keys
-        cursor = 0
-        while True:
-            cursor, keys = redis_client.scan(cursor, match=pattern, count=100)
-            if keys:
-                redis_client.delete(*keys)
-            if cursor == 0:
-                break
-    except Exception as e:
-        # Fallback: clear all cache if Redis pattern matching fails
-        cache.clear()
+    tags = list(tags)
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            tenant = _request_tenant(request)
+            key = response_cache_key(request, [t.replace(TENANT_PLACEHOLDER, tenant) for t in tags])
+            rendered = []
+
+            def render():
+                response = view(request, *args, **kwargs)
+                rendered.append(response)
+                if response.status_code != 200 or getattr(response, 'streaming', False):
+                    return None
+                if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                    response.render()
+                headers = [(name, response[name]) for name in CACHED_HEADERS if response.has_header(name)]
+                return (response.status_code, response.content, headers)
+
+            cached = get_or_compute(key, render, timeout, stat='response')
+            if rendered:
+                return rendered[-1]
+            status_code, content, headers = cached
+            response = HttpResponse(content, status=status_code)
+            for name, value in headers:
+                response[name] = value
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,61 @@
+"""
+Service catalog read path (GET /api/service/get-all), loaded by the mobile app on every
+shop screen.
+
+A values() projection of the tenant's active services is serialized straight to JSON bytes
+and cached per shop under the shop's 'services:<id>' version (bumped by services.signals on
+create, update and delete), so a hit is one cache read and no database query.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .cache_utils import ALL_TENANTS, get_cache_version, get_or_compute
+from .models import Service
+
+try:
+    from djangorestframework_camel_case.util import camelize
+except ImportError:
+    camelize = None
+
+CATALOG_TIMEOUT = 60 * 60
+VERSION_NAMESPACE = 'services:{}'
+CACHE_KEY = 'service_catalog:{}:v{}'
+CATALOG_FIELDS = ('id', 'name', 'description', 'price', 'duration', 'category', 'image_url')
+
+
+def catalog_rows(barbershop_id=None):
+    """Active services, oldest first; every shop's when barbershop_id is None."""
+    qs = Service.objects.filter(is_active=True)
+    if barbershop_id:
+        qs = qs.filter(barbershop_id=barbershop_id)
+    return [
+        {
+            '_id': str(row['id']),
+            'name': row['name'],
+            'description': row['description'],
+            'price': float(row['price']),
+            'duration': row['duration'],
+            'category': row['category'],
+            'imageUrl': row['image_url'] or '',
+        }
+        for row in qs.order_by('id').values(*CATALOG_FIELDS)
+    ]
+
+
+def render_catalog(barbershop_id=None):
+    """Response body bytes, keyed like the rest of the API (camelCase when the API uses it)."""
+    document = {
+        'success': True,
+        'message': 'All services fetched successfully',
+        'services': catalog_rows(barbershop_id),
+    }
+    if camelize is not None:
+        document = camelize(document)
+    return json.dumps(document, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+
+
+def get_catalog_json(barbershop_id=None):
+    tenant = str(barbershop_id) if barbershop_id else ALL_TENANTS
+    key = CACHE_KEY.format(tenant, get_cache_version(VERSION_NAMESPACE.format(tenant)))
+    return get_or_compute(key, lambda: render_catalog(barbershop_id), CATALOG_TIMEOUT, stat='service_catalog')
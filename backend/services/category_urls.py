@@ -0,0 +1,10 @@
+from django.urls import path
+from .cache_utils import cache_response
+from .views import CategoryViewSet
+
+urlpatterns = [
+    path('get-all', cache_response(tags=['categories'])(CategoryViewSet.as_view({'get': 'get_all'})), name='get-all-categories'),
+    path('create', CategoryViewSet.as_view({'post': 'create'}), name='create-category'),
+    path('update/<int:pk>', CategoryViewSet.as_view({'put': 'update'}), name='update-category'),
+    path('delete/<int:pk>', CategoryViewSet.as_view({'delete': 'destroy'}), name='delete-category'),
+]
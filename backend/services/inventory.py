@@ -0,0 +1,380 @@
+"""
+Set-based order placement.
+
+Cart lines are validated and their quantities summed per product; stock is then taken with
+one conditional UPDATE per product (stock = stock - qty WHERE stock >= qty), so the check
+and the decrement are a single atomic statement and a zero row count means "not enough".
+The UPDATEs run in ascending product id order, so two carts sharing products lock rows in
+the same order and cannot deadlock. Order items are inserted with one bulk_create.
+
+Hot products (flash sales) can be sharded: their stock is split over N ProductStockShard
+rows and each order decrements a random unlocked shard that has enough units (falling back
+to all shards together when none does), so concurrent checkouts of one SKU spread over N
+rows instead of queueing on one. Product.stock then holds the total as of the last
+consolidate_stock_shards() run (every minute via Celery Beat), which also rebalances the
+shards so none stays empty while others have units.
+
+Online-payment (ONLINE) orders also record a StockReservation per product: a hold on the
+units already taken, expiring after STOCK_RESERVATION_TTL_MINUTES. A successful Chapa charge
+commits the holds; a failed one expires them, and release_expired_reservations() (every
+minute via Celery Beat) returns expired holds to stock in batches. Availability therefore
+stays a plain read of Product.stock (or its shards), never a sum over the ledger.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache_utils import invalidate_tags, tenant_tags
+from .models import Order, OrderItem, Product, ProductStockShard, StockReservation
+
+MONEY_PLACES = Decimal('0.01')
+DEFAULT_STOCK_SHARDS = 8
+MAX_STOCK_SHARDS = 64
+RELEASE_BATCH_SIZE = 500
+
+
+class OrderError(ValueError):
+    """Cart cannot be placed; str(error) is the client-facing message."""
+
+
+class InsufficientStock(OrderError):
+    def __init__(self, product):
+        super().__init__(f'Insufficient stock for {product.name}')
+        self.product = product
+
+
+def to_money(value, default=Decimal('0')):
+    """Decimal rounded to cents; raises OrderError for non-numeric input."""
+    if value in (None, ''):
+        return default
+    try:
+        return Decimal(str(value)).quantize(MONEY_PLACES)
+    except (InvalidOperation, ValueError) as e:
+        raise OrderError(f'Invalid amount: {value}') from e
+
+
+def parse_lines(order_items):
+    """[(product_id, quantity, item)] for the cart; raises OrderError for a malformed line."""
+    if not isinstance(order_items, list):
+        raise OrderError('Invalid order item')
+    lines = []
+    for item in order_items:
+        if not isinstance(item, dict):
+            raise OrderError('Invalid order item')
+        pid = item.get('product') or item.get('productId')
+        try:
+            pid = int(pid)
+            qty = int(item.get('quantity', 0))
+        except (TypeError, ValueError):
+            raise OrderError('Invalid order item')
+        if pid <= 0 or qty <= 0:
+            raise OrderError('Invalid order item')
+        lines.append((pid, qty, item))
+    return lines
+
+
+def quantities_by_product(lines):
+    """Total quantity per product id, in ascending id order (the lock order)."""
+    totals = {}
+    for pid, qty, _ in lines:
+        totals[pid] = totals.get(pid, 0) + qty
+    return OrderedDict(sorted(totals.items()))
+
+
+def split_stock(total, shards):
+    """total spread as evenly as possible over shards counters."""
+    base, extra = divmod(max(total, 0), shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def _take_from_shards(product, qty):
+    """Decrement a sharded product's stock by qty; False if all shards together lack it."""
+    # Any one unlocked shard that covers qty, picked at random; SKIP LOCKED means a busy
+    # shard is passed over instead of queued behind, so checkouts never wait on each other here
+    shard_id = (
+        ProductStockShard.objects.select_for_update(skip_locked=True)
+        .filter(product_id=product.id, stock__gte=qty)
+        .order_by('?')
+        .values_list('id', flat=True)
+        .first()
+    )
+    if shard_id is not None:
+        ProductStockShard.objects.filter(pk=shard_id).update(stock=F('stock') - qty)
+        return True
+    # No free shard covers qty: wait for all of them (locked in shard order) and take greedily
+    rows = list(ProductStockShard.objects.select_for_update().filter(product_id=product.id).order_by('shard'))
+    if sum(row.stock for row in rows) < qty:
+        return False
+    remaining = qty
+    for row in rows:
+        take = min(row.stock, remaining)
+        row.stock -= take
+        remaining -= take
+    ProductStockShard.objects.bulk_update(rows, ['stock'])
+    return True
+
+
+def decrement_stock(quantities, products):
+    """
+    Take quantities ({product_id: qty}, ascending ids) from stock; call inside a transaction.
+    Raises InsufficientStock for the first product that cannot cover its quantity.
+    """
+    for pid, qty in quantities.items():
+        product = products[pid]
+        if product.stock_shards:
+            taken = _take_from_shards(product, qty)
+        else:
+            # stock_shards=0 guards against a concurrent switch to sharded mode
+            taken = Product.objects.filter(pk=pid, stock_shards=0, stock__gte=qty).update(stock=F('stock') - qty)
+        if not taken:
+            raise InsufficientStock(product)
+
+
+def _redistribute(product_id, shards, total):
+    ProductStockShard.objects.filter(product_id=product_id).delete()
+    ProductStockShard.objects.bulk_create([
+        ProductStockShard(product_id=product_id, shard=i, stock=n)
+        for i, n in enumerate(split_stock(total, shards))
+    ])
+
+
+def _locked_total(product):
+    """Current stock of a locked product: shard sum (shards locked too) or the stock column."""
+    if not product.stock_shards:
+        return product.stock
+    rows = ProductStockShard.objects.select_for_update().filter(product_id=product.id).order_by('shard')
+    return sum(row.stock for row in rows)
+
+
+def set_sharding(product_id, shards):
+    """
+    Switch a product to shards stock counters (re-splitting if already sharded), or back to
+    the single stock column with shards=0. Returns the product's total stock.
+    """
+    shards = max(0, min(MAX_STOCK_SHARDS, int(shards)))
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        total = _locked_total(product)
+        if shards:
+            _redistribute(product.id, shards, total)
+        else:
+            ProductStockShard.objects.filter(product_id=product.id).delete()
+        Product.objects.filter(pk=product.id).update(stock=total, stock_shards=shards)
+        _invalidate_product_lists([product])
+    return total
+
+
+def set_stock(product_id, stock):
+    """Set a product's absolute stock (admin restock), sharded or not."""
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        if product.stock_shards:
+            _locked_total(product)
+            _redistribute(product.id, product.stock_shards, stock)
+        Product.objects.filter(pk=product.id).update(stock=stock)
+        _invalidate_product_lists([product])
+
+
+def consolidate_stock_shards(product_ids=None):
+    """
+    For each sharded product: sum its shards into Product.stock and re-split them evenly.
+    One short transaction per product. Returns the number of products consolidated.
+    """
+    products = Product.objects.filter(stock_shards__gt=0)
+    if product_ids is not None:
+        products = products.filter(id__in=list(product_ids))
+    done = 0
+    for product_id in products.order_by('id').values_list('id', flat=True):
+        with transaction.atomic():
+            product = Product.objects.select_for_update().filter(pk=product_id, stock_shards__gt=0).first()
+            if product is None:
+                continue
+            rows = list(ProductStockShard.objects.select_for_update().filter(product_id=product_id).order_by('shard'))
+            total = sum(row.stock for row in rows)
+            counts = split_stock(total, product.stock_shards)
+            if len(rows) != product.stock_shards:
+                _redistribute(product_id, product.stock_shards, total)
+            else:
+                changed = [row for row, n in zip(rows, counts) if row.stock != n]
+                for row, n in zip(rows, counts):
+                    row.stock = n
+                ProductStockShard.objects.bulk_update(changed, ['stock'])
+            if product.stock != total:
+                Product.objects.filter(pk=product_id).update(stock=total)
+                _invalidate_product_lists([product])
+        done += 1
+    return done
+
+
+def _return_stock(quantities):
+    """Put quantities ({product_id: qty}, ascending ids) back into stock; call inside a transaction."""
+    for pid, qty in quantities.items():
+        if Product.objects.filter(pk=pid, stock_shards=0).update(stock=F('stock') + qty):
+            continue
+        # Sharded (or deleted): the product lock keeps set_sharding/consolidation from
+        # rebuilding the shards meanwhile; the next consolidation spreads the units
+        product = Product.objects.select_for_update(no_key=True).filter(pk=pid).first()
+        if product is None:
+            continue
+        if not product.stock_shards:
+            Product.objects.filter(pk=pid).update(stock=F('stock') + qty)
+        elif not ProductStockShard.objects.filter(product_id=pid, shard=0).update(stock=F('stock') + qty):
+            _redistribute(pid, product.stock_shards, _locked_total(product) + qty)
+
+
+def _quantities(reservations):
+    """{product_id: qty} in ascending id order from (product_id, quantity) pairs."""
+    totals = {}
+    for pid, qty in reservations:
+        totals[pid] = totals.get(pid, 0) + qty
+    return OrderedDict(sorted(totals.items()))
+
+
+def reservation_ttl():
+    return timedelta(minutes=getattr(settings, 'STOCK_RESERVATION_TTL_MINUTES', 30))
+
+
+def hold_stock(order, quantities):
+    """Record holds for stock just taken for order ({product_id: qty}); call in the same transaction."""
+    expires_at = timezone.now() + reservation_ttl()
+    StockReservation.objects.bulk_create([
+        StockReservation(order=order, product_id=pid, quantity=qty, expires_at=expires_at)
+        for pid, qty in quantities.items()
+    ])
+
+
+def commit_reservations(order):
+    """
+    Payment settled: make the order's holds permanent. Holds the sweeper already released
+    are taken from stock again. Returns False if that stock is no longer there (the order is
+    paid but cannot be fulfilled); True otherwise, including for orders without holds.
+    """
+    with transaction.atomic():
+        StockReservation.objects.filter(
+            order_id=order.id, status=StockReservation.HELD,
+        ).update(status=StockReservation.COMMITTED, updated_at=timezone.now())
+        released = list(
+            StockReservation.objects.select_for_update()
+            .filter(order_id=order.id, status=StockReservation.RELEASED)
+            .values_list('id', 'product_id', 'quantity')
+        )
+        if not released:
+            return True
+        quantities = _quantities((pid, qty) for _, pid, qty in released)
+        products = Product.objects.in_bulk(list(quantities))
+        try:
+            with transaction.atomic():
+                decrement_stock(quantities, {pid: products[pid] for pid in quantities if pid in products})
+        except (InsufficientStock, KeyError):
+            return False
+        StockReservation.objects.filter(id__in=[row[0] for row in released]).update(
+            status=StockReservation.COMMITTED, updated_at=timezone.now(),
+        )
+        _invalidate_product_lists(products.values())
+    return True
+
+
+def expire_reservations(order_id):
+    """Payment failed: mark the order's holds due so the next sweep returns their stock."""
+    return StockReservation.objects.filter(
+        order_id=order_id, status=StockReservation.HELD,
+    ).update(expires_at=timezone.now())
+
+
+def reservation_expired(order):
+    """True if the order's holds were released (its stock may be gone), False if it has none."""
+    statuses = set(StockReservation.objects.filter(order_id=order.id).values_list('status', flat=True))
+    return statuses == {StockReservation.RELEASED}
+
+
+def release_expired_reservations(batch_size=RELEASE_BATCH_SIZE):
+    """
+    Return the stock of every held reservation past its expiry, batch_size rows per
+    transaction; their orders are marked payment_info_status='expired'. Rows being
+    committed by a payment webhook are skipped (SKIP LOCKED). Returns the number released.
+    """
+    released = 0
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(status=StockReservation.HELD, expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('id', 'order_id', 'product_id', 'quantity')[:batch_size]
+            )
+            if not rows:
+                break
+            StockReservation.objects.filter(id__in=[row[0] for row in rows]).update(
+                status=StockReservation.RELEASED, updated_at=now,
+            )
+            quantities = _quantities((pid, qty) for _, _, pid, qty in rows)
+            _return_stock(quantities)
+            Order.objects.filter(id__in={row[1] for row in rows}).exclude(
+                payment_info_status='completed',
+            ).update(payment_info_status='expired', updated_at=now)
+            _invalidate_product_lists(Product.objects.filter(id__in=list(quantities)).only('id', 'barbershop_id'))
+        released += len(rows)
+        if len(rows) < batch_size:
+            break
+    return released
+
+
+def _invalidate_product_lists(products):
+    # update() sends no post_save: drop cached product lists showing the old stock
+    tags = set()
+    for product in products:
+        tags.update(tenant_tags('products:{tenant}', product.barbershop_id))
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def place_order(user, barbershop, order_items, shipping_info, data):
+    """
+    Create the Order and its items and take the stock, all in one transaction.
+    Raises OrderError (or InsufficientStock) with a client-facing message.
+    """
+    lines = parse_lines(order_items)
+    if not lines:
+        raise OrderError('order_items is required')
+    quantities = quantities_by_product(lines)
+    payment_info = data.get('payment_info') or data.get('paymentInfo') or {}
+    with transaction.atomic():
+        products = Product.objects.in_bulk(list(quantities))
+        for pid in quantities:
+            if pid not in products:
+                raise OrderError(f'Product {pid} not found')
+        decrement_stock(quantities, products)
+        order = Order.objects.create(
+            barbershop=barbershop,
+            user=user,
+            shipping_address=shipping_info.get('address', ''),
+            shipping_city=shipping_info.get('city', ''),
+            shipping_country=shipping_info.get('country', ''),
+            payment_method=data.get('payment_method') or data.get('paymentMethod') or 'COD',
+            payment_info_id=payment_info.get('id', ''),
+            payment_info_status=payment_info.get('status', ''),
+            item_price=to_money(data.get('item_price') or data.get('itemPrice')),
+            tax=to_money(data.get('tax')),
+            shipping_charges=to_money(data.get('shipping_charges') or data.get('shippingCharges')),
+            total_amount=to_money(data.get('total_amount') or data.get('totalAmount')),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=pid,
+                name=item.get('name', products[pid].name),
+                price=to_money(item.get('price'), products[pid].price),
+                quantity=qty,
+                image=item.get('image', ''),
+            )
+            for pid, qty, item in lines
+        ])
+        if order.payment_method == 'ONLINE':
+            hold_stock(order, quantities)
+        _invalidate_product_lists(products.values())
+    return order
@@ -0,0 +1,33 @@
+"""
+Show cache hit / miss / coalescing counters recorded by services.cache_utils.get_or_compute,
+summed across workers. Use them to tune TTLs: a high miss share means entries expire or are
+invalidated faster than they are reused; many stale_served / coalesced means a hot key.
+"""
+from django.core.management.base import BaseCommand
+
+from services.cache_utils import STAT_COUNTERS, cache_stats
+
+
+class Command(BaseCommand):
+    help = "Print shared cache counters (hit, miss, early refresh, stale served, coalesced)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing.')
+
+    def handle(self, *args, **options):
+        cache_stats.flush()
+        totals = cache_stats.totals()
+        if not totals:
+            self.stdout.write("cache_stats: no counters recorded yet.")
+        else:
+            self.stdout.write(' '.join(['name'.ljust(16)] + [c.rjust(13) for c in STAT_COUNTERS] + ['hit_ratio'.rjust(10)]))
+            for name, counts in sorted(totals.items()):
+                reads = sum(counts.values()) - counts['wait_timeout']
+                served = counts['hit'] + counts['stale_served'] + counts['coalesced']
+                ratio = f"{served / reads:.1%}" if reads else '-'
+                self.stdout.write(' '.join(
+                    [name.ljust(16)] + [str(counts[c]).rjust(13) for c in STAT_COUNTERS] + [ratio.rjust(10)]
+                ))
+        if options['reset']:
+            cache_stats.reset()
+            self.stdout.write(self.style.SUCCESS("cache_stats: counters reset."))
@@ -0,0 +1,28 @@
+"""
+Rebuild the ServiceLocation search index from services and their shops.
+Signals keep it current; use after bulk imports, raw SQL edits or restoring a backup.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from services.search import rebuild, sync_shop
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cross-shop service search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', type=int, action='append', dest='shop_ids', help='Limit to shop id (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options.get('shop_ids'):
+                for shop_id in options['shop_ids']:
+                    sync_shop(shop_id)
+                self.stdout.write(self.style.SUCCESS(
+                    f"rebuild_service_locations: {len(options['shop_ids'])} shop(s) re-indexed."
+                ))
+                return
+            written = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"rebuild_service_locations: {written} row(s) written."))
@@ -0,0 +1,19 @@
+"""
+Backfill product rating aggregates (rating_sum, num_reviews, rating) from product_reviews.
+Idempotent; use after imports or manual review edits.
+"""
+from django.core.management.base import BaseCommand
+
+from services.ratings import recompute_product_ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute stored product ratings from reviews in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='product_ids', help='Limit to product id (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = recompute_product_ratings(options.get('product_ids'), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"recompute_product_ratings: {updated} product(s) updated."))
@@ -0,0 +1,37 @@
+"""
+Switch products to sharded stock counters before a flash sale (and back afterwards), or
+consolidate shard totals into Product.stock. Consolidation normally runs every minute via
+Celery Beat.
+
+    python manage.py shard_stock --product 12 --shards 8
+    python manage.py shard_stock --product 12 --shards 0
+    python manage.py shard_stock --consolidate
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from services.inventory import DEFAULT_STOCK_SHARDS, consolidate_stock_shards, set_sharding
+from services.models import Product
+
+
+class Command(BaseCommand):
+    help = "Enable, resize or disable sharded stock for products, or consolidate shard totals."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='product_ids', help='Product id (repeatable).')
+        parser.add_argument('--shards', type=int, default=DEFAULT_STOCK_SHARDS, help='Shard count; 0 disables sharding.')
+        parser.add_argument('--consolidate', action='store_true', help='Fold shard totals into Product.stock and rebalance.')
+
+    def handle(self, *args, **options):
+        product_ids = options.get('product_ids')
+        if options['consolidate']:
+            n = consolidate_stock_shards(product_ids)
+            self.stdout.write(self.style.SUCCESS(f"shard_stock: {n} sharded product(s) consolidated."))
+            return
+        if not product_ids:
+            raise CommandError('Pass --product (repeatable) or --consolidate.')
+        for product_id in product_ids:
+            if not Product.objects.filter(pk=product_id).exists():
+                raise CommandError(f'Product {product_id} not found.')
+            total = set_sharding(product_id, options['shards'])
+            mode = f"{options['shards']} shard(s)" if options['shards'] > 0 else 'single stock row'
+            self.stdout.write(self.style.SUCCESS(f"shard_stock: product {product_id} -> {mode}, stock {total}."))
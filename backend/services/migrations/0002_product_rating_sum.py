@@ -0,0 +1,39 @@
+# Product rating_sum for incremental rating updates; backfills sum/count/average from reviews
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_product_ratings(apps, schema_editor):
+    Product = apps.get_model('services', 'Product')
+    ProductReview = apps.get_model('services', 'ProductReview')
+    totals = {
+        row['product_id']: (row['total'] or 0, row['n'])
+        for row in ProductReview.objects.values('product_id').annotate(total=Sum('rating'), n=Count('id'))
+    }
+    products = []
+    for product in Product.objects.filter(id__in=list(totals)):
+        total, count = totals[product.id]
+        product.rating_sum = total
+        product.num_reviews = count
+        product.rating = (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        products.append(product)
+    Product.objects.bulk_update(products, ['rating_sum', 'num_reviews', 'rating'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_product_ratings, migrations.RunPython.noop),
+    ]
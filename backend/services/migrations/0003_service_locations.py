@@ -0,0 +1,66 @@
+# Denormalized service + shop-location index for cross-shop service search
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_service_locations(apps, schema_editor):
+    Barbershop = apps.get_model('barbershops', 'Barbershop')
+    Service = apps.get_model('services', 'Service')
+    ServiceLocation = apps.get_model('services', 'ServiceLocation')
+    shops = {
+        shop.id: shop
+        for shop in Barbershop.objects.filter(
+            deleted_at__isnull=True,
+            is_active=True,
+            is_verified=True,
+            subscription_status__in=['active', 'trial'],
+            latitude__isnull=False,
+            longitude__isnull=False,
+        ).only('id', 'name', 'latitude', 'longitude')
+    }
+    rows = []
+    for service in Service.objects.filter(barbershop_id__in=list(shops), is_active=True).iterator(chunk_size=1000):
+        shop = shops[service.barbershop_id]
+        rows.append(ServiceLocation(
+            service_id=service.id,
+            barbershop_id=shop.id,
+            name=service.name,
+            shop_name=shop.name,
+            category=service.category,
+            price=service.price,
+            duration_minutes=service.duration_minutes,
+            latitude=float(shop.latitude),
+            longitude=float(shop.longitude),
+        ))
+    ServiceLocation.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barbershops', '0011_popular_times'),
+        ('services', '0002_product_rating_sum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceLocation',
+            fields=[
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='location_index', serialize=False, to='services.service')),
+                ('name', models.CharField(max_length=200)),
+                ('shop_name', models.CharField(max_length=200)),
+                ('category', models.CharField(max_length=50)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('duration_minutes', models.IntegerField(blank=True, null=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('barbershop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='service_locations', to='barbershops.barbershop')),
+            ],
+            options={
+                'db_table': 'service_locations',
+                'indexes': [models.Index(fields=['category', 'latitude', 'longitude'], name='svcloc_cat_geo_idx'), models.Index(fields=['latitude', 'longitude'], name='svcloc_geo_idx'), models.Index(fields=['category', 'price'], name='svcloc_cat_price_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_service_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Index for the keyset-paginated product reviews endpoint
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_service_locations'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', '-created_at', '-id'], name='product_review_feed_idx'),
+        ),
+    ]
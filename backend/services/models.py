@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
@@ -75,15 +77,50 @@ class Service(models.Model):
         return []
     
     def save(self, *args, **kwargs):
-        """Parse duration string to minutes."""
-        if self.duration and not self.duration_minutes:
-            import re
-            match = re.match(r'(\d+)\s*min', self.duration, re.IGNORECASE)
-            if match:
-                self.duration_minutes = int(match.group(1))
+        """Parse duration string to minutes on every save; None when it has no "<n> min"."""
+        import re
+        match = re.match(r'(\d+)\s*min', self.duration or '', re.IGNORECASE)
+        self.duration_minutes = int(match.group(1)) if match else None
         super().save(*args, **kwargs)
 
 
+class ServiceLocation(models.Model):
+    """
+    Denormalized search row per active service of a discoverable, geolocated shop:
+    the service's filter columns next to its shop's coordinates, so cross-shop
+    "service near me" search is one indexed table scan. Maintained by services.search.
+    """
+    service = models.OneToOneField(
+        Service,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='location_index',
+    )
+    barbershop = models.ForeignKey(
+        'barbershops.Barbershop',
+        on_delete=models.CASCADE,
+        related_name='service_locations',
+    )
+    name = models.CharField(max_length=200)
+    shop_name = models.CharField(max_length=200)
+    category = models.CharField(max_length=50)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    duration_minutes = models.IntegerField(null=True, blank=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        db_table = 'service_locations'
+        indexes = [
+            models.Index(fields=['category', 'latitude', 'longitude'], name='svcloc_cat_geo_idx'),
+            models.Index(fields=['latitude', 'longitude'], name='svcloc_geo_idx'),
+            models.Index(fields=['category', 'price'], name='svcloc_cat_price_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} @ {self.shop_name}"
+
+
 class Product(models.Model):
     """Product model (multi-tenant)."""
     barbershop = models.ForeignKey(
@@ -101,10 +138,16 @@ class Product(models.Model):
         validators=[MinValueValidator(Decimal('0.01'))]
     )
     stock = models.IntegerField(validators=[MinValueValidator(0)])
+    # > 0: flash-sale mode, stock lives in this many ProductStockShard rows and `stock` is the
+    # total as of the last consolidation (services.inventory)
+    stock_shards = models.PositiveSmallIntegerField(default=0)
     category = models.CharField(max_length=100)  # String reference (can be linked to Category later)
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     num_reviews = models.IntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)  # Sum of review ratings; rating = rating_sum / num_reviews
     is_active = models.BooleanField(default=True)
+    # Weighted name/category/description tsvector, maintained by services.product_search
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -115,12 +158,33 @@ class Product(models.Model):
             models.Index(fields=['category']),
             models.Index(fields=['is_active']),
             models.Index(fields=['rating']),
+            GinIndex(fields=['search_vector'], name='product_search_gin'),
         ]
     
     def __str__(self):
         return f"{self.name} - {self.barbershop.name if self.barbershop else 'No Shop'}"
 
 
+class ProductStockShard(models.Model):
+    """One slice of a sharded product's stock; orders decrement a random slice."""
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_shard_rows'
+    )
+    shard = models.PositiveSmallIntegerField()
+    stock = models.IntegerField(validators=[MinValueValidator(0)])
+
+    class Meta:
+        db_table = 'product_stock_shards'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'shard'], name='unique_product_stock_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} shard {self.shard}: {self.stock}"
+
+
 class ProductImage(models.Model):
     """Product images (separate model for multiple images)."""
     product = models.ForeignKey(
@@ -161,6 +225,10 @@ class ProductReview(models.Model):
     class Meta:
         db_table = 'product_reviews'
         unique_together = ['product', 'user']  # One review per user per product
+        indexes = [
+            # Product reviews endpoint: newest first, keyset-paginated
+            models.Index(fields=['product', '-created_at', '-id'], name='product_review_feed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.name} - {self.product.name} ({self.rating} stars)"
@@ -223,6 +291,12 @@ class Order(models.Model):
             models.Index(fields=['user']),
             models.Index(fields=['order_status']),
             models.Index(fields=['created_at']),
+            # Order listings: shop (+ status) filter, newest first (services.views.OrderViewSet)
+            models.Index(fields=['barbershop', 'order_status', 'created_at'], name='order_shop_status_created_idx'),
+            models.Index(fields=['barbershop', 'created_at'], name='order_shop_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+            # Changed rows for the dashboard rollups (analytics.rollups)
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
         ]
     
     def __str__(self):
@@ -251,3 +325,48 @@ class OrderItem(models.Model):
     
     def __str__(self):
         return f"{self.name} x{self.quantity} - Order #{self.order.id}"
+
+
+class StockReservation(models.Model):
+    """
+    Units of a product held for an online-payment order until the payment settles.
+
+    The units are taken from Product.stock (or its shards) when the order is placed, so stock
+    reads never sum this ledger; a hold that expires or whose payment fails is released in
+    bulk by services.tasks.release_expired_reservations, which puts the units back.
+    """
+    HELD = 'held'
+    COMMITTED = 'committed'
+    RELEASED = 'released'
+    STATUS_CHOICES = [
+        (HELD, 'Held'),
+        (COMMITTED, 'Committed'),
+        (RELEASED, 'Released'),
+    ]
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations'
+    )
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'stock_reservations'
+        indexes = [
+            models.Index(fields=['order', 'status'], name='stock_resv_order_idx'),
+            # Sweeper: held rows past expiry
+            models.Index(fields=['expires_at'], name='stock_resv_held_expiry_idx', condition=models.Q(status='held')),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id} - {self.product_id} x{self.quantity} ({self.status})"
@@ -0,0 +1,124 @@
+"""
+Product search within a shop: full-text match on a GIN-indexed search vector, price and
+rating ranges, results ranked by text relevance blended with rating, and category facet
+counts from one grouped query.
+
+Product.search_vector is rewritten by services.signals whenever a product's name,
+description or category changes. Facets are cached per tenant under the 'products:<id>'
+version that product changes already bump (services.signals).
+"""
+import hashlib
+import json
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import Count, F, FloatField, Value
+from django.db.models.functions import Cast
+
+from barbershops.utils import filter_by_barbershop
+from .cache_utils import ALL_TENANTS, get_cache_version, get_or_compute
+from .models import Product
+
+# 'simple': no stemming or stop words, so product names in any language match as typed
+SEARCH_CONFIG = 'simple'
+SEARCH_FIELDS = {'name', 'description', 'category'}
+# Share of the score taken by rating (0-5 scaled to 0-1); the rest is text relevance
+RATING_WEIGHT = 0.3
+FACET_TIMEOUT = 60 * 10
+SORT_FIELDS = {
+    'relevance': ['-score', '-rating', 'id'],
+    'rating': ['-rating', '-num_reviews', 'id'],
+    'price': ['price', 'id'],
+    '-price': ['-price', 'id'],
+    'newest': ['-created_at', '-id'],
+}
+
+
+def search_vector():
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('category', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def refresh_search_vectors(product_ids):
+    """Recompute search_vector for the given products in one UPDATE."""
+    Product.objects.filter(pk__in=list(product_ids)).update(search_vector=search_vector())
+
+
+def parse_query(text):
+    """SearchQuery matching every word of text as a prefix ("pom wax" -> pom:* & wax:*), or None."""
+    terms = re.findall(r'\w+', text or '')
+    if not terms:
+        return None
+    return SearchQuery(' & '.join(f'{t}:*' for t in terms), search_type='raw', config=SEARCH_CONFIG)
+
+
+def filtered_queryset(barbershop_id=None, query=None, min_price=None, max_price=None,
+                      min_rating=None, max_rating=None, category=None):
+    """Active products of the tenant matching text and ranges (category optional for faceting)."""
+    qs = filter_by_barbershop(Product.objects.filter(is_active=True), barbershop_id)
+    search_query = parse_query(query)
+    if search_query is not None:
+        qs = qs.filter(search_vector=search_query)
+    if min_price is not None:
+        qs = qs.filter(price__gte=min_price)
+    if max_price is not None:
+        qs = qs.filter(price__lte=max_price)
+    if min_rating is not None:
+        qs = qs.filter(rating__gte=min_rating)
+    if max_rating is not None:
+        qs = qs.filter(rating__lte=max_rating)
+    if category:
+        qs = qs.filter(category=category)
+    return qs
+
+
+def search_queryset(barbershop_id=None, query=None, sort=None, **filters):
+    """
+    Products ordered by sort ('relevance' by default when there is a query, else 'rating').
+    Relevance = (1 - RATING_WEIGHT) * normalized ts_rank + RATING_WEIGHT * rating / 5.
+    """
+    qs = filtered_queryset(barbershop_id, query, **filters)
+    search_query = parse_query(query)
+    if sort not in SORT_FIELDS:
+        sort = 'relevance' if search_query is not None else 'rating'
+    if sort == 'relevance':
+        # normalization 32: rank / (rank + 1), so text relevance is in [0, 1) like rating / 5
+        rank = (
+            SearchRank(F('search_vector'), search_query, normalization=Value(32))
+            if search_query is not None else Value(0.0, output_field=FloatField())
+        )
+        qs = qs.annotate(
+            score=Value(1 - RATING_WEIGHT) * rank
+            + Value(RATING_WEIGHT) * Cast('rating', FloatField()) / Value(5.0)
+        )
+    return qs.order_by(*SORT_FIELDS[sort])
+
+
+def _facet_key(barbershop_id, query, filters):
+    tenant = str(barbershop_id) if barbershop_id else ALL_TENANTS
+    version = get_cache_version(f'products:{tenant}')
+    spec = json.dumps([query or '', {k: str(v) for k, v in sorted(filters.items()) if v is not None}])
+    return f"product_facets:{tenant}:v{version}:{hashlib.sha256(spec.encode('utf-8')).hexdigest()}"
+
+
+def category_facets(barbershop_id=None, query=None, **filters):
+    """
+    [{'category', 'count'}] for products matching text and ranges, most common first.
+    Ignores any category filter, so the client can show counts for the other categories.
+    """
+    filters.pop('category', None)
+
+    def compute():
+        rows = (
+            filtered_queryset(barbershop_id, query, **filters)
+            .order_by()
+            .values('category')
+            .annotate(count=Count('id'))
+            .order_by('-count', 'category')
+        )
+        return [{'category': row['category'], 'count': row['count']} for row in rows]
+
+    return get_or_compute(_facet_key(barbershop_id, query, filters), compute, FACET_TIMEOUT, stat='product_facets')
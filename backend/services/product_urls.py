@@ -1,9 +1,11 @@
 from django.urls import path
+from .cache_utils import cache_response
 from .views import ProductViewSet
 
 urlpatterns = [
-    path('get-all', ProductViewSet.as_view({'get': 'get_all'}), name='get-all-products'),
-    path('top', ProductViewSet.as_view({'get': 'top'}), name='get-top-products'),
+    path('get-all', cache_response(tags=['products:{tenant}'])(ProductViewSet.as_view({'get': 'get_all'})), name='get-all-products'),
+    path('top', cache_response(tags=['products:{tenant}'])(ProductViewSet.as_view({'get': 'top'})), name='get-top-products'),
+    path('search', ProductViewSet.as_view({'get': 'search'}), name='search-products'),
     path('<int:pk>', ProductViewSet.as_view({'get': 'retrieve'}), name='get-single-product'),
     path('create', ProductViewSet.as_view({'post': 'create'}), name='create-product'),
     path('update/<int:pk>', ProductViewSet.as_view({'put': 'update'}), name='update-product'),
@@ -11,4 +13,5 @@ urlpatterns = [
     path('delete-image/<int:pk>', ProductViewSet.as_view({'delete': 'delete_image'}), name='delete-product-image'),
     path('delete/<int:pk>', ProductViewSet.as_view({'delete': 'destroy'}), name='delete-product'),
     path('<int:pk>/review', ProductViewSet.as_view({'put': 'review'}), name='product-review'),
+    path('<int:pk>/reviews', ProductViewSet.as_view({'get': 'reviews'}), name='product-reviews'),
 ]
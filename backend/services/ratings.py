@@ -0,0 +1,54 @@
+"""
+Incremental product rating aggregates (rating_sum, num_reviews, rating).
+
+A new review costs one UPDATE regardless of how many reviews the product already has;
+recompute_product_ratings() rebuilds the columns from product_reviews for backfills.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import Cast
+
+from .models import Product, ProductReview
+
+
+def apply_product_review(product_id, rating):
+    """Fold one new rating into the product aggregate. Call inside the review transaction."""
+    return Product.objects.filter(pk=product_id).update(
+        rating_sum=F('rating_sum') + rating,
+        num_reviews=F('num_reviews') + 1,
+        # Right-hand sides see the pre-update row; num_reviews + 1 is never zero.
+        rating=Cast(F('rating_sum') + rating, DecimalField(max_digits=12, decimal_places=4)) / (F('num_reviews') + 1),
+    )
+
+
+def recompute_product_ratings(product_ids=None, batch_size=1000):
+    """
+    Rebuild rating_sum, num_reviews and rating from reviews (one grouped query per batch).
+    Returns the number of products written.
+    """
+    products = Product.objects.order_by('id')
+    if product_ids is not None:
+        products = products.filter(id__in=list(product_ids))
+    ids = list(products.values_list('id', flat=True))
+    updated = 0
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        totals = {
+            row['product_id']: (row['total'] or 0, row['n'])
+            for row in ProductReview.objects.filter(product_id__in=batch_ids)
+            .values('product_id')
+            .annotate(total=Sum('rating'), n=Count('id'))
+        }
+        batch = []
+        for product in Product.objects.filter(id__in=batch_ids).only('id', 'rating', 'rating_sum', 'num_reviews'):
+            total, count = totals.get(product.id, (0, 0))
+            product.rating_sum = total
+            product.num_reviews = count
+            product.rating = (
+                (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) if count else Decimal('0')
+            )
+            batch.append(product)
+        Product.objects.bulk_update(batch, ['rating_sum', 'num_reviews', 'rating'])
+        updated += len(batch)
+    return updated
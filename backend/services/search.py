@@ -0,0 +1,120 @@
+"""
+Cross-shop service search ("beard trim near me") over the ServiceLocation index.
+
+sync_shop() rewrites a shop's rows whenever the shop or one of its services changes
+(services.signals). search_queryset() narrows by category / price / duration and a
+lat/lng bounding box on indexed columns, then computes the exact Haversine distance in
+SQL so filtering by radius, ordering and pagination all happen in the database.
+"""
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+from .models import Service, ServiceLocation
+
+EARTH_RADIUS_KM = 6371.0
+SORT_FIELDS = {
+    'distance': ['distance_km', 'price', 'service_id'],
+    'price': ['price', 'distance_km', 'service_id'],
+}
+ROW_FIELDS = ['barbershop', 'name', 'shop_name', 'category', 'price', 'duration_minutes', 'latitude', 'longitude']
+
+
+def _rows_for_shops(shops):
+    """ServiceLocation objects for the active services of the given Barbershop instances."""
+    by_id = {shop.id: shop for shop in shops}
+    if not by_id:
+        return []
+    services = Service.objects.filter(barbershop_id__in=list(by_id), is_active=True).only(
+        'id', 'barbershop_id', 'name', 'category', 'price', 'duration_minutes',
+    )
+    return [
+        ServiceLocation(
+            service_id=service.id,
+            barbershop_id=service.barbershop_id,
+            name=service.name,
+            shop_name=by_id[service.barbershop_id].name,
+            category=service.category,
+            price=service.price,
+            duration_minutes=service.duration_minutes,
+            latitude=float(by_id[service.barbershop_id].latitude),
+            longitude=float(by_id[service.barbershop_id].longitude),
+        )
+        for service in services
+    ]
+
+
+def _indexable_shops():
+    from barbershops.models import Barbershop
+    return Barbershop.objects.discoverable().filter(latitude__isnull=False, longitude__isnull=False)
+
+
+def sync_shop(shop_id):
+    """
+    Rewrite one shop's rows (none if it is hidden from discovery or has no coordinates).
+    Rows are upserted on service, so a service that moved here from another shop is taken
+    over, and concurrent syncs of the same shop queue on the shop row lock.
+    """
+    from barbershops.models import Barbershop
+
+    with transaction.atomic():
+        if not Barbershop.all_objects.select_for_update().filter(pk=shop_id).exists():
+            return
+        shops = _indexable_shops().filter(pk=shop_id).only('id', 'name', 'latitude', 'longitude')
+        rows = _rows_for_shops(shops)
+        ServiceLocation.objects.filter(barbershop_id=shop_id).exclude(
+            service_id__in=[row.service_id for row in rows],
+        ).delete()
+        ServiceLocation.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['service'], update_fields=ROW_FIELDS,
+        )
+
+
+def rebuild(batch_size=500):
+    """Rebuild the whole index. Returns the number of rows written."""
+    ServiceLocation.objects.all().delete()
+    shops = _indexable_shops().order_by('id').only('id', 'name', 'latitude', 'longitude')
+    written = 0
+    batch = []
+    for shop in shops.iterator(chunk_size=batch_size):
+        batch.append(shop)
+        if len(batch) >= batch_size:
+            written += len(ServiceLocation.objects.bulk_create(_rows_for_shops(batch)))
+            batch = []
+    if batch:
+        written += len(ServiceLocation.objects.bulk_create(_rows_for_shops(batch)))
+    return written
+
+
+def haversine_expression(lat, lng):
+    """SQL expression: great-circle km from (lat, lng) to each row's latitude/longitude."""
+    lat0 = Value(lat, output_field=FloatField())
+    lng0 = Value(lng, output_field=FloatField())
+    dlat = (Radians(F('latitude')) - Radians(lat0)) / 2
+    dlng = (Radians(F('longitude')) - Radians(lng0)) / 2
+    a = Power(Sin(dlat), 2) + Cos(Radians(lat0)) * Cos(Radians(F('latitude'))) * Power(Sin(dlng), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+def search_queryset(lat, lng, radius_km, category=None, min_price=None, max_price=None,
+                    max_duration=None, query=None, sort='distance'):
+    """ServiceLocation rows within radius_km of (lat, lng), annotated with distance_km and ordered."""
+    from barbershops.ranking import bounding_box
+
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    qs = ServiceLocation.objects.filter(
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+    if category:
+        qs = qs.filter(category=category)
+    if min_price is not None:
+        qs = qs.filter(price__gte=min_price)
+    if max_price is not None:
+        qs = qs.filter(price__lte=max_price)
+    if max_duration is not None:
+        qs = qs.filter(duration_minutes__lte=max_duration)
+    if query:
+        qs = qs.filter(name__icontains=query)
+    qs = qs.annotate(distance_km=haversine_expression(lat, lng)).filter(distance_km__lte=radius_km)
+    return qs.order_by(*SORT_FIELDS.get(sort, SORT_FIELDS['distance']))
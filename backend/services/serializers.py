@@ -4,13 +4,14 @@ from .models import Service, Product, ProductImage, ProductReview, Order, OrderI
 
 class ServiceSerializer(serializers.ModelSerializer):
     """Service serializer."""
+    _id = serializers.CharField(source='id', read_only=True)
     image = serializers.SerializerMethodField()
     imageUrl = serializers.SerializerMethodField()
     
     class Meta:
         model = Service
         fields = [
-            'name', 'description', 'price', 'duration',
+            '_id', 'name', 'description', 'price', 'duration',
             'category', 'image', 'imageUrl', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
@@ -20,12 +21,6 @@ class ServiceSerializer(serializers.ModelSerializer):
     
     def get_imageUrl(self, obj):
         return obj.image_url if obj.image_url else ''
-    
-    def to_representation(self, instance):
-        """Convert id to _id for frontend compatibility."""
-        data = super().to_representation(instance)
-        data['_id'] = str(instance.id)
-        return data
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -69,6 +64,14 @@ class ProductSerializer(serializers.ModelSerializer):
         return data
 
 
+class ProductListSerializer(ProductSerializer):
+    """Product list item: images and rating summary only; reviews come from GET <pk>/reviews."""
+    reviews = None
+
+    class Meta(ProductSerializer.Meta):
+        fields = [f for f in ProductSerializer.Meta.fields if f != 'reviews']
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     """Order item serializer (snake_case; CamelCaseJSONRenderer handles response)."""
     class Meta:
@@ -0,0 +1,68 @@
+"""
+Keep the ServiceLocation search index in step with services and their shops, and
+invalidate cached list responses (see cache_utils.cache_response) after commit.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from barbershops.models import Barbershop
+from .cache_utils import invalidate_tags, tenant_tags
+from .models import Service, Product, ProductImage, ProductReview, Category
+from . import product_search, search
+
+# Barbershop fields that decide whether / where its services are indexed
+INDEXED_SHOP_FIELDS = {
+    'name', 'latitude', 'longitude', 'is_active', 'is_verified', 'subscription_status', 'deleted_at',
+}
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_changed(sender, instance, **kwargs):
+    if instance.barbershop_id:
+        search.sync_shop(instance.barbershop_id)
+    tags = tenant_tags('services:{tenant}', instance.barbershop_id)
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+@receiver(post_save, sender=Barbershop)
+def shop_changed(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and not INDEXED_SHOP_FIELDS & set(update_fields)):
+        return
+    search.sync_shop(instance.pk)
+
+
+def _invalidate_products(barbershop_id):
+    tags = tenant_tags('products:{tenant}', barbershop_id)
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    _invalidate_products(instance.barbershop_id)
+
+
+@receiver(post_save, sender=Product)
+def refresh_search_vector(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Shares the save's transaction only when the caller opened one (the product views do)
+    if raw or (update_fields is not None and not product_search.SEARCH_FIELDS & set(update_fields)):
+        return
+    product_search.refresh_search_vectors([instance.pk])
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def product_detail_changed(sender, instance, **kwargs):
+    # Looked up rather than read from instance.product: the product may be mid-cascade
+    barbershop_id = Product.objects.filter(pk=instance.product_id).values_list('barbershop_id', flat=True).first()
+    _invalidate_products(barbershop_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_tags('categories'))
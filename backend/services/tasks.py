@@ -0,0 +1,40 @@
+"""Celery tasks for the product catalog and inventory."""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def consolidate_stock_shards():
+    """
+    Fold sharded products' stock counters into Product.stock and rebalance them. Run via Celery Beat.
+    If Celery is not installed, run `python manage.py shard_stock --consolidate` from cron instead.
+    """
+    from .inventory import consolidate_stock_shards as consolidate
+    return consolidate()
+
+
+def release_expired_reservations():
+    """Return the stock of expired or failed online-payment holds. Run via Celery Beat."""
+    from .inventory import release_expired_reservations as release
+    released = release()
+    if released:
+        logger.info("Released %d expired stock reservations", released)
+    return released
+
+
+# Celery shared_task (optional - only if celery is installed)
+try:
+    from celery import shared_task
+
+    @shared_task
+    def consolidate_stock_shards_task():
+        """Celery task wrapper for consolidate_stock_shards."""
+        return consolidate_stock_shards()
+
+    @shared_task
+    def release_expired_reservations_task():
+        """Celery task wrapper for release_expired_reservations."""
+        return release_expired_reservations()
+except ImportError:
+    consolidate_stock_shards_task = None
+    release_expired_reservations_task = None
@@ -0,0 +1,371 @@
+"""
+Two-tier cache: a bounded in-process LRU (L1) in front of the Django cache (L2, Redis in production).
+
+Meant for small, hot, read-mostly values such as tenant records and cache version counters:
+an L1 hit is a dict lookup instead of a network round trip. Writes go to L2 and are
+broadcast on an invalidation bus so every worker process drops its L1 copy:
+
+- Redis pub/sub when the default cache is django-redis,
+- Postgres LISTEN/NOTIFY when only Postgres is available,
+- nothing when neither is (single process, e.g. runserver).
+
+L1 entries also expire after a short TTL, so a missed bus message can only serve stale
+data for that long. When L2 is itself per process (LocMemCache with the Postgres bus), bus
+messages drop the keys from L2 as well, and a reconnect drops every L2 key this class wrote
+(and only those: the rest of the local cache is left alone), since every worker holds its own
+copy there too. Values held in L1 are shared by all threads of the process: treat
+them as read-only.
+"""
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'L1_MAX_ENTRIES': 2048,
+    'L1_TTL': 30,
+    'BUS': 'auto',  # 'auto' | 'redis' | 'postgres' | 'none'
+    'CHANNEL': 'tiered_cache_invalidate',
+}
+# pg_notify payloads are limited to 8000 bytes; stay well below it
+MAX_PAYLOAD = 7000
+_MISSING = object()
+# Cache backends whose data is private to one process
+PROCESS_LOCAL_BACKENDS = ('LocMemCache', 'DummyCache')
+
+
+def tiered_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'TIERED_CACHE', {})}
+
+
+def default_cache_is_shared():
+    """False when the default cache lives in each process (LocMemCache, DummyCache)."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    return backend.rsplit('.', 1)[-1] not in PROCESS_LOCAL_BACKENDS
+
+
+class LocalLRU:
+    """Thread-safe bounded LRU whose entries expire after ttl seconds."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def discard(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisBus:
+    """Invalidation messages over Redis pub/sub, on the default django-redis connection."""
+    name = 'redis'
+
+    def __init__(self, channel):
+        from django_redis import get_redis_connection
+        self.channel = channel
+        self.client = get_redis_connection('default')
+
+    def publish(self, payload):
+        self.client.publish(self.channel, payload)
+
+    def listen(self, on_message, on_connect, stopped):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        on_connect()
+        try:
+            while not stopped.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                data = message.get('data')
+                on_message(data.decode('utf-8') if isinstance(data, bytes) else data)
+        finally:
+            pubsub.close()
+
+
+class PostgresBus:
+    """
+    Invalidation messages over Postgres LISTEN/NOTIFY.
+
+    NOTIFY is sent on the request's own connection, so inside a transaction it is delivered
+    at commit (and dropped on rollback); the listener holds one extra autocommit connection.
+    """
+    name = 'postgres'
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def publish(self, payload):
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def listen(self, on_message, on_connect, stopped):
+        import psycopg2
+        from django.db import connections
+        params = connections['default'].get_connection_params()
+        params.pop('cursor_factory', None)
+        conn = psycopg2.connect(**params)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            on_connect()
+            while not stopped.is_set():
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    on_message(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+
+def _select_bus(config):
+    """The bus to use for config['BUS'], or None."""
+    choice = config['BUS']
+    if choice == 'none':
+        return None
+    cache_backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    db_engine = settings.DATABASES.get('default', {}).get('ENGINE', '')
+    if choice == 'redis' or (choice == 'auto' and 'django_redis' in cache_backend):
+        return RedisBus(config['CHANNEL'])
+    if choice == 'postgres' or (choice == 'auto' and 'postgresql' in db_engine):
+        return PostgresBus(config['CHANNEL'])
+    return None
+
+
+class TieredCache:
+    """
+    L1 (per process) + L2 (django cache) with cross-process L1 invalidation.
+
+    Only keys written through this class are mirrored in L1; misses are never cached in L1.
+    """
+
+    def __init__(self, config=None):
+        self._config = config
+        self._lock = threading.Lock()
+        self._pid = None
+        self.l1 = None
+        self.l2_local = False
+        # Keys this process wrote to a per-process L2; all of them are dropped on reconnect
+        self._l2_keys = set()
+        self._l2_keys_lock = threading.Lock()
+        self.bus = None
+        self.source = uuid.uuid4().hex
+        self.connected = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _ensure_started(self):
+        # Re-initialise after fork (gunicorn --preload, Celery prefork): the parent's
+        # listener thread and L1 contents do not belong to the child.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            config = self._config or tiered_config()
+            self.l1 = LocalLRU(config['L1_MAX_ENTRIES'], config['L1_TTL'])
+            self.l2_local = not default_cache_is_shared()
+            self._l2_keys = set()
+            self.source = uuid.uuid4().hex
+            self.connected = threading.Event()
+            self._stopped = threading.Event()
+            try:
+                self.bus = _select_bus(config)
+            except Exception as e:
+                logger.warning("Tiered cache invalidation bus unavailable: %s", e)
+                self.bus = None
+            if self.bus is not None:
+                self._thread = threading.Thread(target=self._listen_forever, name='tiered-cache-bus', daemon=True)
+                self._thread.start()
+            self._pid = os.getpid()
+
+    def _listen_forever(self):
+        delay = 1
+        while not self._stopped.is_set():
+            try:
+                self.bus.listen(self._on_message, self._on_connect, self._stopped)
+            except Exception as e:
+                logger.warning("Tiered cache bus (%s) disconnected: %s", self.bus.name, e)
+            if self.connected.is_set():
+                delay = 1
+            self.connected.clear()
+            # Messages may have been missed while disconnected
+            self._drop()
+            self._stopped.wait(delay)
+            delay = min(delay * 2, 30)
+
+    def _track(self, key):
+        if self.l2_local:
+            with self._l2_keys_lock:
+                self._l2_keys.add(key)
+
+    def _drop(self, keys=None):
+        """
+        Forget keys in L1, and in L2 when L2 is per process. keys=None means every key:
+        all of L1, and the L2 keys written through this class (never the whole cache).
+        """
+        if keys is None:
+            self.l1.clear()
+            if self.l2_local:
+                with self._l2_keys_lock:
+                    keys, self._l2_keys = list(self._l2_keys), set()
+                cache.delete_many(keys)
+        else:
+            self.l1.discard(keys)
+            if self.l2_local:
+                with self._l2_keys_lock:
+                    self._l2_keys.difference_update(keys)
+                cache.delete_many(keys)
+
+    def _on_connect(self):
+        self._drop()
+        self.connected.set()
+
+    def _on_message(self, payload):
+        try:
+            message = json.loads(payload)
+        except (TypeError, ValueError):
+            return
+        if message.get('src') == self.source:
+            return
+        self._drop(message.get('keys'))
+
+    def _publish(self, keys):
+        if self.bus is None or not keys:
+            return
+        batches, batch, size = [], [], 0
+        for key in keys:
+            length = len(json.dumps(key)) + 1
+            if batch and size + length > MAX_PAYLOAD:
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(key)
+            size += length
+        batches.append(batch)
+        for batch in batches:
+            try:
+                self.bus.publish(json.dumps({'src': self.source, 'keys': batch}))
+            except Exception as e:
+                logger.warning("Tiered cache invalidation publish failed: %s", e)
+
+    def get(self, key, default=None, l1_ttl=None):
+        self._ensure_started()
+        value = self.l1.get(key)
+        if value is not _MISSING:
+            return value
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.l1.set(key, value, l1_ttl)
+        return value
+
+    def get_many(self, keys, l1_ttl=None):
+        self._ensure_started()
+        found = {}
+        remote = []
+        for key in keys:
+            value = self.l1.get(key)
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if remote:
+            fetched = cache.get_many(remote)
+            for key, value in fetched.items():
+                self.l1.set(key, value, l1_ttl)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, l1_ttl=None):
+        self._ensure_started()
+        cache.set(key, value, timeout)
+        self._track(key)
+        self.l1.set(key, value, l1_ttl)
+        self._publish([key])
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._ensure_started()
+        added = cache.add(key, value, timeout)
+        if added:
+            self._track(key)
+            self.l1.discard([key])
+            self._publish([key])
+        return added
+
+    def incr(self, key, delta=1):
+        """Increment in L2 (ValueError if missing) and drop every worker's L1 copy."""
+        self._ensure_started()
+        value = cache.incr(key, delta)
+        self._track(key)
+        self.invalidate(key)
+        return value
+
+    def delete(self, key):
+        self._ensure_started()
+        cache.delete(key)
+        self.invalidate(key)
+
+    def invalidate(self, *keys):
+        """Drop keys from L1 here and in every other worker (and from their L2 when it is per process)."""
+        self._ensure_started()
+        self.l1.discard(keys)
+        self._publish(keys)
+
+    def clear_local(self):
+        self._ensure_started()
+        self.l1.clear()
+
+    def close(self):
+        """Stop the bus listener (releases its connection); the next use starts a new one."""
+        with self._lock:
+            self._stopped.set()
+            if self._thread is not None and self._pid == os.getpid():
+                self._thread.join(timeout=5)
+            self._thread = None
+            self._pid = None
+
+
+tiered_cache = TieredCache()
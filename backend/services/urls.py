@@ -4,6 +4,7 @@ from .views import ServiceViewSet
 # Service routes (matching original API: /api/service/)
 urlpatterns = [
     path('get-all', ServiceViewSet.as_view({'get': 'get_all'}), name='get-all-services'),
+    path('search', ServiceViewSet.as_view({'get': 'search'}), name='search-services'),
     path('<int:pk>', ServiceViewSet.as_view({'get': 'get_single'}), name='get-single-service'),
     path('create', ServiceViewSet.as_view({'post': 'create'}), name='create-service'),
     path('update/<int:pk>', ServiceViewSet.as_view({'put': 'update'}), name='update-service'),
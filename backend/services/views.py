@@ -2,21 +2,53 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.pagination import PageNumberPagination
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from django.core.cache import cache
+from django.db import transaction, IntegrityError
+from django.db.models import Prefetch, Q
+from django.utils import timezone
 from django.utils.decorators import method_decorator
+from barbershops.pagination import KeysetPagination, InvalidCursor
+from barbershops.permissions import IsBarbershopAdmin
 from barbershops.utils import filter_by_barbershop, get_barbershop_from_request
-from .cache_utils import cached_view
 import cloudinary
 import cloudinary.uploader
-from .models import Service, Product, ProductImage, ProductReview, Order, OrderItem, Category
+from .models import Service, Product, ProductImage, ProductReview, Order, Category
 from .serializers import (
-    ServiceSerializer, ProductSerializer, OrderSerializer,
+    ServiceSerializer, ProductSerializer, ProductListSerializer, OrderSerializer,
     OrderItemSerializer, CategorySerializer, ProductReviewSerializer
 )
+from .ratings import apply_product_review
+from .search import search_queryset
+from . import product_search
+from .catalog import get_catalog_json
+from .inventory import OrderError, place_order, set_stock
 from accounts.permissions import IsAdminUser
 import re
+from datetime import datetime, timedelta
+
+
+class ServiceSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def _optional_number(params, name, cast=float):
+    """Parsed query param, None when absent; raises ValueError naming the param when malformed."""
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid {name}.')
+
+
+def _start_of_day(value):
+    """Aware midnight (current time zone) of a YYYY-MM-DD string; ValueError if malformed."""
+    return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
 
 
 class ServiceViewSet(viewsets.ModelViewSet):
@@ -33,24 +65,59 @@ class ServiceViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def get_all(self, request):
-        """Get all services (matching original API)."""
-        services = self.get_queryset()
-        formatted_services = []
-        for service in services:
-            formatted_services.append({
-                '_id': str(service.id),
-                'name': service.name,
-                'description': service.description,
-                'price': float(service.price),
-                'duration': service.duration,
-                'category': service.category,
-                'imageUrl': service.image_url or '',
-            })
-        
+        """Active services of the request's shop (every shop without one); cached JSON bytes."""
+        content = get_catalog_json(get_barbershop_from_request(request))
+        return HttpResponse(content, content_type='application/json')
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        GET /api/service/search?lat=&lng=&radius=5&category=&min_price=&max_price=&max_duration=&q=&sort=distance|price
+        Active services across discoverable shops within radius km (max 50), from the ServiceLocation index.
+        Paginated (page, page_size); each item carries its shop and distance_km.
+        """
+        params = request.query_params
+        try:
+            lat = _optional_number(params, 'lat')
+            lng = _optional_number(params, 'lng')
+            radius = _optional_number(params, 'radius') or 5
+            min_price = _optional_number(params, 'min_price')
+            max_price = _optional_number(params, 'max_price')
+            max_duration = _optional_number(params, 'max_duration', int)
+        except ValueError as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if lat is None or lng is None:
+            return Response({
+                'success': False,
+                'message': 'Query parameters "lat" and "lng" are required.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        qs = search_queryset(
+            lat, lng, max(0.1, min(50.0, radius)),
+            category=(params.get('category') or '').strip() or None,
+            min_price=min_price,
+            max_price=max_price,
+            max_duration=max_duration,
+            query=(params.get('q') or '').strip() or None,
+            sort=params.get('sort', 'distance'),
+        )
+        paginator = ServiceSearchPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        results = [{
+            '_id': str(row.service_id),
+            'name': row.name,
+            'category': row.category,
+            'price': float(row.price),
+            'duration_minutes': row.duration_minutes,
+            'barbershop': {'id': row.barbershop_id, 'name': row.shop_name},
+            'distance_km': round(row.distance_km, 2),
+        } for row in page]
         return Response({
             'success': True,
-            'message': 'All services fetched successfully',
-            'services': formatted_services
+            'message': 'Services found',
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'services': results,
         })
     
     @action(detail=True, methods=['get'])
@@ -101,9 +168,6 @@ class ServiceViewSet(viewsets.ModelViewSet):
             
             service = Service.objects.create(**service_data)
             
-            # Invalidate cache
-            cache.delete_pattern('services_*')
-            
             serializer = self.get_serializer(service)
             
             return Response({
@@ -241,22 +305,29 @@ class ProductViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def get_serializer_class(self):
+        if self.action in ('get_all', 'top'):
+            return ProductListSerializer
+        return super().get_serializer_class()
+    
     @action(detail=False, methods=['get'])
     def get_all(self, request):
-        """Get all products."""
-        products = self.get_queryset()
+        """Get all products (list items: no inline reviews; 2 queries for any catalog size)."""
+        products = list(self.get_queryset().prefetch_related('images'))
         serializer = self.get_serializer(products, many=True)
         return Response({
             'success': True,
             'message': 'all products fetched successfully',
-            'totalProducts': products.count(),
+            'totalProducts': len(products),
             'products': serializer.data
         })
     
     @action(detail=False, methods=['get'])
     def top(self, request):
-        """Get top 3 products by rating."""
-        products = Product.objects.filter(is_active=True).order_by('-rating')[:3]
+        """Get top 3 products by rating (of the request's shop when there is one)."""
+        products = filter_by_barbershop(
+            Product.objects.filter(is_active=True), get_barbershop_from_request(request)
+        ).prefetch_related('images').order_by('-rating', '-num_reviews', 'id')[:3]
         serializer = self.get_serializer(products, many=True)
         return Response({
             'success': True,
@@ -264,9 +335,51 @@ class ProductViewSet(viewsets.ModelViewSet):
             'products': serializer.data
         })
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        GET /api/product/search?q=&category=&min_price=&max_price=&min_rating=&max_rating=
+            &sort=relevance|rating|price|-price|newest
+        Products of the request's shop matching every word of q (as prefixes), ranked by text
+        relevance blended with rating. Paginated (page, page_size); facets.categories counts
+        matches per category ignoring the category filter.
+        """
+        params = request.query_params
+        try:
+            filters = {
+                'min_price': _optional_number(params, 'min_price'),
+                'max_price': _optional_number(params, 'max_price'),
+                'min_rating': _optional_number(params, 'min_rating'),
+                'max_rating': _optional_number(params, 'max_rating'),
+            }
+        except ValueError as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        barbershop_id = get_barbershop_from_request(request)
+        query = (params.get('q') or '').strip() or None
+        category = (params.get('category') or '').strip() or None
+        qs = product_search.search_queryset(
+            barbershop_id, query, sort=params.get('sort'), category=category, **filters
+        ).prefetch_related('images')
+        paginator = ServiceSearchPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        return Response({
+            'success': True,
+            'message': 'Products found',
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'products': ProductListSerializer(page, many=True).data,
+            'facets': {'categories': product_search.category_facets(barbershop_id, query, **filters)},
+        })
+    
     def retrieve(self, request, pk=None):
         """Get single product."""
-        product = get_object_or_404(Product, pk=pk)
+        product = get_object_or_404(
+            Product.objects.prefetch_related(
+                'images', Prefetch('reviews', queryset=ProductReview.objects.select_related('user')),
+            ),
+            pk=pk,
+        )
         serializer = self.get_serializer(product)
         return Response({
             'success': True,
@@ -297,24 +410,22 @@ class ProductViewSet(viewsets.ModelViewSet):
                 folder=f'products/{barbershop.id}'
             )
             
-            product = Product.objects.create(
-                barbershop=barbershop,
-                name=request.data.get('name'),
-                description=request.data.get('description'),
-                price=request.data.get('price'),
-                category=request.data.get('category'),
-                stock=request.data.get('stock'),
-            )
-            
-            ProductImage.objects.create(
-                product=product,
-                image_url=upload_result['secure_url'],
-                public_id=upload_result['public_id']
-            )
-            
-            # Invalidate cache
-            from .cache_utils import invalidate_cache_pattern
-            invalidate_cache_pattern('products_*')
+            # The search vector (services.signals.refresh_search_vector) commits with the product
+            with transaction.atomic():
+                product = Product.objects.create(
+                    barbershop=barbershop,
+                    name=request.data.get('name'),
+                    description=request.data.get('description'),
+                    price=request.data.get('price'),
+                    category=request.data.get('category'),
+                    stock=request.data.get('stock'),
+                )
+                
+                ProductImage.objects.create(
+                    product=product,
+                    image_url=upload_result['secure_url'],
+                    public_id=upload_result['public_id']
+                )
             
             return Response({
                 'success': True,
@@ -332,18 +443,29 @@ class ProductViewSet(viewsets.ModelViewSet):
         product = get_object_or_404(Product, pk=pk)
         data = request.data
         
-        if 'name' in data:
-            product.name = data['name']
-        if 'description' in data:
-            product.description = data['description']
-        if 'price' in data:
-            product.price = data['price']
+        fields = [field for field in ('name', 'description', 'price', 'category') if field in data]
+        for field in fields:
+            setattr(product, field, data[field])
+        stock = None
         if 'stock' in data:
-            product.stock = data['stock']
-        if 'category' in data:
-            product.category = data['category']
-        
-        product.save()
+            try:
+                stock = int(data['stock'])
+            except (TypeError, ValueError):
+                stock = -1
+            if stock < 0:
+                return Response({
+                    'success': False,
+                    'message': 'stock must be a whole number of at least 0'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # The search vector (services.signals.refresh_search_vector) commits with the product.
+        # Stock only moves through set_stock (which locks the row and its shards), never through
+        # the possibly stale stock value loaded above.
+        with transaction.atomic():
+            if fields:
+                product.save(update_fields=fields + ['updated_at'])
+            if stock is not None:
+                set_stock(product.id, stock)
         
         return Response({
             'success': True,
@@ -442,27 +564,63 @@ class ProductViewSet(viewsets.ModelViewSet):
                 'message': 'product already reviewed'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        rating = int(request.data.get('rating', 0))
+        try:
+            rating = int(request.data.get('rating', 0))
+        except (TypeError, ValueError):
+            rating = 0
+        if rating < 1 or rating > 5:
+            return Response({
+                'success': False,
+                'message': 'rating must be between 1 and 5'
+            }, status=status.HTTP_400_BAD_REQUEST)
         comment = request.data.get('comment', '')
         
-        ProductReview.objects.create(
-            product=product,
-            user=user,
-            rating=rating,
-            comment=comment
-        )
-        
-        # Update product rating
-        reviews = product.reviews.all()
-        product.num_reviews = reviews.count()
-        if reviews.count() > 0:
-            product.rating = sum(r.rating for r in reviews) / reviews.count()
-        product.save()
+        # Insert the review and fold it into the stored aggregate in one transaction
+        try:
+            with transaction.atomic():
+                ProductReview.objects.create(
+                    product=product,
+                    user=user,
+                    rating=rating,
+                    comment=comment
+                )
+                apply_product_review(product.id, rating)
+        except IntegrityError:
+            return Response({
+                'success': False,
+                'message': 'product already reviewed'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'success': True,
             'message': 'Review Added Successfully'
         })
+    
+    @action(detail=True, methods=['get'])
+    def reviews(self, request, pk=None):
+        """
+        Reviews of one product, newest first. Keyset-paginated: page_size (max 100) and
+        cursor=<next_cursor from the previous page>.
+        """
+        product = get_object_or_404(Product.objects.only('id'), pk=pk, is_active=True)
+        paginator = KeysetPagination(['-created_at', '-id'])
+        qs = ProductReview.objects.filter(product=product).select_related('user')
+        try:
+            reviews, next_cursor = paginator.paginate(
+                qs, request.query_params.get('cursor'), KeysetPagination.get_page_size(request),
+            )
+        except InvalidCursor as e:
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'success': True,
+            'message': 'product reviews fetched successfully',
+            'reviews': ProductReviewSerializer(reviews, many=True).data,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+        })
 
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -470,6 +628,12 @@ class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+
+    def get_permissions(self):
+        """Shop admins only for the shop-wide order listing (order_urls maps actions without the router)."""
+        if self.action == 'admin_get_all_orders':
+            return [IsAuthenticated(), IsBarbershopAdmin()]
+        return super().get_permissions()
     
     def get_queryset(self):
         """Filter orders by user role and barbershop (multi-tenant)."""
@@ -484,8 +648,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         return filter_by_barbershop(queryset, barbershop_id)
     
     def create(self, request):
-        """Create order with pessimistic locking on product stock (prevents oversell)."""
-        from django.db import transaction
+        """Create order; stock is taken with conditional set-based updates (prevents oversell)."""
         data = request.data
         shipping_info = data.get('shipping_info') or data.get('shippingInfo') or {}
         order_items = data.get('order_items') or data.get('orderItems') or []
@@ -498,59 +661,8 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            with transaction.atomic():
-                product_ids = [item.get('product') or item.get('productId') for item in order_items]
-                products = {
-                    p.id: p
-                    for p in Product.objects.select_for_update().filter(id__in=product_ids)
-                }
-                for item in order_items:
-                    pid = item.get('product') or item.get('productId')
-                    qty = int(item.get('quantity', 0))
-                    name = item.get('name', '')
-                    if not pid or qty <= 0:
-                        raise ValueError('Invalid order item')
-                    product = products.get(pid)
-                    if not product:
-                        return Response(
-                            {'success': False, 'message': f'Product {pid} not found'},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-                    if product.stock < qty:
-                        return Response(
-                            {'success': False, 'message': f'Insufficient stock for {product.name}'},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                order = Order.objects.create(
-                    barbershop=barbershop,
-                    user=request.user,
-                    shipping_address=shipping_info.get('address', ''),
-                    shipping_city=shipping_info.get('city', ''),
-                    shipping_country=shipping_info.get('country', ''),
-                    payment_method=data.get('payment_method') or data.get('paymentMethod') or 'COD',
-                    payment_info_id=(data.get('payment_info') or data.get('paymentInfo') or {}).get('id', ''),
-                    payment_info_status=(data.get('payment_info') or data.get('paymentInfo') or {}).get('status', ''),
-                    item_price=float(data.get('item_price') or data.get('itemPrice') or 0),
-                    tax=float(data.get('tax') or 0),
-                    shipping_charges=float(data.get('shipping_charges') or data.get('shippingCharges') or 0),
-                    total_amount=float(data.get('total_amount') or data.get('totalAmount') or 0),
-                )
-                for item in order_items:
-                    pid = item.get('product') or item.get('productId')
-                    qty = int(item.get('quantity', 0))
-                    product = products[pid]
-                    OrderItem.objects.create(
-                        order=order,
-                        product_id=pid,
-                        name=item.get('name', product.name),
-                        price=float(item.get('price', product.price)),
-                        quantity=qty,
-                        image=item.get('image', ''),
-                    )
-                    product.stock -= qty
-                    product.save(update_fields=['stock'])
-        except ValueError as e:
+            order = place_order(request.user, barbershop, order_items, shipping_info, data)
+        except OrderError as e:
             return Response(
                 {'success': False, 'message': str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -579,15 +691,8 @@ class OrderViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def my_orders(self, request):
-        """Get user's orders."""
-        orders = Order.objects.filter(user=request.user)
-        serializer = self.get_serializer(orders, many=True)
-        return Response({
-            'success': True,
-            'message': 'Your Order data',
-            'totalOrder': orders.count(),
-            'orders': serializer.data
-        })
+        """Current user's orders, newest first (keyset-paginated, see _order_page)."""
+        return self._order_page(request, Order.objects.filter(user=request.user), 'Your Order data')
     
     @action(detail=True, methods=['get'])
     def get_single(self, request, pk=None):
@@ -600,18 +705,57 @@ class OrderViewSet(viewsets.ModelViewSet):
             'order': serializer.data
         })
     
-    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    @action(detail=False, methods=['get'])
     def admin_get_all_orders(self, request):
-        """Get all orders (admin only)."""
-        orders = Order.objects.all()
-        serializer = self.get_serializer(orders, many=True)
+        """The current shop's orders, newest first (shop admins; keyset-paginated, see _order_page)."""
+        queryset = Order.objects.filter(barbershop_id=request.barbershop.id)
+        return self._order_page(request, queryset, 'All Orders Data')
+
+    def _order_page(self, request, queryset, message):
+        """
+        One page of orders with their items (one extra query for all items on the page).
+        Filters: status (processing/shipped/delivered), from and to (YYYY-MM-DD creation
+        dates, inclusive). Paging: page_size (max 100) and cursor=<next_cursor>.
+        """
+        params = request.query_params
+        order_status = params.get('status')
+        if order_status:
+            if order_status not in dict(Order.ORDER_STATUS):
+                return Response({
+                    'success': False,
+                    'message': f'Invalid status: {order_status}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(order_status=order_status)
+        try:
+            if params.get('from'):
+                queryset = queryset.filter(created_at__gte=_start_of_day(params['from']))
+            if params.get('to'):
+                queryset = queryset.filter(created_at__lt=_start_of_day(params['to']) + timedelta(days=1))
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'from and to must be dates (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        paginator = KeysetPagination(['-created_at', '-id'])
+        try:
+            orders, next_cursor = paginator.paginate(
+                queryset.prefetch_related('order_items'),
+                params.get('cursor'),
+                KeysetPagination.get_page_size(request),
+            )
+        except InvalidCursor as e:
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         return Response({
             'success': True,
-            'message': 'All Orders Data',
-            'totalOrders': orders.count(),
-            'orders': serializer.data
+            'message': message,
+            'orders': self.get_serializer(orders, many=True).data,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
         })
-    
+
     @action(detail=True, methods=['put'], permission_classes=[IsAuthenticated, IsAdminUser])
     def admin_change_status(self, request, pk=None):
         """Change order status (admin only)."""
@@ -621,7 +765,6 @@ class OrderViewSet(viewsets.ModelViewSet):
             order.order_status = 'shipped'
         elif order.order_status == 'shipped':
             order.order_status = 'delivered'
-            from django.utils import timezone
             order.delivered_at = timezone.now()
         else:
             return Response({
@@ -1,5 +1,6 @@
-import React, { useState, useCallback } from 'react';
+import React, { useState, useCallback, useRef } from 'react';
 import {
+  ActivityIndicator,
   ScrollView,
   StyleSheet,
   Text,
@@ -15,18 +16,31 @@ import OrderItem from '../../components/Form/OrderItem';
 import { useTheme } from '../../context/ThemeContext';
 import { spacing, typography } from '../../theme';
 
+const PAGE_SIZE = 20;
+
+/** Cursor of the next page from a my-orders response (camelCase or snake_case API), or null. */
+const nextCursorOf = (data) => {
+  const hasMore = data?.hasMore ?? data?.has_more;
+  return hasMore ? data?.nextCursor ?? data?.next_cursor ?? null : null;
+};
+
 const MyOrders = () => {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [refreshing, setRefreshing] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const loadingMoreRef = useRef(false);
 
+  // my-orders is paginated (newest first): the first page here, older ones in loadMore
   const fetchOrders = useCallback(async () => {
     try {
       setError(null);
-      const res = await api.get('order/my-orders');
+      const res = await api.get('order/my-orders', { params: { page_size: PAGE_SIZE } });
       if (res.data?.success) {
         setOrders(res.data.orders || []);
+        setNextCursor(nextCursorOf(res.data));
       }
     } catch (e) {
       setError(e.response?.data?.message || 'Failed to load orders');
@@ -36,6 +50,34 @@ const MyOrders = () => {
     }
   }, []);
 
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMoreRef.current) return;
+    loadingMoreRef.current = true;
+    setLoadingMore(true);
+    try {
+      const res = await api.get('order/my-orders', {
+        params: { page_size: PAGE_SIZE, cursor: nextCursor },
+      });
+      if (res.data?.success) {
+        setOrders((prev) => [...prev, ...(res.data.orders || [])]);
+        setNextCursor(nextCursorOf(res.data));
+      }
+    } catch (e) {
+      // Keep what is shown; scrolling to the end again retries
+    } finally {
+      loadingMoreRef.current = false;
+      setLoadingMore(false);
+    }
+  }, [nextCursor]);
+
+  const handleScroll = useCallback(
+    ({ nativeEvent }) => {
+      const { layoutMeasurement, contentOffset, contentSize } = nativeEvent;
+      if (layoutMeasurement.height + contentOffset.y >= contentSize.height - 200) loadMore();
+    },
+    [loadMore]
+  );
+
   React.useEffect(() => {
     fetchOrders();
   }, [fetchOrders]);
@@ -64,6 +106,8 @@ const MyOrders = () => {
           }
           contentContainerStyle={styles.list}
           showsVerticalScrollIndicator={false}
+          onScroll={handleScroll}
+          scrollEventThrottle={200}
         >
           {orders.length === 0 ? (
             <EmptyState
@@ -76,6 +120,9 @@ const MyOrders = () => {
               <OrderItem key={order._id ?? order.id} order={order} />
             ))
           )}
+          {loadingMore ? (
+            <ActivityIndicator style={styles.more} color={colors.primary} />
+          ) : null}
         </ScrollView>
         )}
       </View>
@@ -92,4 +139,5 @@ const styles = StyleSheet.create({
     marginBottom: spacing.md,
   },
   list: { paddingBottom: spacing.xxl },
+  more: { marginVertical: spacing.md },
 });